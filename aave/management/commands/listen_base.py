@@ -8,6 +8,7 @@ from django.core.cache import cache
 
 from aave.models import Asset
 from blockchains.models import Network
+from utils.message_pool import PRIORITY_NORMAL, MessagePool
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +45,8 @@ class WebsocketCommand:
         subscribe_message_json = json.dumps(subscribe_message)
         logger.info(subscribe_message_json)
 
+        await self.start_message_pool()
+
         # Reconnection loop
         while True:
             try:
@@ -62,8 +65,9 @@ class WebsocketCommand:
                         if "params" not in msg:
                             continue
 
-                        # Process message without awaiting to reduce latency
-                        asyncio.create_task(self.process(msg))
+                        # Hand off to the bounded worker pool, the recv loop never
+                        # waits on processing
+                        self.message_pool.submit(msg, self.get_message_priority(msg))
 
             except websockets.exceptions.ConnectionClosed as e:
                 logger.warning(f"Connection closed with error: {e}. Reconnecting...")
@@ -72,6 +76,8 @@ class WebsocketCommand:
                 logger.error(f"Error in connection: {e}")
                 break
 
+        await self.message_pool.stop()
+
     def handle(self, *args, **options):
         self.network_name = options["network"]
         self.network = Network.get_network_by_name(self.network_name)
@@ -81,12 +87,23 @@ class WebsocketCommand:
         # Use uvloop if available for better performance
         try:
             import uvloop
+
             asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
         except ImportError:
             pass
 
         asyncio.run(self.listen())
 
+    async def start_message_pool(self):
+        self.message_pool = MessagePool(
+            self.process, name=self.__module__.rsplit(".", 1)[-1]
+        )
+        await self.message_pool.start()
+
+    def get_message_priority(self, msg) -> int:
+        """Priority of a frame in the message pool, lower values are processed first."""
+        return PRIORITY_NORMAL
+
     def get_subscribe_message(self):
         raise NotImplementedError
 
@@ -11,6 +11,13 @@ CREATE TABLE IF NOT EXISTS aave_ethereum.BalanceTransfer
     `logIndex` UInt64,
     `blockTimestamp` DateTime64,
     `type` String,
-    `asset` String
+    `asset` String,
+    INDEX idx__from `_from` TYPE bloom_filter(0.01) GRANULARITY 4,
+    INDEX idx__to `_to` TYPE bloom_filter(0.01) GRANULARITY 4,
+    INDEX idx_address `address` TYPE bloom_filter(0.01) GRANULARITY 4,
+    INDEX idx_asset `asset` TYPE bloom_filter(0.01) GRANULARITY 4
 )
-ENGINE = Log;
+ENGINE = ReplacingMergeTree
+PARTITION BY intDiv(blockNumber, 1000000)
+ORDER BY (blockNumber, transactionIndex, logIndex, transactionHash)
+SETTINGS non_replicated_deduplication_window = 1000;
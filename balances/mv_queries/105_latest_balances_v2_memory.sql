@@ -1,12 +1,21 @@
--- In-memory table for fast queries on latest balances
--- Populated periodically from LatestBalances_v2
+-- Keyed store for fast queries on latest balances
 -- Only includes rows where collateral or debt balance > 0
+--
+-- Maintained by ChildBalancesSynchronizeTask:
+-- - after each sync window only the (user, asset) pairs touched by balance events
+--   are upserted from LatestBalances_v2 FINAL, and pairs back to zero are deleted
+-- - a periodic full rebuild swaps in a fresh copy with EXCHANGE TABLES
+--
+-- EmbeddedRocksDB needs a single column primary key, so user_asset holds
+-- concat(user, ':', asset). Re-inserting a pair replaces its row.
 CREATE TABLE IF NOT EXISTS aave_ethereum.LatestBalances_v2_Memory
 (
+    user_asset String,
     user String,
     asset String,
     collateral_scaled_balance Int256,
     variable_debt_scaled_balance Int256,
     updated_at DateTime64
 )
-ENGINE = Memory;
+ENGINE = EmbeddedRocksDB
+PRIMARY KEY user_asset;
@@ -28,13 +28,13 @@ SELECT
     dictGetOrDefault('aave_ethereum.dict_debt_liquidity_index', 'liquidityIndex', aave_ethereum.ReserveInitialized.asset, toUInt256(0)) AS max_variable_debt_liquidityIndex
 
 FROM aave_ethereum.ReserveInitialized
-LEFT JOIN aave_ethereum.LatestCollateralConfigurationChanged
+LEFT JOIN aave_ethereum.LatestCollateralConfigurationChanged FINAL
     ON aave_ethereum.ReserveInitialized.asset = aave_ethereum.LatestCollateralConfigurationChanged.asset
-LEFT JOIN aave_ethereum.LatestEModeAssetCategoryChanged
+LEFT JOIN aave_ethereum.LatestEModeAssetCategoryChanged FINAL
     ON aave_ethereum.ReserveInitialized.asset = aave_ethereum.LatestEModeAssetCategoryChanged.asset
-LEFT JOIN aave_ethereum.LatestEModeCategoryAdded
+LEFT JOIN aave_ethereum.LatestEModeCategoryAdded FINAL
     ON aave_ethereum.LatestEModeAssetCategoryChanged.newCategoryId = aave_ethereum.LatestEModeCategoryAdded.categoryId
-LEFT JOIN aave_ethereum.LatestTokenMetadata
+LEFT JOIN aave_ethereum.LatestTokenMetadata FINAL
     ON aave_ethereum.ReserveInitialized.asset = aave_ethereum.LatestTokenMetadata.asset
 LEFT JOIN aave_ethereum.LatestPriceEvent
     ON aave_ethereum.ReserveInitialized.asset = aave_ethereum.LatestPriceEvent.asset
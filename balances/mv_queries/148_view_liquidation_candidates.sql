@@ -6,7 +6,8 @@
 -- 4. Selects best collateral asset based on profit calculation
 --
 -- This view uses accrued balances from view_user_asset_effective_balances (query 145)
--- and calculates effective values inline using asset metadata from dictionaries
+-- and calculates effective values inline using asset metadata from dictionaries.
+-- At-risk users are read from the incrementally maintained UserHealthFactor store (149).
 --
 -- IMPORTANT: collateral_balance and debt_balance are ACCRUED values (with interest applied)
 -- to match on-chain currentATokenBalance and currentVariableDebt for accurate comparisons
@@ -21,7 +22,7 @@ at_risk_users AS (
         effective_collateral_usd,
         effective_debt_usd,
         is_in_emode
-    FROM aave_ethereum.view_user_health_factor
+    FROM aave_ethereum.UserHealthFactor
     WHERE health_factor > 1.0
         AND health_factor <= 1.25
         AND effective_collateral_usd > 10000
@@ -0,0 +1,26 @@
+-- Incrementally maintained health factor store, one row per user
+-- Same columns as view_user_health_factor (146), materialised so that readers do
+-- not recompute every user's accrued balances on each query.
+--
+-- Maintained by UpdateUserHealthFactorsTask:
+-- - users touched by balance events are recomputed after each balance sync window
+-- - holders of re-priced assets are recomputed after each price event sync window
+-- - a periodic full rebuild swaps in a fresh copy to pick up interest accrual drift
+--
+-- EmbeddedRocksDB upserts by primary key, so re-inserting a user replaces its row.
+
+CREATE TABLE IF NOT EXISTS aave_ethereum.UserHealthFactor
+(
+    user String,
+    is_in_emode Int8,
+    total_accrued_collateral_balance Int256,
+    total_accrued_debt_balance Int256,
+    total_effective_collateral UInt256,
+    total_effective_debt UInt256,
+    effective_collateral_usd Float64,
+    effective_debt_usd Float64,
+    health_factor Float64,
+    updated_at DateTime64(6)
+)
+ENGINE = EmbeddedRocksDB
+PRIMARY KEY user;
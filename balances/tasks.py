@@ -3,14 +3,23 @@ import logging
 import os
 import time
 from collections import defaultdict
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 from celery import Task
+from django.core.cache import cache
 
 from balances.models import BalanceEvent
 from liquidations_v2.celery_app import app
 from utils.clickhouse.client import clickhouse_client
-from utils.constants import NETWORK_NAME
+from utils.constants import (
+    BACKFILL_CHECKPOINT_SIZE,
+    BACKFILL_STREAM_PAGE_SIZE,
+    BACKFILL_STREAMING,
+    ETH_CALL_BATCH_SIZE,
+    LATEST_BALANCES_MEMORY_REBUILD_SECONDS,
+    NETWORK_NAME,
+)
+from utils.interfaces.executor import RpcExecutor
 from utils.interfaces.tokens import AaveToken
 from utils.rpc import rpc_adapter
 from utils.tasks import EventSynchronizeMixin, ParentSynchronizeTaskMixin
@@ -29,7 +38,7 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
     ) -> Dict[str, List[Any]]:
         grouped_event_logs = {}
         for event_log in event_logs:
-            address = event_log.address
+            address = self.get_log_address(event_log)
             if address not in grouped_event_logs:
                 grouped_event_logs[address] = []
             grouped_event_logs[address].append(event_log)
@@ -39,45 +48,46 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
         for topic_0, event_logs in event_dicts.items():
             grouped_event_logs = self.group_event_logs_by_address(event_logs)
             parsed_event_logs = []
-            updated_network_events = []
+            logs_counts = {}
+            stored_log_keys = None
 
             filtered_network_events = network_events.filter(topic_0=topic_0)
             for network_event in filtered_network_events:
                 event_logs = grouped_event_logs.get(
                     network_event.contract_addresses[0], []
                 )
-                log_fields = [
-                    col_name
-                    for col_name, _ in network_event._get_clickhouse_log_columns()
-                ]
-                all_fields = [
-                    col_name for col_name, _ in network_event._get_clickhouse_columns()
-                ]
-                arg_fields = [field for field in all_fields if field not in log_fields]
-
                 if not event_logs:
                     continue
 
-                timestamps = self.get_timestamps_for_events(event_logs)
+                if self.decode_event_rows:
+                    event_rows = event_logs
+                else:
+                    event_rows = self.build_event_rows(network_event, event_logs)
+
+                # Every event of a topic writes to the same table, read its stored
+                # keys once. Rows still end with the log columns before type/asset
+                # are appended.
+                if stored_log_keys is None:
+                    stored_log_keys = self.get_stored_log_keys(
+                        network_event.name,
+                        [
+                            self.get_log_block_number(event_log)
+                            for event_log in event_dicts[topic_0]
+                        ],
+                    )
+                event_rows = self.filter_new_event_rows(event_rows, stored_log_keys)
+                if not event_rows:
+                    continue
 
-                for event_log in event_logs:
-                    event_log_args = getattr(event_log, "args")
-                    event_values = [
-                        getattr(event_log_args, field) for field in arg_fields
-                    ]
-                    log_values = [
-                        getattr(event_log, field)
-                        for field in log_fields
-                        if field != "blockTimestamp"
-                    ]
-                    log_values.append(timestamps[event_log.blockNumber])
-                    log_values.append(network_event.type)
-                    log_values.append(network_event.asset)
-                    parsed_event_log = event_values + log_values
-                    parsed_event_logs.append(parsed_event_log)
+                for event_row in event_rows:
+                    parsed_event_logs.append(
+                        list(event_row) + [network_event.type, network_event.asset]
+                    )
+
+                logs_counts[network_event.id] = len(event_rows)
 
-                network_event.logs_count += len(event_logs)
-                updated_network_events.append(network_event)
+            if not parsed_event_logs:
+                continue
 
             for i in range(3):
                 try:
@@ -87,6 +97,9 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
                     break
                 except Exception as e:
                     logger.error(f"Error inserting rows: {e}")
+                    # Fail the window so its cursor is not moved past lost rows
+                    if i == 2:
+                        raise
                     time.sleep(5)
 
             for i in range(3):
@@ -99,31 +112,157 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
 
                 logger.info(f"Number of records inserted: {len(parsed_event_logs)}")
 
-            BalanceEvent.objects.bulk_update(updated_network_events, ["logs_count"])
+            self.increment_logs_count(logs_counts)
 
-    def _refresh_memory_table(self):
+    MEMORY_TABLE_COLUMNS = """
+        concat(user, ':', asset) AS user_asset,
+        user,
+        asset,
+        collateral_scaled_balance,
+        variable_debt_scaled_balance,
+        updated_at
+    """
+    MEMORY_TABLE_CHUNK_SIZE = 5_000
+    MEMORY_TABLE_REBUILD_KEY = "latest_balances_memory_rebuild"
+    MEMORY_TABLE_METRICS_KEY = "latest_balances_memory_metrics"
+    MEMORY_TABLE_DDL_PATH = os.path.join(
+        os.path.dirname(__file__), "mv_queries", "105_latest_balances_v2_memory.sql"
+    )
+    MEMORY_TABLE_LAYOUT = ("EmbeddedRocksDB", "user_asset")
+    memory_table_checked = False
+
+    def _refresh_memory_table(self, user_asset_pairs: List[tuple] = None):
         """
-        Atomically refresh the in-memory table from LatestBalances_v2.
-        Only includes rows where collateral or debt balance > 0.
-        Uses EXCHANGE TABLES for atomic swap to avoid query downtime.
+        Bring LatestBalances_v2_Memory up to date with LatestBalances_v2.
+        Applies only the given (user, asset) pairs, unless no pairs are given, the
+        periodic full rebuild is due, the table had to be migrated or the
+        incremental refresh fails.
         """
+        rebuild_due = cache.add(
+            self.MEMORY_TABLE_REBUILD_KEY,
+            time.time(),
+            LATEST_BALANCES_MEMORY_REBUILD_SECONDS,
+        )
         try:
-            logger.info("Refreshing LatestBalances_v2_Memory table")
+            if self._migrate_memory_table():
+                rebuild_due = True
+        except Exception as e:
+            logger.error(f"Error checking LatestBalances_v2_Memory: {e}", exc_info=True)
+            cache.delete(self.MEMORY_TABLE_REBUILD_KEY)
+            return 0
+        if user_asset_pairs and not rebuild_due:
+            try:
+                return self._apply_memory_table_changes(user_asset_pairs)
+            except Exception as e:
+                logger.error(
+                    f"Error applying memory table changes, rebuilding: {e}",
+                    exc_info=True,
+                )
+        return self._rebuild_memory_table()
 
-            # Create temp table with fresh data
-            create_temp_query = """
-            CREATE TABLE aave_ethereum.LatestBalances_v2_Memory_temp
-            ENGINE = Memory
-            AS SELECT
-                user,
-                asset,
-                collateral_scaled_balance,
-                variable_debt_scaled_balance,
-                updated_at
-            FROM aave_ethereum.LatestBalances_v2
-            FINAL
-            WHERE collateral_scaled_balance > 0 OR variable_debt_scaled_balance > 0
+    def _migrate_memory_table(self) -> bool:
+        """
+        Recreate LatestBalances_v2_Memory from its DDL when the table in place has
+        another engine or primary key, e.g. the unkeyed table of older deployments
+        that CREATE TABLE IF NOT EXISTS leaves untouched. Checked once per worker.
+        Returns True if the table was recreated and needs a full rebuild.
+        """
+        if self.memory_table_checked:
+            return False
+
+        result = self.clickhouse_client.execute_query(
             """
+            SELECT engine, primary_key
+            FROM system.tables
+            WHERE database = %(db)s AND name = 'LatestBalances_v2_Memory'
+            """,
+            parameters={"db": self.clickhouse_client.db_name},
+        )
+        layout = tuple(result.result_rows[0]) if result.result_rows else None
+        recreated = layout != self.MEMORY_TABLE_LAYOUT
+        if recreated:
+            logger.warning(
+                f"LatestBalances_v2_Memory has layout {layout}, expected "
+                f"{self.MEMORY_TABLE_LAYOUT}; recreating it"
+            )
+            self.clickhouse_client.execute_query(
+                "DROP TABLE IF EXISTS aave_ethereum.LatestBalances_v2_Memory"
+            )
+            with open(self.MEMORY_TABLE_DDL_PATH, "r") as file:
+                self.clickhouse_client.execute_query(file.read())
+
+        self.memory_table_checked = True
+        return recreated
+
+    def _apply_memory_table_changes(self, user_asset_pairs: List[tuple]) -> int:
+        """
+        Upsert the non-zero rows of the given pairs and delete pairs whose
+        balances are back to zero.
+        """
+        start = time.time()
+        upserted = 0
+        for i in range(0, len(user_asset_pairs), self.MEMORY_TABLE_CHUNK_SIZE):
+            chunk = user_asset_pairs[i : i + self.MEMORY_TABLE_CHUNK_SIZE]
+            parameters = {
+                "users": tuple({user for user, _ in chunk}),
+                "keys": tuple(f"{user}:{asset}" for user, asset in chunk),
+            }
+            result = self.clickhouse_client.execute_query(
+                f"""
+                INSERT INTO aave_ethereum.LatestBalances_v2_Memory
+                SELECT {self.MEMORY_TABLE_COLUMNS}
+                FROM aave_ethereum.LatestBalances_v2
+                FINAL
+                WHERE user IN %(users)s
+                  AND concat(user, ':', asset) IN %(keys)s
+                  AND (collateral_scaled_balance > 0 OR variable_debt_scaled_balance > 0)
+                """,
+                parameters=parameters,
+            )
+            upserted += int(result.summary.get("written_rows", 0))
+            self.clickhouse_client.execute_query(
+                """
+                DELETE FROM aave_ethereum.LatestBalances_v2_Memory
+                WHERE user_asset IN (
+                    SELECT concat(user, ':', asset)
+                    FROM aave_ethereum.LatestBalances_v2
+                    FINAL
+                    WHERE user IN %(users)s
+                      AND concat(user, ':', asset) IN %(keys)s
+                      AND collateral_scaled_balance <= 0
+                      AND variable_debt_scaled_balance <= 0
+                )
+                """,
+                parameters=parameters,
+            )
+
+        metrics = cache.get(self.MEMORY_TABLE_METRICS_KEY) or {}
+        full_rows = metrics.get("full_rows")
+        metrics.update(
+            {
+                "mode": "incremental",
+                "rows_touched": len(user_asset_pairs),
+                "rows_upserted": upserted,
+                "duration_seconds": time.time() - start,
+            }
+        )
+        cache.set(self.MEMORY_TABLE_METRICS_KEY, metrics, timeout=None)
+        logger.info(
+            f"Applied {len(user_asset_pairs)} pairs ({upserted} upserted) to "
+            f"LatestBalances_v2_Memory in {metrics['duration_seconds']:.3f}s, "
+            f"vs {full_rows if full_rows is not None else 'unknown'} rows for a full rebuild"
+        )
+        return len(user_asset_pairs)
+
+    def _rebuild_memory_table(self) -> int:
+        """
+        Atomically rebuild LatestBalances_v2_Memory from LatestBalances_v2.
+        Only includes rows where collateral or debt balance > 0.
+        Uses EXCHANGE TABLES for atomic swap to avoid query downtime.
+        """
+        try:
+            logger.info("Rebuilding LatestBalances_v2_Memory table")
+            start = time.time()
 
             # Drop temp table if it exists (from previous failed run)
             self.clickhouse_client.execute_query(
@@ -131,7 +270,19 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
             )
 
             # Create and populate temp table
-            self.clickhouse_client.execute_query(create_temp_query)
+            self.clickhouse_client.execute_query(
+                "CREATE TABLE aave_ethereum.LatestBalances_v2_Memory_temp "
+                "AS aave_ethereum.LatestBalances_v2_Memory"
+            )
+            result = self.clickhouse_client.execute_query(
+                f"""
+                INSERT INTO aave_ethereum.LatestBalances_v2_Memory_temp
+                SELECT {self.MEMORY_TABLE_COLUMNS}
+                FROM aave_ethereum.LatestBalances_v2
+                FINAL
+                WHERE collateral_scaled_balance > 0 OR variable_debt_scaled_balance > 0
+                """
+            )
 
             # Atomic swap
             self.clickhouse_client.execute_query(
@@ -143,10 +294,25 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
                 "DROP TABLE IF EXISTS aave_ethereum.LatestBalances_v2_Memory_temp"
             )
 
-            logger.info("Successfully refreshed LatestBalances_v2_Memory table")
+            full_rows = int(result.summary.get("written_rows", 0))
+            metrics = {
+                "mode": "rebuild",
+                "rows_touched": full_rows,
+                "rows_upserted": full_rows,
+                "full_rows": full_rows,
+                "duration_seconds": time.time() - start,
+            }
+            cache.set(self.MEMORY_TABLE_METRICS_KEY, metrics, timeout=None)
+            logger.info(
+                f"Successfully rebuilt LatestBalances_v2_Memory with "
+                f"{full_rows} rows in {metrics['duration_seconds']:.3f}s"
+            )
+            return full_rows
 
         except Exception as e:
             logger.error(f"Error refreshing memory table: {e}", exc_info=True)
+            # Retry the full rebuild on the next window
+            cache.delete(self.MEMORY_TABLE_REBUILD_KEY)
             # Clean up temp table if it exists
             try:
                 self.clickhouse_client.execute_query(
@@ -154,6 +320,7 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
                 )
             except Exception:
                 pass
+            return 0
 
     def post_handle_hook(
         self, network_events: List[Any], start_block: int, end_block: int
@@ -165,123 +332,139 @@ class ChildBalancesSynchronizeTask(EventSynchronizeMixin, Task):
         After updating, atomically refreshes the in-memory table for fast queries.
         """
         try:
-            # Get all unique user/asset pairs from the synced events in batches
-            all_user_asset_pairs = []
-            batch_size = 500
-            offset = 0
-
-            while True:
-                user_asset_pairs = self._get_unique_user_asset_pairs(
-                    start_block, end_block, limit=batch_size, offset=offset
-                )
-                if not user_asset_pairs:
-                    break
-
-                all_user_asset_pairs.extend(user_asset_pairs)
-                offset += batch_size
-
-                # If we got fewer results than batch_size, we're done
-                if len(user_asset_pairs) < batch_size:
-                    break
-
+            all_user_asset_pairs = self.get_user_asset_pairs(start_block, end_block)
             if not all_user_asset_pairs:
                 logger.info("No user/asset pairs found to update")
                 return
 
-            logger.info(
-                f"Updating scaled balances for {len(all_user_asset_pairs)} user/asset pairs"
-            )
+            self.update_scaled_balances(all_user_asset_pairs)
 
-            # Get token address mappings from ClickHouse
-            asset_token_mapping = self._get_asset_token_mapping(
-                list({asset for _, asset in all_user_asset_pairs})
+        except Exception as e:
+            logger.error(f"Error in post_handle_hook: {e}", exc_info=True)
+
+    def get_user_asset_pairs(self, start_block: int, end_block: int) -> List[tuple]:
+        """All unique user/asset pairs of the balance events in a block range."""
+        # Get all unique user/asset pairs from the synced events in batches
+        all_user_asset_pairs = []
+        batch_size = 500
+        offset = 0
+
+        while True:
+            user_asset_pairs = self._get_unique_user_asset_pairs(
+                start_block, end_block, limit=batch_size, offset=offset
             )
+            if not user_asset_pairs:
+                break
 
-            # Group users by asset for efficient batch processing
-            users_by_asset = defaultdict(list)
-            for user, asset in all_user_asset_pairs:
-                users_by_asset[asset].append(user)
+            all_user_asset_pairs.extend(user_asset_pairs)
+            offset += batch_size
 
-            # Fetch scaled balances and prepare update data
-            updates = []
-            for asset, users in users_by_asset.items():
-                if asset not in asset_token_mapping:
-                    logger.warning(f"No token mapping found for asset {asset}")
-                    continue
+            # If we got fewer results than batch_size, we're done
+            if len(user_asset_pairs) < batch_size:
+                break
+        return all_user_asset_pairs
 
-                atoken_address = asset_token_mapping[asset]["aToken"]
-                variable_debt_token_address = asset_token_mapping[asset][
-                    "variableDebtToken"
-                ]
-
-                # Get collateral scaled balances in batches of 100
-                collateral_balances = {}
-                if atoken_address:
-                    atoken = AaveToken(atoken_address)
-                    for i in range(0, len(users), 100):
-                        batch_users = users[i : i + 100]
-                        batch_balances = atoken.get_scaled_balance(batch_users)
-                        collateral_balances.update(batch_balances)
-
-                # Get variable debt scaled balances in batches of 100
-                debt_balances = {}
-                if variable_debt_token_address:
-                    debt_token = AaveToken(variable_debt_token_address)
-                    for i in range(0, len(users), 100):
-                        batch_users = users[i : i + 100]
-                        batch_balances = debt_token.get_scaled_balance(batch_users)
-                        debt_balances.update(batch_balances)
-
-                # Prepare rows for ClickHouse insert (user, asset, collateral, debt)
-                for user in users:
-                    collateral = collateral_balances.get(user, 0)
-                    debt = debt_balances.get(user, 0)
-                    # Note: updated_at will be set by DEFAULT now64() in ClickHouse
-                    updates.append((user, asset, collateral, debt))
-
-            # Batch insert into LatestBalances_v2
-            if updates:
-                for i in range(3):
-                    try:
-                        # Use direct client access to specify column names
-                        def insert_operation(client):
-                            return client.insert(
-                                f"{self.clickhouse_client.db_name}.LatestBalances_v2",
-                                updates,
-                                column_names=[
-                                    "user",
-                                    "asset",
-                                    "collateral_scaled_balance",
-                                    "variable_debt_scaled_balance",
-                                ],
-                            )
-
-                        self.clickhouse_client._execute_with_retry(insert_operation)
-                        logger.info(
-                            f"Successfully updated {len(updates)} scaled balances in LatestBalances_v2"
-                        )
-                        break
-                    except Exception as e:
-                        logger.error(
-                            f"Error inserting scaled balances (attempt {i + 1}/3): {e}"
+    def update_scaled_balances(self, all_user_asset_pairs: List[tuple]):
+        """
+        Read the on-chain scaled balances of user/asset pairs into LatestBalances_v2,
+        then refresh the in-memory table and the users' health factors.
+        """
+        logger.info(
+            f"Updating scaled balances for {len(all_user_asset_pairs)} user/asset pairs"
+        )
+
+        # Get token address mappings from ClickHouse
+        asset_token_mapping = self._get_asset_token_mapping(
+            list({asset for _, asset in all_user_asset_pairs})
+        )
+
+        # Group users by asset for efficient batch processing
+        users_by_asset = defaultdict(list)
+        for user, asset in all_user_asset_pairs:
+            users_by_asset[asset].append(user)
+
+        # Fetch scaled balances and prepare update data
+        updates = []
+        for asset, users in users_by_asset.items():
+            if asset not in asset_token_mapping:
+                logger.warning(f"No token mapping found for asset {asset}")
+                continue
+
+            atoken_address = asset_token_mapping[asset]["aToken"]
+            variable_debt_token_address = asset_token_mapping[asset][
+                "variableDebtToken"
+            ]
+
+            # Get collateral scaled balances in batches
+            collateral_balances = {}
+            if atoken_address:
+                atoken = AaveToken(atoken_address)
+                for i in range(0, len(users), ETH_CALL_BATCH_SIZE):
+                    batch_users = users[i : i + ETH_CALL_BATCH_SIZE]
+                    batch_balances = atoken.get_scaled_balance(batch_users)
+                    collateral_balances.update(batch_balances)
+
+            # Get variable debt scaled balances in batches
+            debt_balances = {}
+            if variable_debt_token_address:
+                debt_token = AaveToken(variable_debt_token_address)
+                for i in range(0, len(users), ETH_CALL_BATCH_SIZE):
+                    batch_users = users[i : i + ETH_CALL_BATCH_SIZE]
+                    batch_balances = debt_token.get_scaled_balance(batch_users)
+                    debt_balances.update(batch_balances)
+
+            # Prepare rows for ClickHouse insert (user, asset, collateral, debt)
+            for user in users:
+                collateral = collateral_balances.get(user, 0)
+                debt = debt_balances.get(user, 0)
+                # Note: updated_at will be set by DEFAULT now64() in ClickHouse
+                updates.append((user, asset, collateral, debt))
+
+        # Batch insert into LatestBalances_v2
+        if updates:
+            for i in range(3):
+                try:
+                    # Use direct client access to specify column names
+                    def insert_operation(client):
+                        return client.insert(
+                            f"{self.clickhouse_client.db_name}.LatestBalances_v2",
+                            updates,
+                            column_names=[
+                                "user",
+                                "asset",
+                                "collateral_scaled_balance",
+                                "variable_debt_scaled_balance",
+                            ],
                         )
-                        if i < 2:
-                            time.sleep(5)
 
-                # Optimize table after updates
-                for i in range(3):
-                    try:
-                        self.clickhouse_client.optimize_table("Balances_v2")
-                        break
-                    except Exception as e:
-                        logger.error(f"Error optimizing LatestBalances_v2: {e}")
+                    self.clickhouse_client._execute_with_retry(insert_operation)
+                    logger.info(
+                        f"Successfully updated {len(updates)} scaled balances in LatestBalances_v2"
+                    )
+                    break
+                except Exception as e:
+                    logger.error(
+                        f"Error inserting scaled balances (attempt {i + 1}/3): {e}"
+                    )
+                    if i < 2:
                         time.sleep(5)
 
-            # Refresh in-memory table after all updates complete
-            self._refresh_memory_table()
+            # Optimize table after updates
+            for i in range(3):
+                try:
+                    self.clickhouse_client.optimize_table("Balances_v2")
+                    break
+                except Exception as e:
+                    logger.error(f"Error optimizing LatestBalances_v2: {e}")
+                    time.sleep(5)
+
+        # Apply the touched pairs to the in-memory table after all updates complete
+        self._refresh_memory_table(all_user_asset_pairs)
 
-        except Exception as e:
-            logger.error(f"Error in post_handle_hook: {e}", exc_info=True)
+        # Recompute health factors of the users touched in this window only
+        UpdateUserHealthFactorsTask.refresh_users(
+            sorted({user for user, _ in all_user_asset_pairs})
+        )
 
     def _get_unique_user_asset_pairs(
         self, start_block: int, end_block: int, limit: int = 500, offset: int = 0
@@ -343,7 +526,282 @@ class ParentBalancesSynchronizeTask(ParentSynchronizeTaskMixin, Task):
 ParentBalancesSynchronizeTask = app.register_task(ParentBalancesSynchronizeTask())
 
 
-class BalancesBackfillTask(Task):
+class BalancesBackfillMixin:
+    """
+    Fetches on-chain scaled balances for the user/asset pairs of a CSV export and
+    writes them to LatestBalances_v2.
+
+    Pairs are split per asset into checkpoints of BACKFILL_CHECKPOINT_SIZE users.
+    Checkpoints are fetched concurrently through a shared RpcExecutor and inserted
+    as they complete; each inserted checkpoint is appended to <csv>.checkpoint, so
+    running the task again with the same csv_filepath resumes where it stopped.
+    """
+
+    checkpoint_size = BACKFILL_CHECKPOINT_SIZE
+    stream_page_size = BACKFILL_STREAM_PAGE_SIZE
+    stream_cursor_key = None
+
+    def _backfill_from_csv(self, csv_filepath: str):
+        """
+        Read user/asset pairs from CSV and fetch scaled balances
+        from on-chain, then update LatestBalances_v2.
+        """
+        try:
+            # Read CSV file
+            user_asset_pairs = []
+            with open(csv_filepath, "r") as csvfile:
+                reader = csv.DictReader(csvfile)
+                for row in reader:
+                    user_asset_pairs.append((row["user"], row["asset"]))
+
+            logger.info(f"Loaded {len(user_asset_pairs)} user/asset pairs from CSV")
+
+            # Get unique assets to fetch token mappings
+            unique_assets = list({asset for _, asset in user_asset_pairs})
+            asset_token_mapping = self._get_asset_token_mapping(unique_assets)
+
+            # Group users by asset for efficient batch processing
+            users_by_asset = defaultdict(list)
+            for user, asset in user_asset_pairs:
+                users_by_asset[asset].append(user)
+
+            checkpoint_filepath = f"{csv_filepath}.checkpoint"
+            completed = self._load_checkpoints(checkpoint_filepath)
+            checkpoints = []
+            for asset, users in users_by_asset.items():
+                if asset not in asset_token_mapping:
+                    logger.warning(f"No token mapping found for asset {asset}")
+                    continue
+                for i in range(0, len(users), self.checkpoint_size):
+                    if f"{asset}:{i}" not in completed:
+                        checkpoints.append(
+                            (asset, i, users[i : i + self.checkpoint_size])
+                        )
+
+            logger.info(
+                f"Backfilling {len(checkpoints)} checkpoints "
+                f"({len(completed)} already completed in {checkpoint_filepath})"
+            )
+
+            executor = RpcExecutor()
+
+            def fetch_checkpoint(checkpoint):
+                asset, _, users = checkpoint
+                return self._fetch_scaled_balances(
+                    executor, asset_token_mapping[asset], users
+                )
+
+            total_updates = 0
+            start = time.time()
+            with open(checkpoint_filepath, "a") as checkpoint_file:
+                for done, ((asset, i, users), balances) in enumerate(
+                    executor.map_unordered(fetch_checkpoint, checkpoints), start=1
+                ):
+                    collateral_balances, debt_balances = balances
+                    updates = [
+                        (
+                            user,
+                            asset,
+                            collateral_balances.get(user, 0),
+                            debt_balances.get(user, 0),
+                        )
+                        for user in users
+                    ]
+                    self._insert_balances(updates)
+                    checkpoint_file.write(f"{asset}:{i}\n")
+                    checkpoint_file.flush()
+
+                    total_updates += len(updates)
+                    logger.info(
+                        f"Checkpoint {done}/{len(checkpoints)}: {len(updates)} records for "
+                        f"asset {asset} ({total_updates / (time.time() - start):.0f} pairs/s, "
+                        f"batch size {executor.batch_size}, "
+                        f"{executor.rate_limited} rate limited requests)"
+                    )
+            executor.close()
+
+            # Optimize table after all updates
+            logger.info("Optimizing LatestBalances_v2 table")
+            for attempt in range(3):
+                try:
+                    self.clickhouse_client.optimize_table("LatestBalances_v2")
+                    break
+                except Exception as e:
+                    logger.error(f"Error optimizing table: {e}")
+                    if attempt < 2:
+                        time.sleep(5)
+
+            logger.info(f"Backfill completed: {total_updates} total records updated")
+
+        except Exception as e:
+            logger.error(
+                f"Error during backfill from CSV, rerun with csv_filepath={csv_filepath} "
+                f"to resume: {e}",
+                exc_info=True,
+            )
+
+    def _backfill_from_stream(self, query: str):
+        """
+        Stream user/asset pairs out of ClickHouse and backfill them in insert blocks
+        of checkpoint_size pairs, without materialising the pairs in memory or on
+        disk. The query must return (asset, user) ordered by both, filter on
+        (asset, user) > (%(asset)s, %(user)s) and stop at LIMIT %(limit)s; it is
+        paged by that keyset, so no single query holds more than stream_page_size
+        distinct pairs. The last inserted pair is kept in the cache under
+        stream_cursor_key so an interrupted run resumes after it.
+        """
+        cursor = cache.get(self.stream_cursor_key) or ("", "")
+        if cursor[0]:
+            logger.info(f"Resuming streaming backfill after {cursor}")
+
+        executor = RpcExecutor()
+        asset_token_mapping = {}
+
+        def stream_blocks():
+            block = []
+            page_cursor = tuple(cursor)
+            while True:
+                page_rows = 0
+                for rows in self.clickhouse_client.stream_query(
+                    query,
+                    parameters={
+                        "asset": page_cursor[0],
+                        "user": page_cursor[1],
+                        "limit": self.stream_page_size,
+                    },
+                    # The stream stalls while the RPC stage applies backpressure
+                    settings={"http_send_timeout": 3600},
+                ):
+                    for asset, user in rows:
+                        block.append((asset, user))
+                        if len(block) >= self.checkpoint_size:
+                            yield self._map_block_assets(block, asset_token_mapping)
+                            block = []
+                    if rows:
+                        page_rows += len(rows)
+                        page_cursor = tuple(rows[-1])
+                if page_rows < self.stream_page_size:
+                    break
+            if block:
+                yield self._map_block_assets(block, asset_token_mapping)
+
+        def fetch_block(block):
+            users_by_asset = defaultdict(list)
+            for asset, user in block:
+                if asset_token_mapping.get(asset):
+                    users_by_asset[asset].append(user)
+
+            collateral_balances, debt_balances = {}, {}
+            for asset, users in users_by_asset.items():
+                collateral, debt = self._fetch_scaled_balances(
+                    executor, asset_token_mapping[asset], users
+                )
+                collateral_balances[asset] = collateral
+                debt_balances[asset] = debt
+            return collateral_balances, debt_balances
+
+        total_updates = 0
+        start = time.time()
+        for block, (collateral_balances, debt_balances) in executor.map_ordered(
+            fetch_block, stream_blocks()
+        ):
+            updates = [
+                (
+                    user,
+                    asset,
+                    collateral_balances[asset].get(user, 0),
+                    debt_balances[asset].get(user, 0),
+                )
+                for asset, user in block
+                if asset in collateral_balances
+            ]
+            if updates:
+                self._insert_balances(updates)
+            cache.set(self.stream_cursor_key, block[-1], timeout=None)
+
+            if total_updates == 0 and updates:
+                logger.info(
+                    f"First insert block written after {time.time() - start:.1f}s"
+                )
+            total_updates += len(updates)
+            logger.info(
+                f"Inserted {len(updates)} records up to {block[-1]} "
+                f"({total_updates / (time.time() - start):.0f} pairs/s, "
+                f"batch size {executor.batch_size}, "
+                f"{executor.rate_limited} rate limited requests)"
+            )
+        executor.close()
+        cache.delete(self.stream_cursor_key)
+
+        logger.info("Optimizing LatestBalances_v2 table")
+        self.clickhouse_client.optimize_table("LatestBalances_v2")
+        logger.info(
+            f"Streaming backfill completed: {total_updates} total records updated"
+        )
+
+    def _map_block_assets(self, block: List[tuple], asset_token_mapping: Dict):
+        """Resolve token addresses for assets seen for the first time in a block."""
+        missing = list({asset for asset, _ in block} - set(asset_token_mapping))
+        if missing:
+            found = self._get_asset_token_mapping(missing)
+            for asset in missing:
+                if asset not in found:
+                    logger.warning(f"No token mapping found for asset {asset}")
+                asset_token_mapping[asset] = found.get(asset)
+        return block
+
+    @staticmethod
+    def _load_checkpoints(checkpoint_filepath: str) -> set:
+        if not os.path.exists(checkpoint_filepath):
+            return set()
+        with open(checkpoint_filepath, "r") as checkpoint_file:
+            return {line.strip() for line in checkpoint_file if line.strip()}
+
+    @staticmethod
+    def _fetch_scaled_balances(executor: RpcExecutor, tokens: Dict, users: List[str]):
+        """Collateral and debt scaled balances of users for one asset."""
+        collateral_balances = {}
+        if tokens["aToken"]:
+            atoken = executor.bind(AaveToken(tokens["aToken"]))
+            collateral_balances = executor.call_in_batches(
+                users, atoken.get_scaled_balance
+            )
+
+        debt_balances = {}
+        if tokens["variableDebtToken"]:
+            debt_token = executor.bind(AaveToken(tokens["variableDebtToken"]))
+            debt_balances = executor.call_in_batches(
+                users, debt_token.get_scaled_balance
+            )
+        return collateral_balances, debt_balances
+
+    def _insert_balances(self, updates: List[tuple]):
+        for attempt in range(3):
+            try:
+
+                def insert_operation(client):
+                    return client.insert(
+                        f"{self.clickhouse_client.db_name}.LatestBalances_v2",
+                        updates,
+                        column_names=[
+                            "user",
+                            "asset",
+                            "collateral_scaled_balance",
+                            "variable_debt_scaled_balance",
+                        ],
+                    )
+
+                self.clickhouse_client._execute_with_retry(insert_operation)
+                return
+            except Exception as e:
+                logger.error(f"Error inserting records (attempt {attempt + 1}/3): {e}")
+                if attempt < 2:
+                    time.sleep(5)
+                else:
+                    raise
+
+
+class BalancesBackfillTask(BalancesBackfillMixin, Task):
     """
     Standalone task that retrieves all user/asset pairs from ClickHouse,
     stores them in a CSV file, then iteratively fetches scaled balances
@@ -352,22 +810,47 @@ class BalancesBackfillTask(Task):
 
     clickhouse_client = clickhouse_client
 
-    def run(self, csv_output_path: str = "/tmp"):
+    stream_cursor_key = "balances_backfill_stream_cursor"
+
+    def run(
+        self,
+        csv_output_path: str = "/tmp",
+        csv_filepath: str = None,
+        stream: bool = None,
+    ):
         """
-        Main task execution:
+        Main task execution (pass csv_filepath of an earlier run to resume it):
         1. Query all user/asset pairs from ClickHouse
         2. Write them to CSV
         3. Read CSV and fetch scaled balances + indexes
         4. Update LatestBalances_v2
+
+        In streaming mode (BACKFILL_STREAMING, unless resuming a CSV) pairs are
+        streamed straight from ClickHouse into the RPC stage instead.
         """
         logger.info("Starting balances backfill task")
 
-        # Step 1: Export user/asset pairs to CSV
-        csv_filepath = self._export_user_asset_pairs_to_csv(csv_output_path)
-        if not csv_filepath:
-            logger.info("No user/asset pairs found to backfill")
+        if stream is None:
+            stream = BACKFILL_STREAMING and csv_filepath is None
+        if stream:
+            try:
+                self._backfill_from_stream(self._get_user_asset_pairs_stream_query())
+            except Exception as e:
+                logger.error(
+                    f"Error during streaming backfill, rerun to resume: {e}",
+                    exc_info=True,
+                )
+                return
+            logger.info("Balances backfill task completed")
             return
 
+        # Step 1: Export user/asset pairs to CSV, unless resuming an earlier export
+        if csv_filepath is None:
+            csv_filepath = self._export_user_asset_pairs_to_csv(csv_output_path)
+            if not csv_filepath:
+                logger.info("No user/asset pairs found to backfill")
+                return
+
         # Step 2: Read CSV and fetch scaled balances + indexes
         logger.info(f"Reading user/asset pairs from {csv_filepath}")
         self._backfill_from_csv(csv_filepath)
@@ -405,6 +888,28 @@ class BalancesBackfillTask(Task):
             logger.error(f"Error exporting user/asset pairs to CSV: {e}", exc_info=True)
             return None
 
+    def _get_user_asset_pairs_stream_query(self) -> str:
+        """
+        Distinct user/asset pairs across the balance event tables, ordered by
+        (asset, user) and paged with a keyset cursor on them.
+        """
+        return """
+        SELECT DISTINCT asset, user
+        FROM (
+            SELECT asset, `from` AS user FROM aave_ethereum.Burn
+            UNION ALL
+            SELECT asset, onBehalfOf AS user FROM aave_ethereum.Mint
+            UNION ALL
+            SELECT asset, _from AS user FROM aave_ethereum.BalanceTransfer
+            UNION ALL
+            SELECT asset, _to AS user FROM aave_ethereum.BalanceTransfer
+        )
+        WHERE user != '0x0000000000000000000000000000000000000000'
+            AND (asset, user) > (%(asset)s, %(user)s)
+        ORDER BY asset, user
+        LIMIT %(limit)s
+        """
+
     def _export_from_event_tables(self, csv_filepath: str) -> int:
         """
         Export user/asset pairs by querying each event table separately.
@@ -462,119 +967,6 @@ class BalancesBackfillTask(Task):
 
         return len(seen_pairs)
 
-    def _backfill_from_csv(self, csv_filepath: str):
-        """
-        Read user/asset pairs from CSV and fetch scaled balances
-        from on-chain, then update LatestBalances_v2.
-        """
-        try:
-            # Read CSV file
-            user_asset_pairs = []
-            with open(csv_filepath, "r") as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    user_asset_pairs.append((row["user"], row["asset"]))
-
-            logger.info(f"Loaded {len(user_asset_pairs)} user/asset pairs from CSV")
-
-            # Get unique assets to fetch token mappings
-            unique_assets = list({asset for _, asset in user_asset_pairs})
-            asset_token_mapping = self._get_asset_token_mapping(unique_assets)
-
-            # Group users by asset for efficient batch processing
-            users_by_asset = defaultdict(list)
-            for user, asset in user_asset_pairs:
-                users_by_asset[asset].append(user)
-
-            # Process each asset's users
-            total_updates = 0
-            for asset, users in users_by_asset.items():
-                logger.info(f"Processing {len(users)} users for asset {asset}")
-
-                if asset not in asset_token_mapping:
-                    logger.warning(f"No token mapping found for asset {asset}")
-                    continue
-
-                atoken_address = asset_token_mapping[asset]["aToken"]
-                variable_debt_token_address = asset_token_mapping[asset][
-                    "variableDebtToken"
-                ]
-
-                # Fetch scaled balances in batches
-                updates = []
-                batch_size = 100
-
-                for i in range(0, len(users), batch_size):
-                    batch_users = users[i : i + batch_size]
-
-                    # Get collateral data
-                    collateral_balances = {}
-                    if atoken_address:
-                        atoken = AaveToken(atoken_address)
-                        collateral_balances = atoken.get_scaled_balance(batch_users)
-
-                    # Get debt data
-                    debt_balances = {}
-                    if variable_debt_token_address:
-                        debt_token = AaveToken(variable_debt_token_address)
-                        debt_balances = debt_token.get_scaled_balance(batch_users)
-
-                    # Prepare update rows
-                    for user in batch_users:
-                        collateral = collateral_balances.get(user, 0)
-                        debt = debt_balances.get(user, 0)
-                        updates.append((user, asset, collateral, debt))
-
-                    logger.info(
-                        f"Fetched balances for batch {i // batch_size + 1} ({len(batch_users)} users)"
-                    )
-
-                # Insert into ClickHouse
-                if updates:
-                    for attempt in range(3):
-                        try:
-
-                            def insert_operation(client):
-                                return client.insert(
-                                    f"{self.clickhouse_client.db_name}.LatestBalances_v2",
-                                    updates,
-                                    column_names=[
-                                        "user",
-                                        "asset",
-                                        "collateral_scaled_balance",
-                                        "variable_debt_scaled_balance",
-                                    ],
-                                )
-
-                            self.clickhouse_client._execute_with_retry(insert_operation)
-                            total_updates += len(updates)
-                            logger.info(
-                                f"Successfully inserted {len(updates)} records for asset {asset}"
-                            )
-                            break
-                        except Exception as e:
-                            logger.error(
-                                f"Error inserting records (attempt {attempt + 1}/3): {e}"
-                            )
-                            if attempt < 2:
-                                time.sleep(5)
-
-            # Optimize table after all updates
-            logger.info("Optimizing LatestBalances_v2 table")
-            for attempt in range(3):
-                try:
-                    self.clickhouse_client.optimize_table("LatestBalances_v2")
-                    break
-                except Exception as e:
-                    logger.error(f"Error optimizing table: {e}")
-                    if attempt < 2:
-                        time.sleep(5)
-
-            logger.info(f"Backfill completed: {total_updates} total records updated")
-
-        except Exception as e:
-            logger.error(f"Error during backfill from CSV: {e}", exc_info=True)
-
     def _get_asset_token_mapping(self, assets: List[str]):
         """
         Get aToken and variableDebtToken addresses for given assets from ClickHouse.
@@ -614,6 +1006,14 @@ class RefreshLiquidationCandidatesTask(Task):
         Uses EXCHANGE TABLES pattern for zero-downtime updates.
         """
         try:
+            # view_liquidation_candidates reads its at-risk users from the store
+            if not UpdateUserHealthFactorsTask.is_populated():
+                logger.error(
+                    "UserHealthFactor is empty, rebuilding it before refreshing "
+                    "LiquidationCandidates_Memory"
+                )
+                UpdateUserHealthFactorsTask.rebuild()
+
             logger.info("Refreshing LiquidationCandidates_Memory table")
 
             # Create temp table with fresh liquidation candidates
@@ -685,7 +1085,260 @@ class RefreshLiquidationCandidatesTask(Task):
 RefreshLiquidationCandidatesTask = app.register_task(RefreshLiquidationCandidatesTask())
 
 
-class ImportantBalancesBackfillTask(Task):
+class UpdateUserHealthFactorsTask(Task):
+    """
+    Task to maintain the UserHealthFactor store incrementally.
+
+    Recomputes health factors from view_user_health_factor only for the given
+    users, or for every user holding one of the given assets. Called without
+    arguments it rebuilds the whole store and atomically swaps it in, which should
+    be scheduled periodically to pick up interest accrual and configuration drift.
+
+    Refreshes made while a rebuild runs are recorded and re-applied after the
+    swap, since the rebuild snapshot may predate them.
+    """
+
+    clickhouse_client = clickhouse_client
+
+    USERS_CHUNK_SIZE = 5_000
+    REBUILD_LOCK_KEY = "user_health_factor_rebuild_lock"
+    REBUILD_LOCK_TIMEOUT = 60 * 30  # 30 minutes
+    PENDING_COUNT_KEY = "user_health_factor_rebuild_pending"
+    PENDING_ITEM_KEY = "user_health_factor_rebuild_pending_{index}"
+    # Set once the store is seen holding rows, it never empties afterwards
+    is_store_populated = False
+    COLUMNS = """
+        user,
+        is_in_emode,
+        total_accrued_collateral_balance,
+        total_accrued_debt_balance,
+        total_effective_collateral,
+        total_effective_debt,
+        effective_collateral_usd,
+        effective_debt_usd,
+        health_factor,
+        now64(6) AS updated_at
+    """
+
+    def run(
+        self,
+        users: List[str] = None,
+        assets: List[str] = None,
+        requested_at: float = None,
+    ):
+        if users is None and assets is None:
+            return self.rebuild()
+
+        refreshed = 0
+        if users:
+            refreshed += self.refresh_users(sorted(set(users)))
+        if assets:
+            # Prices are read through the asset configuration dictionary
+            self.reload_dictionaries(
+                ["dict_latest_asset_configuration"], since=requested_at
+            )
+            refreshed += self.refresh_asset_holders(sorted(set(assets)))
+        return refreshed
+
+    def reload_dictionaries(self, dictionaries: List[str], since: float = None):
+        """
+        Reload the given dictionaries so refreshes read the latest committed rows.
+        With since, dictionaries already loaded after that time are left as they are.
+        """
+        if since is not None:
+            result = self.clickhouse_client.execute_query(
+                """
+                SELECT name
+                FROM system.dictionaries
+                WHERE database = 'aave_ethereum'
+                  AND name IN %(dictionaries)s
+                  AND toUnixTimestamp(last_successful_update_time) > %(since)s
+                """,
+                parameters={"dictionaries": tuple(dictionaries), "since": since},
+            )
+            loaded = {row[0] for row in result.result_rows}
+            dictionaries = [name for name in dictionaries if name not in loaded]
+
+        for name in dictionaries:
+            self.clickhouse_client.execute_query(
+                f"SYSTEM RELOAD DICTIONARY aave_ethereum.{name}"
+            )
+
+    def refresh_users(self, users: List[str]) -> int:
+        """Recompute the given users and drop those left without any position."""
+        if not users:
+            return 0
+        start = time.time()
+        self.record_pending_refresh(users=users)
+        for i in range(0, len(users), self.USERS_CHUNK_SIZE):
+            chunk = tuple(users[i : i + self.USERS_CHUNK_SIZE])
+            self.clickhouse_client.execute_query(
+                f"""
+                INSERT INTO aave_ethereum.UserHealthFactor
+                SELECT {self.COLUMNS}
+                FROM aave_ethereum.view_user_health_factor
+                WHERE user IN %(users)s
+                """,
+                parameters={"users": chunk},
+            )
+            self.clickhouse_client.execute_query(
+                """
+                DELETE FROM aave_ethereum.UserHealthFactor
+                WHERE user IN %(users)s
+                  AND user NOT IN (
+                      SELECT user FROM aave_ethereum.view_user_asset_effective_balances
+                      WHERE user IN %(users)s
+                  )
+                """,
+                parameters={"users": chunk},
+            )
+
+        logger.info(
+            f"Refreshed health factors for {len(users)} users in {time.time() - start:.3f}s"
+        )
+        return len(users)
+
+    def refresh_asset_holders(self, assets: List[str]) -> int:
+        """
+        Recompute every user holding one of the given assets in a single
+        server-side INSERT ... SELECT, without pulling the holders into Python.
+        Holders keep their positions, so no user has to be dropped.
+        """
+        if not assets:
+            return 0
+        start = time.time()
+        self.record_pending_refresh(assets=assets)
+        result = self.clickhouse_client.execute_query(
+            f"""
+            INSERT INTO aave_ethereum.UserHealthFactor
+            SELECT {self.COLUMNS}
+            FROM aave_ethereum.view_user_health_factor
+            WHERE user IN (
+                SELECT user
+                FROM aave_ethereum.LatestBalances_v2_Memory
+                WHERE asset IN %(assets)s
+            )
+            """,
+            parameters={"assets": tuple(assets)},
+        )
+        user_count = int(result.summary.get("written_rows", 0))
+        logger.info(
+            f"Refreshed health factors for {user_count} holders of {len(assets)} "
+            f"assets in {time.time() - start:.3f}s"
+        )
+        return user_count
+
+    def record_pending_refresh(self, users: List[str] = None, assets: List[str] = None):
+        """
+        Record a refresh made while a rebuild runs, before it is written, so the
+        rebuild re-applies it after swapping in its snapshot.
+        """
+        if cache.get(self.REBUILD_LOCK_KEY) is None:
+            return
+        cache.add(self.PENDING_COUNT_KEY, 0, timeout=self.REBUILD_LOCK_TIMEOUT)
+        try:
+            index = cache.incr(self.PENDING_COUNT_KEY)
+        except ValueError:
+            # The rebuild finished between the lock check and the increment
+            return
+        cache.set(
+            self.PENDING_ITEM_KEY.format(index=index),
+            {"users": list(users or []), "assets": list(assets or [])},
+            self.REBUILD_LOCK_TIMEOUT,
+        )
+
+    def pop_pending_refreshes(self) -> Tuple[List[str], List[str]]:
+        """Claim the users and assets refreshed while the rebuild ran."""
+        count = cache.get(self.PENDING_COUNT_KEY) or 0
+        keys = [
+            self.PENDING_ITEM_KEY.format(index=index) for index in range(1, count + 1)
+        ]
+        pending = cache.get_many(keys)
+        cache.delete_many(keys + [self.PENDING_COUNT_KEY])
+        users, assets = set(), set()
+        for item in pending.values():
+            users.update(item["users"])
+            assets.update(item["assets"])
+        return sorted(users), sorted(assets)
+
+    def is_populated(self) -> bool:
+        if not self.is_store_populated:
+            result = self.clickhouse_client.execute_query(
+                "SELECT count() FROM (SELECT 1 FROM aave_ethereum.UserHealthFactor LIMIT 1)"
+            )
+            self.is_store_populated = bool(
+                result.result_rows and result.result_rows[0][0]
+            )
+        return self.is_store_populated
+
+    def get_health_factor_table(self) -> str:
+        """
+        Table current health factors are read from: the store, or the view while the
+        store is empty, e.g. before its first rebuild on a new deployment.
+        """
+        if self.is_populated():
+            return "UserHealthFactor"
+        logger.error(
+            "UserHealthFactor is empty, reading current health factors from "
+            "view_user_health_factor until UpdateUserHealthFactorsTask rebuilds it"
+        )
+        return "view_user_health_factor"
+
+    def rebuild(self) -> int:
+        """Rebuild the store from scratch using EXCHANGE TABLES for an atomic swap."""
+        if not cache.add(self.REBUILD_LOCK_KEY, "locked", self.REBUILD_LOCK_TIMEOUT):
+            logger.warning("UserHealthFactor rebuild already running, skipping")
+            return 0
+
+        start = time.time()
+        # Drop refreshes left behind by a rebuild that did not finish
+        self.pop_pending_refreshes()
+        try:
+            self.clickhouse_client.execute_query(
+                "DROP TABLE IF EXISTS aave_ethereum.UserHealthFactor_temp"
+            )
+            self.clickhouse_client.execute_query(
+                "CREATE TABLE aave_ethereum.UserHealthFactor_temp "
+                "AS aave_ethereum.UserHealthFactor"
+            )
+            self.clickhouse_client.execute_query(
+                f"""
+                INSERT INTO aave_ethereum.UserHealthFactor_temp
+                SELECT {self.COLUMNS}
+                FROM aave_ethereum.view_user_health_factor
+                """
+            )
+            self.clickhouse_client.execute_query(
+                "EXCHANGE TABLES aave_ethereum.UserHealthFactor AND aave_ethereum.UserHealthFactor_temp"
+            )
+        finally:
+            # Refreshes recorded from here on write to the swapped-in table
+            pending_users, pending_assets = self.pop_pending_refreshes()
+            cache.delete(self.REBUILD_LOCK_KEY)
+            self.clickhouse_client.execute_query(
+                "DROP TABLE IF EXISTS aave_ethereum.UserHealthFactor_temp"
+            )
+
+        self.refresh_users(pending_users)
+        self.refresh_asset_holders(pending_assets)
+
+        result = self.clickhouse_client.execute_query(
+            "SELECT count() FROM aave_ethereum.UserHealthFactor"
+        )
+        user_count = result.result_rows[0][0] if result.result_rows else 0
+        self.is_store_populated = user_count > 0
+        logger.info(
+            f"Rebuilt UserHealthFactor with {user_count} users in {time.time() - start:.3f}s, "
+            f"re-applied {len(pending_users)} users and {len(pending_assets)} assets "
+            f"refreshed during the rebuild"
+        )
+        return user_count
+
+
+UpdateUserHealthFactorsTask = app.register_task(UpdateUserHealthFactorsTask())
+
+
+class ImportantBalancesBackfillTask(BalancesBackfillMixin, Task):
     """
     Specialized backfill task that targets users with high liquidation risk.
     Instead of querying mint/burn tables, this task:
@@ -699,9 +1352,9 @@ class ImportantBalancesBackfillTask(Task):
 
     clickhouse_client = clickhouse_client
 
-    def run(self, csv_output_path: str = "/tmp"):
+    def run(self, csv_output_path: str = "/tmp", csv_filepath: str = None):
         """
-        Main task execution:
+        Main task execution (pass csv_filepath of an earlier run to resume it):
         1. Query high-risk users from view_user_health_factor
         2. Get their user/asset pairs from view_user_asset_effective_balances
         3. Write pairs to CSV
@@ -710,11 +1363,14 @@ class ImportantBalancesBackfillTask(Task):
         """
         logger.info("Starting important balances backfill task")
 
-        # Step 1: Export user/asset pairs for high-risk users to CSV
-        csv_filepath = self._export_important_user_asset_pairs_to_csv(csv_output_path)
-        if not csv_filepath:
-            logger.info("No high-risk user/asset pairs found to backfill")
-            return
+        # Step 1: Export user/asset pairs to CSV, unless resuming an earlier export
+        if csv_filepath is None:
+            csv_filepath = self._export_important_user_asset_pairs_to_csv(
+                csv_output_path
+            )
+            if not csv_filepath:
+                logger.info("No high-risk user/asset pairs found to backfill")
+                return
 
         # Step 2: Read CSV and fetch scaled balances
         logger.info(f"Reading user/asset pairs from {csv_filepath}")
@@ -739,9 +1395,10 @@ class ImportantBalancesBackfillTask(Task):
             )
 
             # Step 1: Get high-risk users
-            high_risk_users_query = """
+            health_factor_table = UpdateUserHealthFactorsTask.get_health_factor_table()
+            high_risk_users_query = f"""
             SELECT DISTINCT user
-            FROM aave_ethereum.view_user_health_factor
+            FROM aave_ethereum.{health_factor_table}
             WHERE health_factor >= 1.0
               AND health_factor <= 1.25
               AND effective_debt_usd > 10000
@@ -815,120 +1472,6 @@ class ImportantBalancesBackfillTask(Task):
             )
             return None
 
-    def _backfill_from_csv(self, csv_filepath: str):
-        """
-        Read user/asset pairs from CSV and fetch scaled balances
-        from on-chain, then update LatestBalances_v2.
-        Reuses the same logic as BalancesBackfillTask.
-        """
-        try:
-            # Read CSV file
-            user_asset_pairs = []
-            with open(csv_filepath, "r") as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    user_asset_pairs.append((row["user"], row["asset"]))
-
-            logger.info(f"Loaded {len(user_asset_pairs)} user/asset pairs from CSV")
-
-            # Get unique assets to fetch token mappings
-            unique_assets = list({asset for _, asset in user_asset_pairs})
-            asset_token_mapping = self._get_asset_token_mapping(unique_assets)
-
-            # Group users by asset for efficient batch processing
-            users_by_asset = defaultdict(list)
-            for user, asset in user_asset_pairs:
-                users_by_asset[asset].append(user)
-
-            # Process each asset's users
-            total_updates = 0
-            for asset, users in users_by_asset.items():
-                logger.info(f"Processing {len(users)} users for asset {asset}")
-
-                if asset not in asset_token_mapping:
-                    logger.warning(f"No token mapping found for asset {asset}")
-                    continue
-
-                atoken_address = asset_token_mapping[asset]["aToken"]
-                variable_debt_token_address = asset_token_mapping[asset][
-                    "variableDebtToken"
-                ]
-
-                # Fetch scaled balances in batches
-                updates = []
-                batch_size = 100
-
-                for i in range(0, len(users), batch_size):
-                    batch_users = users[i : i + batch_size]
-
-                    # Get collateral data
-                    collateral_balances = {}
-                    if atoken_address:
-                        atoken = AaveToken(atoken_address)
-                        collateral_balances = atoken.get_scaled_balance(batch_users)
-
-                    # Get debt data
-                    debt_balances = {}
-                    if variable_debt_token_address:
-                        debt_token = AaveToken(variable_debt_token_address)
-                        debt_balances = debt_token.get_scaled_balance(batch_users)
-
-                    # Prepare update rows
-                    for user in batch_users:
-                        collateral = collateral_balances.get(user, 0)
-                        debt = debt_balances.get(user, 0)
-                        updates.append((user, asset, collateral, debt))
-
-                    logger.info(
-                        f"Fetched balances for batch {i // batch_size + 1} ({len(batch_users)} users)"
-                    )
-
-                # Insert into ClickHouse
-                if updates:
-                    for attempt in range(3):
-                        try:
-
-                            def insert_operation(client):
-                                return client.insert(
-                                    f"{self.clickhouse_client.db_name}.LatestBalances_v2",
-                                    updates,
-                                    column_names=[
-                                        "user",
-                                        "asset",
-                                        "collateral_scaled_balance",
-                                        "variable_debt_scaled_balance",
-                                    ],
-                                )
-
-                            self.clickhouse_client._execute_with_retry(insert_operation)
-                            total_updates += len(updates)
-                            logger.info(
-                                f"Successfully inserted {len(updates)} records for asset {asset}"
-                            )
-                            break
-                        except Exception as e:
-                            logger.error(
-                                f"Error inserting records (attempt {attempt + 1}/3): {e}"
-                            )
-                            if attempt < 2:
-                                time.sleep(5)
-
-            # Optimize table after all updates
-            logger.info("Optimizing LatestBalances_v2 table")
-            for attempt in range(3):
-                try:
-                    self.clickhouse_client.optimize_table("LatestBalances_v2")
-                    break
-                except Exception as e:
-                    logger.error(f"Error optimizing table: {e}")
-                    if attempt < 2:
-                        time.sleep(5)
-
-            logger.info(f"Backfill completed: {total_updates} total records updated")
-
-        except Exception as e:
-            logger.error(f"Error during backfill from CSV: {e}", exc_info=True)
-
     def _get_asset_token_mapping(self, assets: List[str]):
         """
         Get aToken and variableDebtToken addresses for given assets from ClickHouse.
@@ -15,6 +15,7 @@ from typing import Any, Dict, List
 from celery import Task
 
 from utils.clickhouse.client import clickhouse_client
+from utils.constants import ETH_CALL_BATCH_SIZE
 
 logger = logging.getLogger(__name__)
 
@@ -264,9 +265,9 @@ class CompareCollateralBalanceTask(Task):
                             )
                             continue
 
-                        # Fetch scaled balances in batches of 100 users
+                        # Fetch scaled balances in batches of users
                         atoken = AaveToken(atoken_address)
-                        rpc_batch_size = 100
+                        rpc_batch_size = ETH_CALL_BATCH_SIZE
 
                         for i in range(0, len(users), rpc_batch_size):
                             users_batch = users[i : i + rpc_batch_size]
@@ -433,7 +434,7 @@ class CompareCollateralBalanceTask(Task):
             %(corrected_scaled_balance)s as collateral_scaled_balance,
             variable_debt_scaled_balance,
             now64() as updated_at
-        FROM aave_ethereum.LatestBalances_v2
+        FROM aave_ethereum.LatestBalances_v2 FINAL
         WHERE user = %(user)s AND asset = %(asset)s
         LIMIT 1
         """
@@ -838,7 +839,7 @@ class CompareDebtBalanceTask(Task):
             collateral_scaled_balance,
             %(corrected_scaled_balance)s as variable_debt_scaled_balance,
             now64() as updated_at
-        FROM aave_ethereum.LatestBalances_v2
+        FROM aave_ethereum.LatestBalances_v2 FINAL
         WHERE user = %(user)s AND asset = %(asset)s
         LIMIT 1
         """
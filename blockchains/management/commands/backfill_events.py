@@ -0,0 +1,127 @@
+"""
+Management command to run range-sharded historical backfills.
+
+Each event group (events sharing a last_synced_block) has its unsynced range split
+into disjoint shards that are dispatched to celery workers as child synchronize
+tasks. last_synced_block only advances over the contiguous prefix of completed
+shard ranges, and parent syncs skip the group until the backfill completes.
+
+USAGE EXAMPLES:
+
+    # Backfill protocol events to the current head in 16 shards
+    python manage.py backfill_events --group events --shards 16
+
+    # Backfill balance events up to a fixed block
+    python manage.py backfill_events --group balances --shards 8 --to-block 21000000
+
+    # Resume unfinished backfills (re-dispatches only unfinished shards)
+    python manage.py backfill_events --group balances
+
+    # Show completed ranges and the synced prefix of active backfills
+    python manage.py backfill_events --group events --status
+
+    # Abandon active backfills, parent syncs resume from last_synced_block
+    python manage.py backfill_events --group events --cancel
+"""
+
+from django.core.management.base import BaseCommand
+
+from balances.tasks import ParentBalancesSynchronizeTask
+from blockchains.tasks import ParentSynchronizeTask
+from oracles.tasks import PriceEventDynamicSynchronizeTask
+from utils import backfill
+
+
+class Command(BaseCommand):
+    help = "Backfill event history in parallel block range shards across workers"
+
+    PARENT_TASKS = {
+        "events": ParentSynchronizeTask,
+        "balances": ParentBalancesSynchronizeTask,
+        "prices": PriceEventDynamicSynchronizeTask,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group",
+            choices=list(self.PARENT_TASKS),
+            required=True,
+            help="Event models to backfill",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=backfill.BACKFILL_SHARDS,
+            help=f"Shards per event group (default: {backfill.BACKFILL_SHARDS})",
+        )
+        parser.add_argument(
+            "--to-block",
+            type=int,
+            help="Last block to backfill (default: current head)",
+        )
+        parser.add_argument(
+            "--event-ids",
+            type=int,
+            nargs="+",
+            help="Only backfill these events (default: every enabled event)",
+        )
+        parser.add_argument(
+            "--status",
+            action="store_true",
+            help="Show active backfills instead of dispatching",
+        )
+        parser.add_argument(
+            "--cancel",
+            action="store_true",
+            help="Remove active backfills instead of dispatching",
+        )
+
+    def handle(self, *args, **options):
+        parent_task = self.PARENT_TASKS[options["group"]]
+
+        if options["status"] or options["cancel"]:
+            for backfill_key in self._get_active_backfills(parent_task, options):
+                plan = backfill.get_backfill(backfill_key)
+                if plan is None:
+                    continue
+                if options["cancel"]:
+                    backfill.clear_backfill(backfill_key, plan)
+                    self.stdout.write(f"Cancelled backfill {backfill_key}")
+                else:
+                    self._write_status(backfill_key, plan)
+            return
+
+        backfill_keys = parent_task.run_backfill(
+            shards=options["shards"],
+            to_block=options["to_block"],
+            event_ids=options["event_ids"],
+        )
+        for backfill_key in backfill_keys:
+            plan = backfill.get_backfill(backfill_key)
+            if plan is not None:
+                self._write_status(backfill_key, plan)
+        self.stdout.write(
+            self.style.SUCCESS(f"Dispatched {len(backfill_keys)} backfills")
+        )
+
+    def _get_active_backfills(self, parent_task, options):
+        events = parent_task.event_model.objects.all()
+        if options["event_ids"]:
+            events = events.filter(id__in=options["event_ids"])
+        active = backfill.get_backfilling_event_ids(
+            parent_task.event_model, list(events.values_list("id", flat=True))
+        )
+        return sorted(set(active.values()))
+
+    def _write_status(self, backfill_key: str, plan):
+        completed = backfill.get_completed_ranges(backfill_key, plan)
+        prefix_end = completed.contiguous_end(plan["from_block"])
+        total = plan["to_block"] - plan["from_block"] + 1
+        done = sum(end - start + 1 for start, end in completed)
+        self.stdout.write(
+            f"{backfill_key}: {len(plan['event_ids'])} events, blocks "
+            f"{plan['from_block']}-{plan['to_block']} in {len(plan['shards'])} shards, "
+            f"{done / total:.1%} done, synced prefix to {prefix_end}"
+        )
+        ranges = ", ".join(f"{start}-{end}" for start, end in completed)
+        self.stdout.write(f"  completed: {ranges or '-'}")
@@ -0,0 +1,259 @@
+"""
+Management command to benchmark balance and health factor maintenance.
+
+USAGE EXAMPLES:
+
+    # Health factor freshness: full view scan vs incremental store refresh of
+    # 1000 touched users
+    python manage.py benchmark_balances --suite health_factor --users 1000
+
+    # LatestBalances_v2_Memory: full EXCHANGE TABLES rebuild vs applying 1000 touched
+    # pairs
+    python manage.py benchmark_balances --suite memory_table --users 1000
+
+    # scaledBalanceOf for 5000 users, plain eth_call batches of 100 vs Multicall3
+    # aggregate3, against a local stub RPC (or an anvil fork via --rpc-url)
+    python manage.py benchmark_balances --suite multicall --users 5000 --rpc-latency 0.05
+    python manage.py benchmark_balances --suite multicall --users 5000 \\
+        --rpc-url http://127.0.0.1:8545 --token 0x4d5f47fa6a74757f35c14fd3a6ef8e3c9bc514e8
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+from eth_abi import decode, encode
+from eth_utils import keccak
+from web3 import Web3
+
+from balances.tasks import ChildBalancesSynchronizeTask, UpdateUserHealthFactorsTask
+from blockchains.management.commands.benchmark_base import BenchmarkCommand
+from utils.clickhouse.client import clickhouse_client
+from utils.interfaces.base import AGGREGATE3_SELECTOR
+from utils.interfaces.tokens import AaveToken
+
+
+class Command(BenchmarkCommand, BaseCommand):
+    help = "Benchmark balance, health factor and token balance maintenance"
+
+    SUITES = ["health_factor", "memory_table", "multicall"]
+
+    def add_suite_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=1_000,
+            help="Number of touched users for incremental suites (default: 1000)",
+        )
+        parser.add_argument(
+            "--rpc-url",
+            type=str,
+            help="RPC to benchmark against, e.g. an anvil fork (default: local stub)",
+        )
+        parser.add_argument(
+            "--rpc-latency",
+            type=float,
+            default=0.1,
+            help="Simulated RPC round-trip latency in seconds (default: 0.1)",
+        )
+        parser.add_argument(
+            "--token",
+            type=str,
+            default="0x4d5f47fa6a74757f35c14fd3a6ef8e3c9bc514e8",
+            help="aToken or debt token queried by the multicall suite (default: aEthWETH)",
+        )
+
+    def _run_health_factor(self, options):
+        """Full view recomputation vs incremental UserHealthFactor refresh."""
+        at_risk_filter = (
+            "health_factor > 1.0 AND health_factor <= 1.25 "
+            "AND effective_collateral_usd > 10000 AND effective_debt_usd > 10000"
+        )
+
+        start = time.perf_counter()
+        result = clickhouse_client.execute_query(
+            f"SELECT count(), countIf({at_risk_filter}) "
+            "FROM aave_ethereum.view_user_health_factor"
+        )
+        total_users, at_risk = result.result_rows[0]
+        self._report(
+            f"view scan ({at_risk} at risk)",
+            total_users,
+            time.perf_counter() - start,
+            "users",
+        )
+
+        users = [
+            row[0]
+            for row in clickhouse_client.execute_query(
+                "SELECT DISTINCT user FROM aave_ethereum.LatestBalances_v2_Memory "
+                "ORDER BY rand() LIMIT %(limit)s",
+                parameters={"limit": options["users"]},
+            ).result_rows
+        ]
+        start = time.perf_counter()
+        UpdateUserHealthFactorsTask.refresh_users(users)
+        self._report(
+            "incremental refresh", len(users), time.perf_counter() - start, "users"
+        )
+
+        start = time.perf_counter()
+        result = clickhouse_client.execute_query(
+            f"SELECT count(), countIf({at_risk_filter}) "
+            "FROM aave_ethereum.UserHealthFactor"
+        )
+        stored_users, stored_at_risk = result.result_rows[0]
+        self._report(
+            f"store scan ({stored_at_risk} at risk)",
+            stored_users,
+            time.perf_counter() - start,
+            "users",
+        )
+
+    def _run_memory_table(self, options):
+        """Full LatestBalances_v2_Memory rebuild vs applying only touched pairs."""
+        task = ChildBalancesSynchronizeTask
+
+        start = time.perf_counter()
+        full_rows = task._rebuild_memory_table()
+        self._report("full rebuild", full_rows, time.perf_counter() - start, "rows")
+
+        pairs = [
+            (row[0], row[1])
+            for row in clickhouse_client.execute_query(
+                "SELECT user, asset FROM aave_ethereum.LatestBalances_v2 FINAL "
+                "ORDER BY rand() LIMIT %(limit)s",
+                parameters={"limit": options["users"]},
+            ).result_rows
+        ]
+        start = time.perf_counter()
+        task._apply_memory_table_changes(pairs)
+        self._report(
+            "incremental apply", len(pairs), time.perf_counter() - start, "rows"
+        )
+
+    def _run_multicall(self, options):
+        """scaledBalanceOf through plain eth_call batches vs Multicall3 aggregate3."""
+        users = [
+            Web3.to_checksum_address(keccak(i.to_bytes(32, "big"))[-20:])
+            for i in range(options["users"])
+        ]
+        server = None
+        rpc_url = options["rpc_url"]
+        if not rpc_url:
+            server = StubRpcServer(options["rpc_latency"])
+            rpc_url = server.url
+        self.stdout.write(f"RPC: {rpc_url}")
+
+        try:
+            plain = AaveToken(options["token"])
+            plain.rpc_url = rpc_url
+            plain.use_multicall = False
+            start = time.perf_counter()
+            for i in range(0, len(users), 100):
+                plain.get_scaled_balance(users[i : i + 100])
+            plain_rate = self._report(
+                "eth_call batches", len(users), time.perf_counter() - start, "calls"
+            )
+            if server:
+                self._report_requests(server)
+                server.reset()
+
+            multicall = AaveToken(options["token"])
+            multicall.rpc_url = rpc_url
+            multicall.use_multicall = True
+            start = time.perf_counter()
+            multicall.get_scaled_balance(users)
+            multicall_rate = self._report(
+                "multicall aggregate3", len(users), time.perf_counter() - start, "calls"
+            )
+            if server:
+                self._report_requests(server)
+        finally:
+            if server:
+                server.shutdown()
+
+        self._report_speedup(multicall_rate, plain_rate)
+
+    def _report_requests(self, server):
+        self.stdout.write(
+            f"{'':<40} {server.requests:>10} requests, "
+            f"{server.eth_calls} metered eth_calls"
+        )
+
+
+class StubRpcServer:
+    """
+    Local JSON-RPC server answering scaledBalanceOf and Multicall3 aggregate3 eth_calls
+    with deterministic balances. About one user in 50 reverts to exercise the
+    per-call fallback.
+    """
+
+    SCALED_BALANCE_SELECTOR = keccak(text="scaledBalanceOf(address)")[:4]
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.reset()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                time.sleep(stub.latency)
+                stub.requests += 1
+                requests = body if isinstance(body, list) else [body]
+                responses = [stub.handle(request) for request in requests]
+                payload = json.dumps(
+                    responses if isinstance(body, list) else responses[0]
+                ).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        self.requests = 0
+        self.eth_calls = 0
+
+    def shutdown(self):
+        self.server.shutdown()
+
+    def handle(self, request: dict) -> dict:
+        self.eth_calls += 1
+        call = request["params"][0]
+        data = bytes.fromhex(call["data"][2:])
+        if data[:4] == AGGREGATE3_SELECTOR:
+            (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+            results = [self.call(target, calldata) for target, _, calldata in calls]
+            result = encode(
+                ["(bool,bytes)[]"],
+                [[(value is not None, value or b"") for value in results]],
+            )
+        else:
+            result = self.call(call["to"], data)
+            if result is None:
+                return {
+                    "jsonrpc": "2.0",
+                    "id": request["id"],
+                    "error": {"code": 3, "message": "execution reverted"},
+                }
+        return {"jsonrpc": "2.0", "id": request["id"], "result": "0x" + result.hex()}
+
+    def call(self, target: str, calldata: bytes):
+        if calldata[:4] != self.SCALED_BALANCE_SELECTOR:
+            return None
+        user = calldata[16:36]
+        if int.from_bytes(user, "big") % 50 == 0:
+            return None
+        balance = int.from_bytes(keccak(bytes.fromhex(target[2:]) + user)[:8], "big")
+        return balance.to_bytes(32, "big")
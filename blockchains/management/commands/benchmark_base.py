@@ -0,0 +1,42 @@
+class BenchmarkCommand:
+    """
+    Shared --suite dispatch and throughput reporting of the benchmark_* commands.
+
+    Each suite runs the legacy and the optimised code path against the same inputs
+    and reports the throughput of both.
+    """
+
+    SUITES = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--suite",
+            choices=self.SUITES,
+            required=len(self.SUITES) > 1,
+            default=self.SUITES[0] if len(self.SUITES) == 1 else None,
+            help="Benchmark suite to run",
+        )
+        self.add_suite_arguments(parser)
+
+    def add_suite_arguments(self, parser):
+        pass
+
+    def handle(self, *args, **options):
+        suite = getattr(self, f"_run_{options['suite']}")
+
+        self.stdout.write(self.style.SUCCESS("=" * 80))
+        self.stdout.write(self.style.SUCCESS(f"Benchmark: {options['suite']}"))
+        self.stdout.write(self.style.SUCCESS("=" * 80))
+        suite(options)
+
+    def _report(self, label: str, count: int, elapsed: float, unit: str):
+        rate = count / elapsed if elapsed > 0 else float("inf")
+        self.stdout.write(
+            f"{label:<40} {count:>10} {unit} in {elapsed:8.3f}s  ->  {rate:12,.1f} {unit}/s"
+        )
+        return rate
+
+    def _report_speedup(self, optimised_rate: float, legacy_rate: float):
+        self.stdout.write(
+            self.style.SUCCESS(f"Speedup: {optimised_rate / legacy_rate:.2f}x")
+        )
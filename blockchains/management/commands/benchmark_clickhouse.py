@@ -0,0 +1,179 @@
+"""
+Management command to benchmark the ClickHouse client and event table layouts.
+
+USAGE EXAMPLES:
+
+    # Queries per second, legacy per-call client vs pooled sessionless client
+    python manage.py benchmark_clickhouse --suite clickhouse_client --threads 8 \\
+        --iterations 500
+
+    # Event table layouts on a synthetic Mint-like table of 50M rows: ENGINE = Log vs
+    # block-partitioned MergeTree with bloom filter indexes
+    python manage.py benchmark_clickhouse --suite event_tables --rows 50000000
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from blockchains.management.commands.benchmark_base import BenchmarkCommand
+from utils.clickhouse.client import ClickHouseClient, clickhouse_client
+
+
+class Command(BenchmarkCommand, BaseCommand):
+    help = "Benchmark the ClickHouse client and event table layouts"
+
+    SUITES = ["clickhouse_client", "event_tables"]
+
+    def add_suite_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Number of concurrent worker threads (default: 8)",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=500,
+            help="Number of queries per run (default: 500)",
+        )
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=50_000_000,
+            help="Synthetic rows per table for the event_tables suite (default: 50000000)",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the synthetic tables after the event_tables suite",
+        )
+
+    def _run_clickhouse_client(self, options):
+        """Queries per second for the legacy and pooled ClickHouse clients."""
+        threads = options["threads"]
+        iterations = options["iterations"]
+        query = "SELECT 1"
+
+        rates = []
+        for label, pooled in (("legacy (per-call client)", False), ("pooled", True)):
+            client = ClickHouseClient(pooled=pooled)
+            client.execute_query(query)  # warm up
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                list(
+                    executor.map(
+                        lambda _: client.execute_query(query), range(iterations)
+                    )
+                )
+            elapsed = time.perf_counter() - start
+            rates.append(self._report(label, iterations, elapsed, "queries"))
+            client.close()
+
+        legacy_rate, pooled_rate = rates
+        self._report_speedup(pooled_rate, legacy_rate)
+
+    def _run_event_tables(self, options):
+        """Block range, distinct pair and per-user queries on Log vs MergeTree."""
+        db_name = clickhouse_client.db_name
+        rows = options["rows"]
+        columns = [
+            ("caller", "String"),
+            ("onBehalfOf", "String"),
+            ("value", "UInt256"),
+            ("balanceIncrease", "UInt256"),
+            ("index", "UInt256"),
+            ("address", "String"),
+            ("blockNumber", "Int64"),
+            ("transactionHash", "String"),
+            ("transactionIndex", "Int64"),
+            ("logIndex", "Int64"),
+            ("asset", "String"),
+        ]
+        log_table = f"{db_name}.benchmark_events_log"
+        mergetree_table = f"{db_name}.benchmark_events_mergetree"
+        columns_str = ", ".join(f'"{name}" {type}' for name, type in columns)
+        ddls = {
+            log_table: f"CREATE TABLE {log_table} ({columns_str}) ENGINE = Log",
+            mergetree_table: clickhouse_client.get_event_table_ddl(
+                "benchmark_events_mergetree",
+                columns,
+                ["caller", "onBehalfOf", "address", "asset"],
+            ),
+        }
+        # ~200k users over 20 assets, 4 logs per block, inserted in block order
+        # like the event sync does
+        populate_query = """
+            INSERT INTO {table}
+            SELECT
+                concat('0x', lower(hex(cityHash64(number % 200000, 'caller')))),
+                concat('0x', lower(hex(cityHash64(number % 200000, 'user')))),
+                toUInt256(number * 1000),
+                toUInt256(number % 1000),
+                toUInt256(1000000000000000000000000000),
+                concat('0x', lower(hex(cityHash64(number % 20, 'token')))),
+                toInt64(intDiv(number, 4)),
+                concat('0x', lower(hex(cityHash64(intDiv(number, 2))))),
+                toInt64(intDiv(number % 4, 2)),
+                toInt64(number % 4),
+                concat('0x', lower(hex(cityHash64(number % 20, 'asset'))))
+            FROM numbers(%(rows)s)
+        """
+        for table, ddl in ddls.items():
+            clickhouse_client.execute_query(f"DROP TABLE IF EXISTS {table}")
+            clickhouse_client.execute_query(ddl)
+            start = time.perf_counter()
+            clickhouse_client.execute_query(
+                populate_query.format(table=table), parameters={"rows": rows}
+            )
+            self._report(
+                f"populate {table.split('.')[-1]}",
+                rows,
+                time.perf_counter() - start,
+                "rows",
+            )
+
+        last_block = rows // 4
+        user = clickhouse_client.execute_query(
+            f"SELECT onBehalfOf FROM {mergetree_table} LIMIT 1"
+        ).result_rows[0][0]
+        queries = {
+            "block range (last 10000 blocks)": (
+                "SELECT count(), sum(value) FROM {table} "
+                "WHERE blockNumber BETWEEN %(from_block)s AND %(to_block)s",
+                {"from_block": last_block - 10_000, "to_block": last_block},
+            ),
+            "distinct user/asset pairs": (
+                "SELECT count() FROM (SELECT DISTINCT onBehalfOf, asset FROM {table})",
+                {},
+            ),
+            "single user history": (
+                "SELECT blockNumber, transactionIndex, logIndex, value FROM {table} "
+                "WHERE onBehalfOf = %(user)s "
+                "ORDER BY blockNumber, transactionIndex, logIndex",
+                {"user": user},
+            ),
+        }
+
+        try:
+            for label, (query, parameters) in queries.items():
+                for table in (log_table, mergetree_table):
+                    start = time.perf_counter()
+                    result = clickhouse_client.execute_query(
+                        query.format(table=table), parameters=parameters
+                    )
+                    elapsed = time.perf_counter() - start
+                    read_rows = int(result.summary.get("read_rows", 0))
+                    self._report(
+                        f"{label} [{table.split('_')[-1]}]",
+                        read_rows,
+                        elapsed,
+                        "rows read",
+                    )
+        finally:
+            if not options["keep"]:
+                for table in ddls:
+                    clickhouse_client.execute_query(f"DROP TABLE IF EXISTS {table}")
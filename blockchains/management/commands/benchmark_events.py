@@ -0,0 +1,355 @@
+"""
+Management command to benchmark event log ingestion on a recorded log fixture.
+
+Each suite replays the same eth_getLogs results through the legacy and the
+optimised code path and prints throughput for both.
+
+USAGE EXAMPLES:
+
+    # Record a log fixture for all enabled events, then replay it through the
+    # sequential and pipelined event sync walkers (blocks per second)
+    python manage.py benchmark_events --suite event_sync --fixture /tmp/logs.json \\
+        --record --from-block 19000000 --to-block 19010000
+    python manage.py benchmark_events --suite event_sync --fixture /tmp/logs.json \\
+        --pipeline-depth 4 --rpc-latency 0.2 --insert-latency 0.1
+
+    # Logs per second, web3 get_event_data + decode_any vs precompiled row decoder
+    python manage.py benchmark_events --suite event_decoder --fixture /tmp/logs.json
+
+    # Logs per second rebuilding tables: re-downloading windows over a simulated RPC
+    # vs replaying the compressed raw-log archive with 1 and --threads decode
+    # processes
+    python manage.py benchmark_events --suite log_archive --fixture /tmp/logs.json \\
+        --window-size 1000 --rpc-latency 0.2 --threads 8
+"""
+
+import bisect
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from hexbytes import HexBytes
+from web3 import Web3
+
+from blockchains.management.commands.benchmark_base import BenchmarkCommand
+from blockchains.models import Event
+from utils import log_archive
+from utils.rpc import rpc_adapter
+from utils.tasks import EventSynchronizeMixin
+
+
+class Command(BenchmarkCommand, BaseCommand):
+    help = "Benchmark event sync, event decoding and log archive replay"
+
+    SUITES = ["event_sync", "event_decoder", "log_archive"]
+
+    def add_suite_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            type=str,
+            required=True,
+            help="Path of the recorded log fixture (JSON)",
+        )
+        parser.add_argument(
+            "--record",
+            action="store_true",
+            help="Record the fixture from the RPC before running the suite",
+        )
+        parser.add_argument("--from-block", type=int, help="First block to record")
+        parser.add_argument("--to-block", type=int, help="Last block to record")
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Decode processes of the log_archive suite (default: 8)",
+        )
+        parser.add_argument(
+            "--pipeline-depth",
+            type=int,
+            default=4,
+            help="Windows prefetched by the pipelined walker (default: 4)",
+        )
+        parser.add_argument(
+            "--window-size",
+            type=int,
+            default=1_000,
+            help="Maximum block window for replay suites (default: 1000)",
+        )
+        parser.add_argument(
+            "--rpc-latency",
+            type=float,
+            default=0.1,
+            help="Simulated RPC round-trip latency in seconds (default: 0.1)",
+        )
+        parser.add_argument(
+            "--insert-latency",
+            type=float,
+            default=0.05,
+            help="Simulated ClickHouse insert latency in seconds (default: 0.05)",
+        )
+
+    def _run_event_sync(self, options):
+        """Blocks per second for the sequential and pipelined event sync walkers."""
+        fixture, logs = self._load_log_fixture(options)
+        event_abis = fixture["abis"]
+        from_block, to_block = fixture["from_block"], fixture["to_block"]
+        blocks = to_block - from_block + 1
+
+        adapter = ReplayRpcAdapter(logs, options["rpc_latency"], options["window_size"])
+        rates = []
+        for label, depth in (
+            ("sequential", 0),
+            (
+                f"pipelined (depth {options['pipeline_depth']})",
+                options["pipeline_depth"],
+            ),
+        ):
+            sync = ReplayEventSync(adapter, depth, options["insert_latency"])
+            start = time.perf_counter()
+            sync.sync_event_windows(
+                network_events=[],
+                topics=list(event_abis.keys()),
+                contract_addresses=[],
+                event_abis=event_abis,
+                global_from_block=from_block,
+                global_to_block=to_block,
+            )
+            rates.append(
+                self._report(label, blocks, time.perf_counter() - start, "blocks")
+            )
+
+        sequential_rate, pipelined_rate = rates
+        self._report_speedup(pipelined_rate, sequential_rate)
+
+    def _run_event_decoder(self, options):
+        """Logs per second for the web3 decoder and the precompiled row decoder."""
+        fixture, logs = self._load_log_fixture(options)
+        event_abis = fixture["abis"]
+        events = {
+            topic_0: Event(name=abi["name"], topic_0=topic_0, abi=abi)
+            for topic_0, abi in event_abis.items()
+        }
+        sync = ReplayEventSync(adapter=None, pipeline_depth=0, insert_latency=0)
+
+        start = time.perf_counter()
+        event_dicts = sync.process_raw_event_dicts(logs, event_abis)
+        for topic_0, event_logs in event_dicts.items():
+            sync.build_event_rows(events[topic_0], event_logs)
+        legacy_rate = self._report(
+            "web3 get_event_data + decode_any",
+            len(logs),
+            time.perf_counter() - start,
+            "logs",
+        )
+
+        start = time.perf_counter()
+        sync.process_raw_event_rows(logs, event_abis)
+        fast_rate = self._report(
+            "precompiled row decoder", len(logs), time.perf_counter() - start, "logs"
+        )
+
+        self._report_speedup(fast_rate, legacy_rate)
+
+    def _run_log_archive(self, options):
+        """Logs per second rebuilding from RPC windows vs the local raw-log archive."""
+        fixture, logs = self._load_log_fixture(options)
+        event_abis = fixture["abis"]
+        from_block, to_block = fixture["from_block"], fixture["to_block"]
+        window = options["window_size"]
+        topics = list(event_abis.keys())
+        addresses = sorted(set(log["address"].lower() for log in logs))
+        sync = ReplayEventSync(adapter=None, pipeline_depth=0, insert_latency=0)
+        adapter = ReplayRpcAdapter(logs, options["rpc_latency"], window)
+        windows = [
+            (start, min(start + window - 1, to_block))
+            for start in range(from_block, to_block + 1, window)
+        ]
+
+        start = time.perf_counter()
+        rpc_rows = 0
+        for start_block, end_block in windows:
+            raw = adapter.extract_raw_event_data(
+                topics, addresses, start_block, end_block
+            )
+            event_rows = sync.process_raw_event_rows(raw, event_abis)
+            rpc_rows += sum(len(rows) for rows in event_rows.values())
+        rpc_rate = self._report(
+            f"RPC re-download ({len(windows)} windows)",
+            rpc_rows,
+            time.perf_counter() - start,
+            "logs",
+        )
+
+        archive_dir = tempfile.mkdtemp(prefix="log_archive_")
+        try:
+            start = time.perf_counter()
+            for start_block, end_block in windows:
+                lo = bisect.bisect_left(adapter.blocks, start_block)
+                hi = bisect.bisect_right(adapter.blocks, end_block)
+                log_archive.write_segment(
+                    "replay",
+                    topics,
+                    addresses,
+                    start_block,
+                    end_block,
+                    adapter.logs[lo:hi],
+                    archive_dir=archive_dir,
+                )
+            self._report(
+                "archive write", len(logs), time.perf_counter() - start, "logs"
+            )
+            archive_bytes = sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(archive_dir)
+                for name in names
+            )
+            self.stdout.write(
+                f"Archive: {len(windows)} segments, {archive_bytes / 1e6:.1f} MB "
+                f"({archive_bytes / max(len(logs), 1):.0f} bytes per log)"
+            )
+
+            keys = {
+                (topic.lower(), address) for topic in topics for address in addresses
+            }
+            plan = list(
+                log_archive.plan_replay(
+                    log_archive.list_segments("replay", archive_dir=archive_dir),
+                    keys,
+                    from_block,
+                )
+            )
+            rates = []
+            for workers in sorted({1, max(options["threads"], 1)}):
+                start = time.perf_counter()
+                archive_rows = 0
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [
+                        executor.submit(
+                            log_archive.decode_segment,
+                            segment.path,
+                            log_cursors,
+                            event_abis,
+                        )
+                        for segment, log_cursors in plan
+                    ]
+                    for future in futures:
+                        event_rows, _ = future.result()
+                        archive_rows += sum(len(rows) for rows in event_rows.values())
+                rates.append(
+                    self._report(
+                        f"archive replay ({workers} processes)",
+                        archive_rows,
+                        time.perf_counter() - start,
+                        "logs",
+                    )
+                )
+        finally:
+            shutil.rmtree(archive_dir, ignore_errors=True)
+
+        self._report_speedup(max(rates), rpc_rate)
+
+    def _load_log_fixture(self, options):
+        fixture_path = options["fixture"]
+        if options["record"]:
+            self._record_log_fixture(
+                fixture_path, options["from_block"], options["to_block"]
+            )
+
+        with open(fixture_path) as f:
+            fixture = json.load(f)
+        logs = [self._load_fixture_log(log) for log in fixture["logs"]]
+        self.stdout.write(
+            f"Fixture: {len(logs)} logs over blocks "
+            f"{fixture['from_block']}-{fixture['to_block']}"
+        )
+        return fixture, logs
+
+    def _record_log_fixture(self, fixture_path: str, from_block: int, to_block: int):
+        if from_block is None or to_block is None:
+            raise CommandError("--from-block and --to-block are required to record")
+
+        events = Event.objects.filter(is_enabled=True)
+        topics = [event.topic_0 for event in events]
+        contract_addresses = list(
+            set(
+                Web3.to_checksum_address(address)
+                for event in events
+                for address in event.contract_addresses
+            )
+        )
+
+        logs = []
+        window = rpc_adapter.max_blockrange_size_for_events
+        for start_block in range(from_block, to_block + 1, window):
+            end_block = min(start_block + window - 1, to_block)
+            logs.extend(
+                rpc_adapter.extract_raw_event_data(
+                    topics=topics,
+                    contract_addresses=contract_addresses,
+                    start_block=start_block,
+                    end_block=end_block,
+                )
+            )
+
+        with open(fixture_path, "w") as f:
+            f.write(
+                Web3.to_json(
+                    {
+                        "from_block": from_block,
+                        "to_block": to_block,
+                        "abis": {event.topic_0: event.abi for event in events},
+                        "logs": logs,
+                    }
+                )
+            )
+        self.stdout.write(f"Recorded {len(logs)} logs to {fixture_path}")
+
+    @staticmethod
+    def _load_fixture_log(log: dict) -> dict:
+        log = dict(log)
+        log["topics"] = [HexBytes(topic) for topic in log["topics"]]
+        for key in ("data", "transactionHash", "blockHash"):
+            log[key] = HexBytes(log[key])
+        return log
+
+
+class ReplayRpcAdapter:
+    """Serves eth_getLogs from a recorded fixture with a simulated round-trip."""
+
+    def __init__(self, logs, latency: float, max_blockrange_size_for_events: int):
+        self.logs = sorted(logs, key=lambda log: log["blockNumber"])
+        self.blocks = [log["blockNumber"] for log in self.logs]
+        self.latency = latency
+        self.max_blockrange_size_for_events = max_blockrange_size_for_events
+
+    def extract_raw_event_data(
+        self, topics, contract_addresses, start_block, end_block
+    ):
+        time.sleep(self.latency)
+        lo = bisect.bisect_left(self.blocks, start_block)
+        hi = bisect.bisect_right(self.blocks, end_block)
+        return self.logs[lo:hi]
+
+
+class ReplayEventSync(EventSynchronizeMixin):
+    """Event sync walker that simulates inserts and keeps no checkpoints."""
+
+    network_name = "replay"
+    # Every walker starts from the same window
+    persist_window_state = False
+    archive_raw_logs = False
+
+    def __init__(self, adapter, pipeline_depth: int, insert_latency: float):
+        self.rpc_adapter = adapter
+        self.pipeline_depth = pipeline_depth
+        self.insert_latency = insert_latency
+
+    def handle_event_logs(self, network_events, event_dicts):
+        time.sleep(self.insert_latency)
+
+    def update_last_synced_block(self, events, block):
+        pass
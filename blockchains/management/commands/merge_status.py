@@ -0,0 +1,64 @@
+"""
+Management command to inspect the ClickHouse merge scheduler.
+
+Shows, per deduplicating table, the active part count, how long the oldest pending
+merge request has been waiting (merge lag) and statistics of the last merge.
+
+USAGE EXAMPLES:
+
+    # Show merge lag for every table
+    python manage.py merge_status
+
+    # Merge every table with an overdue request or too many parts right now
+    python manage.py merge_status --sweep
+"""
+
+from django.core.management.base import BaseCommand
+
+from blockchains.tasks import ScheduledMergeTask
+from utils.clickhouse import merge_scheduler
+from utils.clickhouse.client import clickhouse_client
+
+
+class Command(BaseCommand):
+    help = "Show merge lag and last merge statistics for ClickHouse tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sweep",
+            action="store_true",
+            help="Run the merge sweep synchronously before reporting",
+        )
+
+    def handle(self, *args, **options):
+        if options["sweep"]:
+            ScheduledMergeTask.run()
+
+        tables = sorted(set(clickhouse_client.OPTIMIZE_TARGETS.values()))
+        metrics = merge_scheduler.get_merge_metrics(
+            tables, clickhouse_client.get_active_parts()
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Merge interval: {merge_scheduler.MERGE_INTERVAL_SECONDS}s, "
+                f"parts threshold: {merge_scheduler.MERGE_PARTS_THRESHOLD}, "
+                f"scheduler enabled: {clickhouse_client.merge_scheduler_enabled}"
+            )
+        )
+        self.stdout.write(
+            f"{'table':<42} {'parts':>6} {'lag (s)':>9} {'pending':>8} "
+            f"{'last lag (s)':>13} {'last took (s)':>14} {'coalesced':>10}"
+        )
+        for row in metrics:
+            self.stdout.write(
+                f"{row['table']:<42} {row['active_parts']:>6} "
+                f"{row['pending_lag_seconds']:>9.1f} {row['pending_requests']:>8} "
+                f"{self._format(row['last_lag_seconds']):>13} "
+                f"{self._format(row['last_duration_seconds']):>14} "
+                f"{row['last_coalesced_requests'] or 0:>10}"
+            )
+
+    @staticmethod
+    def _format(value):
+        return "-" if value is None else f"{value:.1f}"
@@ -0,0 +1,241 @@
+"""
+Management command to migrate ENGINE = Log and plain MergeTree event tables to
+ReplacingMergeTree online.
+
+For each table the command:
+1. Creates <table>_migrating with the layout of ClickHouseClient.get_event_table_ddl
+   (ordered by log position, deduplicated on (transactionHash, logIndex),
+   partitioned by block range, bloom filter indexes on address columns)
+2. Copies every row up to the current max blockNumber while syncs keep running
+3. Disables the table's events, waits for in-flight syncs, copies the tail and
+   compares the distinct (transactionHash, logIndex) logs of both tables
+4. Swaps the tables with EXCHANGE TABLES and recreates the materialized views
+   reading from the table so they are attached to the new one
+5. Re-enables the events, also when the migration fails
+6. Keeps the old table as <table>_old (or drops it)
+
+USAGE EXAMPLES:
+
+    # Show which tables would be migrated
+    python manage.py migrate_event_tables --dry-run
+
+    # Migrate every Log/MergeTree event table, dropping the old copies once verified
+    python manage.py migrate_event_tables --drop-old
+
+    # Migrate specific tables
+    python manage.py migrate_event_tables --tables Mint Burn BalanceTransfer
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from balances.models import BalanceEvent
+from blockchains.models import Event
+from oracles.models import PriceEvent
+from utils.clickhouse.client import clickhouse_client
+
+LOG_POSITION_COLUMNS = {"blockNumber", "transactionIndex", "logIndex"}
+
+
+class Command(BaseCommand):
+    help = "Migrate event tables to ordered, partitioned ReplacingMergeTree tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tables",
+            nargs="+",
+            help="Tables to migrate (default: every Log or MergeTree table with log "
+            "position columns)",
+        )
+        parser.add_argument(
+            "--quiesce-seconds",
+            type=int,
+            default=30,
+            help="Wait after disabling events for in-flight syncs to finish (default: 30)",
+        )
+        parser.add_argument(
+            "--drop-old",
+            action="store_true",
+            help="Drop the old table after a successful migration",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only print the tables and DDL that would be used",
+        )
+
+    def handle(self, *args, **options):
+        db_name = clickhouse_client.db_name
+        tables = options["tables"] or self._get_log_event_tables(db_name)
+        if not tables:
+            self.stdout.write("No event tables to migrate")
+            return
+
+        for table in tables:
+            columns = self._get_columns(db_name, table)
+            if not LOG_POSITION_COLUMNS.issubset(name for name, _ in columns):
+                raise CommandError(
+                    f"{table} has no blockNumber/transactionIndex/logIndex"
+                )
+
+            ddl = clickhouse_client.get_event_table_ddl(
+                f"{table}_migrating", columns, self._get_address_columns(table, columns)
+            )
+            if options["dry_run"]:
+                self.stdout.write(f"{table}: {ddl}")
+                continue
+
+            start = time.time()
+            self._migrate_table(db_name, table, ddl, options)
+            self.stdout.write(
+                self.style.SUCCESS(f"Migrated {table} in {time.time() - start:.1f}s")
+            )
+
+    def _migrate_table(self, db_name: str, table: str, ddl: str, options):
+        source = f"{db_name}.{table}"
+        target = f"{db_name}.{table}_migrating"
+
+        clickhouse_client.execute_query(f"DROP TABLE IF EXISTS {target}")
+        clickhouse_client.execute_query(ddl)
+
+        # Bulk copy while syncs keep appending to the old table
+        max_block = (
+            clickhouse_client.execute_query(
+                f"SELECT max(blockNumber) FROM {source}"
+            ).result_rows[0][0]
+            or 0
+        )
+        clickhouse_client.execute_query(
+            f"INSERT INTO {target} SELECT * FROM {source} "
+            f"WHERE blockNumber <= %(max_block)s",
+            parameters={"max_block": max_block},
+        )
+        self.stdout.write(f"{table}: copied rows up to block {max_block}")
+
+        # Stop syncs writing to this table, then copy the tail and swap
+        disabled = self._disable_events(table)
+        try:
+            if disabled:
+                self.stdout.write(
+                    f"{table}: disabled {len(disabled)} events, waiting "
+                    f"{options['quiesce_seconds']}s for in-flight syncs"
+                )
+                time.sleep(options["quiesce_seconds"])
+
+            clickhouse_client.execute_query(
+                f"INSERT INTO {target} SELECT * FROM {source} "
+                f"WHERE blockNumber > %(max_block)s",
+                parameters={"max_block": max_block},
+            )
+            # The target collapses duplicate logs on merge, compare distinct logs
+            expected = self._count_logs(source)
+            actual = self._count_logs(target)
+            if expected != actual:
+                raise CommandError(
+                    f"{table}: log count mismatch before swap ({expected} vs {actual})"
+                )
+
+            views = self._get_dependent_views(db_name, table)
+            clickhouse_client.execute_query(f"EXCHANGE TABLES {source} AND {target}")
+            # Recreate views so they are attached to the new table whichever way
+            # the server tracked the exchange
+            for view, create_query in views:
+                clickhouse_client.execute_query(f"DROP VIEW IF EXISTS {db_name}.{view}")
+                clickhouse_client.execute_query(create_query)
+            if views:
+                self.stdout.write(
+                    f"{table}: recreated views {', '.join(v for v, _ in views)}"
+                )
+        finally:
+            self._enable_events(disabled)
+
+        clickhouse_client.execute_query(f"DROP TABLE IF EXISTS {db_name}.{table}_old")
+        if options["drop_old"]:
+            clickhouse_client.execute_query(f"DROP TABLE {target}")
+        else:
+            clickhouse_client.execute_query(
+                f"RENAME TABLE {target} TO {db_name}.{table}_old"
+            )
+            self.stdout.write(f"{table}: old table kept as {table}_old")
+
+    def _get_log_event_tables(self, db_name: str):
+        result = clickhouse_client.execute_query(
+            """
+            SELECT t.name
+            FROM system.tables AS t
+            INNER JOIN (
+                SELECT table, groupArray(name) AS names
+                FROM system.columns
+                WHERE database = %(db)s
+                GROUP BY table
+            ) AS c ON c.table = t.name
+            WHERE t.database = %(db)s
+              AND t.engine IN ('Log', 'MergeTree')
+              AND NOT endsWith(t.name, '_old')
+              AND hasAll(c.names, ['blockNumber', 'transactionIndex', 'logIndex'])
+            ORDER BY t.name
+            """,
+            parameters={"db": db_name},
+        )
+        return [row[0] for row in result.result_rows]
+
+    def _get_columns(self, db_name: str, table: str):
+        result = clickhouse_client.execute_query(
+            """
+            SELECT name, type FROM system.columns
+            WHERE database = %(db)s AND table = %(table)s
+            ORDER BY position
+            """,
+            parameters={"db": db_name, "table": table},
+        )
+        if not result.result_rows:
+            raise CommandError(f"Table {table} does not exist")
+        return [(row[0], row[1]) for row in result.result_rows]
+
+    def _get_address_columns(self, table: str, columns):
+        names = {name for name, _ in columns}
+        address_columns = ["address"]
+        for model in (Event, BalanceEvent, PriceEvent):
+            event = model.objects.filter(name=table).first()
+            if event is not None:
+                address_columns = event._get_clickhouse_address_columns()
+                break
+        if "asset" in names:
+            address_columns.append("asset")
+        return [name for name in dict.fromkeys(address_columns) if name in names]
+
+    def _get_dependent_views(self, db_name: str, table: str):
+        result = clickhouse_client.execute_query(
+            """
+            SELECT name, create_table_query FROM system.tables
+            WHERE database = %(db)s
+              AND engine = 'MaterializedView'
+              AND name IN (
+                  SELECT arrayJoin(dependencies_table) FROM system.tables
+                  WHERE database = %(db)s AND name = %(table)s
+              )
+            """,
+            parameters={"db": db_name, "table": table},
+        )
+        return [(row[0], row[1]) for row in result.result_rows]
+
+    def _disable_events(self, table: str):
+        disabled = []
+        for model in (Event, BalanceEvent, PriceEvent):
+            events = model.objects.filter(name=table, is_enabled=True)
+            disabled.extend(
+                (model, event_id) for event_id in events.values_list("id", flat=True)
+            )
+            events.update(is_enabled=False)
+        return disabled
+
+    def _enable_events(self, disabled):
+        for model, event_id in disabled:
+            model.objects.filter(id=event_id).update(is_enabled=True)
+
+    def _count_logs(self, table: str) -> int:
+        """Distinct (transactionHash, logIndex) logs in a table."""
+        return clickhouse_client.execute_query(
+            f"SELECT uniqExact(transactionHash, logIndex) FROM {table}"
+        ).result_rows[0][0]
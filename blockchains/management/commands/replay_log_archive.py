@@ -0,0 +1,292 @@
+"""
+Management command to rebuild event tables from the local raw-log archive.
+
+Segments written by the sync walkers (LOG_ARCHIVE_ENABLED, see utils.log_archive)
+are read and decoded in parallel worker processes and inserted in bulk through
+the child synchronize task's handle_event_logs, without any RPC call. The
+selected events are disabled while replaying and re-enabled afterwards.
+
+Only the block ranges the archive covers can be rebuilt; --dry-run shows the
+contiguous coverage of every event from --from-block. --set-cursor moves
+last_synced_block to the end of that coverage so the range syncs continue from
+there.
+
+USAGE EXAMPLES:
+
+    # Show archive coverage of every enabled protocol event
+    python manage.py replay_log_archive --group events --dry-run
+
+    # Rebuild the balance event tables from scratch and continue syncing from
+    # the end of the archive
+    python manage.py replay_log_archive --group balances --truncate --set-cursor
+
+    # Replay a block range of specific events into their existing tables
+    python manage.py replay_log_archive --group events --event-ids 3 4 \\
+        --from-block 19000000 --to-block 19500000 --workers 8
+"""
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from balances.tasks import ChildBalancesSynchronizeTask
+from blockchains.tasks import ChildSynchronizeTask
+from oracles.tasks import PriceEventSynchronizeTask
+from utils import log_archive
+from utils.backfill import IntervalSet
+from utils.clickhouse.client import clickhouse_client
+
+
+class Command(BaseCommand):
+    help = "Rebuild event tables from the local raw-log archive without RPC"
+
+    CHILD_TASKS = {
+        "events": ChildSynchronizeTask,
+        "balances": ChildBalancesSynchronizeTask,
+        "prices": PriceEventSynchronizeTask,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--group",
+            choices=list(self.CHILD_TASKS),
+            required=True,
+            help="Event models to replay",
+        )
+        parser.add_argument(
+            "--event-ids",
+            type=int,
+            nargs="+",
+            help="Only replay these events (default: every enabled event)",
+        )
+        parser.add_argument(
+            "--from-block",
+            type=int,
+            default=0,
+            help="First block to replay (default: 0)",
+        )
+        parser.add_argument(
+            "--to-block",
+            type=int,
+            help="Last block to replay (default: end of archive)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Decode worker processes (default: CPU count)",
+        )
+        parser.add_argument(
+            "--batch-logs",
+            type=int,
+            default=100_000,
+            help="Decoded logs per bulk insert (default: 100000)",
+        )
+        parser.add_argument(
+            "--truncate",
+            action="store_true",
+            help="Truncate the events' tables before replaying",
+        )
+        parser.add_argument(
+            "--set-cursor",
+            action="store_true",
+            help="Move last_synced_block to the end of the replayed coverage",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            default=log_archive.LOG_ARCHIVE_DIR,
+            help=f"Archive root (default: {log_archive.LOG_ARCHIVE_DIR})",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only show the archive coverage of the events",
+        )
+
+    def handle(self, *args, **options):
+        task = self.CHILD_TASKS[options["group"]]
+        event_model = task.event_model
+        events = event_model.objects.all()
+        if options["event_ids"]:
+            events = events.filter(id__in=options["event_ids"])
+            if options["truncate"]:
+                raise CommandError(
+                    "--truncate rebuilds whole tables, it cannot be combined with "
+                    "--event-ids"
+                )
+        else:
+            events = events.filter(is_enabled=True)
+        events = list(events)
+        if not events:
+            raise CommandError("No events to replay")
+
+        from_block = options["from_block"]
+        segments = log_archive.list_segments(
+            event_model._meta.model_name,
+            from_block,
+            options["to_block"],
+            options["archive_dir"],
+        )
+        event_keys = {
+            event.id: {
+                (event.topic_0.lower(), address.lower())
+                for address in event.contract_addresses
+            }
+            for event in events
+        }
+        coverage = self._get_coverage(events, event_keys, segments, options)
+        for event in events:
+            end = coverage[event.id]
+            covered = f"{from_block}-{end}" if end >= from_block else "none"
+            self.stdout.write(
+                f"{event.name} ({event.id}): archive covers {covered}, "
+                f"last_synced_block {event.last_synced_block}"
+            )
+        self.stdout.write(f"{len(segments)} archived segments in range")
+        if options["dry_run"]:
+            return
+
+        disabled = self._disable_events(event_model, events)
+        deduplicate_event_rows = task.deduplicate_event_rows
+        try:
+            if options["truncate"]:
+                # Fresh tables, the replay plan already decodes every log once
+                task.deduplicate_event_rows = False
+                for table in sorted({event.name for event in events}):
+                    clickhouse_client.execute_query(
+                        f"TRUNCATE TABLE IF EXISTS {clickhouse_client.db_name}.{table}"
+                    )
+                event_model.objects.filter(id__in=[e.id for e in events]).update(
+                    logs_count=0
+                )
+                self.stdout.write(f"Truncated tables of {len(events)} events")
+
+            start = time.perf_counter()
+            logs = self._replay(
+                task,
+                events,
+                set().union(*event_keys.values()),
+                segments,
+                options,
+            )
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Replayed {logs} logs in {elapsed:.1f}s "
+                    f"({logs / elapsed if elapsed > 0 else 0:,.0f} logs/s)"
+                )
+            )
+
+            if options["set_cursor"]:
+                for event in events:
+                    if coverage[event.id] >= from_block:
+                        event_model.objects.filter(id=event.id).update(
+                            last_synced_block=coverage[event.id]
+                        )
+                self.stdout.write("Moved last_synced_block to the end of the coverage")
+        finally:
+            task.deduplicate_event_rows = deduplicate_event_rows
+            event_model.objects.filter(id__in=disabled).update(is_enabled=True)
+
+    def _get_coverage(self, events, event_keys, segments, options):
+        """Last block of the contiguous archive coverage of every event from from_block."""
+        from_block = options["from_block"]
+        to_block = options["to_block"]
+        key_ranges = {}
+        for segment in segments:
+            end = (
+                segment.to_block
+                if to_block is None
+                else min(segment.to_block, to_block)
+            )
+            for key in segment.keys():
+                key_ranges.setdefault(key, IntervalSet()).add(
+                    max(segment.from_block, from_block), end
+                )
+        return {
+            event.id: min(
+                key_ranges.get(key, IntervalSet()).contiguous_end(from_block)
+                for key in event_keys[event.id]
+            )
+            for event in events
+        }
+
+    def _replay(self, task, events, keys, segments, options):
+        network_events = task.event_model.objects.filter(id__in=[e.id for e in events])
+        event_abis = {event.topic_0: event.abi for event in events}
+        plan = list(log_archive.plan_replay(segments, keys, options["from_block"]))
+        self.stdout.write(
+            f"Replaying {len(plan)} segments with {options['workers']} workers"
+        )
+
+        batch = {}
+        batch_logs = 0
+        replayed = 0
+
+        def flush():
+            nonlocal batch, batch_logs
+            if batch:
+                task.handle_event_logs(network_events=network_events, event_dicts=batch)
+            batch, batch_logs = {}, 0
+
+        # The replayed range is usually at or below the events' cursors
+        filter_synced_event_logs = task.filter_synced_event_logs
+        task.filter_synced_event_logs = False
+        try:
+            for event_dicts, logs in self._decode_segments(
+                task, plan, event_abis, options
+            ):
+                for topic_0, event_logs in event_dicts.items():
+                    batch.setdefault(topic_0, []).extend(event_logs)
+                batch_logs += logs
+                replayed += logs
+                if batch_logs >= options["batch_logs"]:
+                    flush()
+                    self.stdout.write(f"  {replayed} logs inserted")
+            flush()
+        finally:
+            task.filter_synced_event_logs = filter_synced_event_logs
+        return replayed
+
+    def _decode_segments(self, task, plan, event_abis, options):
+        """Decoded segments in plan order, decoded ahead by the worker processes."""
+        to_block = options["to_block"]
+        if not task.decode_event_rows:
+            # web3 AttributeDicts are decoded by the task itself
+            for segment, log_cursors in plan:
+                logs = log_archive.load_segment_logs(
+                    segment.path, log_cursors, to_block
+                )
+                yield task.process_raw_logs(logs, event_abis), len(logs)
+            return
+
+        workers = max(options["workers"], 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            segments = iter(plan)
+            while True:
+                while len(pending) < workers * 2:
+                    next_segment = next(segments, None)
+                    if next_segment is None:
+                        break
+                    segment, log_cursors = next_segment
+                    pending.append(
+                        executor.submit(
+                            log_archive.decode_segment,
+                            segment.path,
+                            log_cursors,
+                            event_abis,
+                            to_block,
+                        )
+                    )
+                if not pending:
+                    return
+                yield pending.popleft().result()
+
+    def _disable_events(self, event_model, events):
+        disabled = [event.id for event in events if event.is_enabled]
+        event_model.objects.filter(id__in=disabled).update(is_enabled=False)
+        return disabled
@@ -0,0 +1,91 @@
+"""
+Management command to inspect single-flight coalescing of event syncs.
+
+Shows, per event model, how many parent triggers were dispatched as child runs,
+coalesced into a pending run or picked up as reruns by the in-flight run, and the
+queue depth (groups with a run in flight / pending) at the last parent sync, followed
+by the learned eth_getLogs block window of every filter and provider.
+
+USAGE EXAMPLES:
+
+    python manage.py sync_status
+
+    # Forget learned block windows, e.g. after a provider changed its limits
+    python manage.py sync_status --reset-windows
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from balances.models import BalanceEvent
+from blockchains.models import Event
+from oracles.models import PriceEvent
+from utils import sync_scheduler, window_sizer
+
+
+class Command(BaseCommand):
+    help = "Show coalesced trigger counts, queue depth and block windows of event syncs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset-windows",
+            action="store_true",
+            help="Forget the learned block windows instead of showing status",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset_windows"]:
+            for model in (Event, BalanceEvent, PriceEvent):
+                reset = window_sizer.reset_window_state(model)
+                self.stdout.write(
+                    f"{model._meta.model_name}: reset {reset} block windows"
+                )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Single-flight enabled: {sync_scheduler.SINGLE_FLIGHT_ENABLED}, "
+                f"in-flight timeout: {sync_scheduler.INFLIGHT_TIMEOUT}s"
+            )
+        )
+        self.stdout.write(
+            f"{'model':<14} {'triggers':>9} {'dispatched':>11} {'coalesced':>10} "
+            f"{'reruns':>7} {'groups':>7} {'in flight':>10} {'pending':>8} {'age (s)':>8}"
+        )
+        for model in (Event, BalanceEvent, PriceEvent):
+            metrics = sync_scheduler.get_sync_metrics(model)
+            recorded_at = metrics.get("recorded_at")
+            age = f"{time.time() - recorded_at:.0f}" if recorded_at else "-"
+            self.stdout.write(
+                f"{model._meta.model_name:<14} {metrics['triggers']:>9} "
+                f"{metrics['dispatched']:>11} {metrics['coalesced']:>10} "
+                f"{metrics['reruns']:>7} {metrics.get('groups', 0):>7} "
+                f"{metrics.get('inflight', 0):>10} {metrics.get('pending', 0):>8} {age:>8}"
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nBlock windows (target {window_sizer.WINDOW_TARGET_LOGS} logs, "
+                f"{window_sizer.WINDOW_TARGET_SECONDS}s per request)"
+            )
+        )
+        self.stdout.write(
+            f"{'model':<14} {'filter':<17} {'provider':<30} {'window':>9} "
+            f"{'error rate':>11} {'requests':>9} {'errors':>7} {'last logs':>10} "
+            f"{'last (s)':>9}"
+        )
+        for model in (Event, BalanceEvent, PriceEvent):
+            for state in window_sizer.get_window_metrics(model):
+                last_logs = (
+                    state["last_logs"] if state["last_logs"] is not None else "-"
+                )
+                last_seconds = (
+                    state["last_seconds"] if state["last_seconds"] is not None else "-"
+                )
+                self.stdout.write(
+                    f"{model._meta.model_name:<14} {state['filter_key']:<17} "
+                    f"{state['provider']:<30} {state['window']:>9} "
+                    f"{state['error_rate']:>11.2%} {state['requests']:>9} "
+                    f"{state['errors']:>7} {last_logs:>10} {last_seconds:>9}"
+                )
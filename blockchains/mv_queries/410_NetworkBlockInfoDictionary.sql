@@ -11,8 +11,7 @@ SOURCE(CLICKHOUSE(
     PORT 9000
     USER 'clickhouse-user'
     PASSWORD 'clickhouse-password'
-    TABLE 'LatestNetworkBlockInfo'
-    DB 'aave_ethereum'
+    QUERY 'SELECT network_id, latest_block_number, latest_block_timestamp, network_time_for_new_block FROM aave_ethereum.LatestNetworkBlockInfo FINAL'
 ))
 LIFETIME(MIN 1 MAX 1)
 LAYOUT(COMPLEX_KEY_HASHED());
@@ -1,5 +1,7 @@
 import logging
 import os
+import re
+import time
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
@@ -9,6 +11,7 @@ from django.core.cache import cache
 from eth_utils import get_all_event_abis
 
 from balances.models import BalanceEvent
+from balances.tasks import ChildBalancesSynchronizeTask, UpdateUserHealthFactorsTask
 from blockchains.balance_test_tasks import (
     CompareCollateralBalanceTask,
     CompareDebtBalanceTask,
@@ -28,6 +31,7 @@ from blockchains.liquidity_index_test_tasks import (
 from blockchains.models import Event
 from liquidations_v2.celery_app import app
 from oracles.models import PriceEvent
+from utils.clickhouse import merge_scheduler
 from utils.clickhouse.client import clickhouse_client
 from utils.constants import (
     NETWORK_BLOCK_TIME,
@@ -39,6 +43,7 @@ from utils.constants import (
 )
 from utils.encoding import get_signature, get_topic_0
 from utils.files import parse_json, parse_yaml
+from utils.reorg import clear_pending_rollback, start_rollback
 from utils.rpc import rpc_adapter
 from utils.simulation import get_simulated_health_factor
 from utils.tasks import EventSynchronizeMixin, ParentSynchronizeTaskMixin
@@ -76,6 +81,9 @@ class InitializeAppTask(Task):
             clickhouse_client.create_database()
             self.create_protocol_events()
             self.create_materialized_views()
+            # A new UserHealthFactor store is empty until its first rebuild
+            if not UpdateUserHealthFactorsTask.is_populated():
+                UpdateUserHealthFactorsTask.rebuild()
             logger.info(
                 f"Completed InitializeAppTask for {PROTOCOL_NAME} on {NETWORK_NAME}"
             )
@@ -236,12 +244,311 @@ class ResetAppTask(Task):
 ResetAppTask = app.register_task(ResetAppTask())
 
 
+class ReorgRollbackTask(Task):
+    """Roll back rows written for blocks orphaned by a chain reorganisation.
+
+    Deletes every row at or above the first orphaned block from the append-only
+    event tables (MergeTree tables sorted by blockNumber), recomputes the
+    latest-state tables materialized from them, rewinds the cursors of the
+    event models to the block before it and re-reads the on-chain balances of
+    every user/asset pair the orphaned balance events touched. The range syncs
+    then re-ingest the canonical blocks. Range syncs in flight are fenced off
+    first (see utils.reorg.start_rollback), so none of their windows reaching the
+    fork block is committed during or after the rollback.
+
+    Events whose table could not be cleaned, e.g. ENGINE = Log tables not yet run
+    through migrate_event_tables, keep their cursors: re-ingesting on top of their
+    orphaned rows would duplicate them or, deduplicated, keep their orphaned
+    blockNumber. Their orphaned rows need a manual migration and resync.
+
+    Price events are not rewound: their raw tables are Log tables, which cannot
+    be deleted from, and an orphaned price is superseded by the next canonical
+    transmission of its feed.
+    """
+
+    EVENT_MODELS = [Event, BalanceEvent]
+
+    # Latest-state tables recomputed from their event tables after a rollback,
+    # with the column holding the block each row was derived from
+    LATEST_STATE_TABLES = {
+        "LatestCollateralConfigurationChanged": "blockNumber",
+        "LatestEModeAssetCategoryChanged": "blockNumber",
+        "LatestEModeCategoryAdded": "blockNumber",
+        "LatestAssetSourceUpdated": "blockNumber",
+        "CollateralStatusDictionary": "blockNumber",
+        "EModeStatusDictionary": "blockNumber",
+        "CollateralLiquidityIndex": "updated_at_block",
+        "DebtLiquidityIndex": "updated_at_block",
+    }
+
+    def run(self, fork_block: int):
+        logger.warning(f"Rolling back blocks from {fork_block}")
+        try:
+            # Fence off range syncs in flight before anything is deleted
+            start_rollback(fork_block)
+            user_asset_pairs = ChildBalancesSynchronizeTask.get_user_asset_pairs(
+                fork_block, 2**63 - 1
+            )
+
+            deleted_tables = self.delete_orphaned_rows(fork_block)
+            uncleaned_tables = self.get_uncleaned_event_tables(
+                fork_block, deleted_tables
+            )
+            if uncleaned_tables:
+                logger.error(
+                    f"Cannot roll back blocks from {fork_block} in "
+                    f"{', '.join(uncleaned_tables)}: their tables are not MergeTree "
+                    f"tables sorted by blockNumber, run migrate_event_tables. Their "
+                    f"events are not rewound and keep their orphaned rows"
+                )
+            recomputed_tables = self.recompute_latest_state(fork_block)
+            rewound_events = self.rewind_event_cursors(fork_block, deleted_tables)
+            if user_asset_pairs:
+                ChildBalancesSynchronizeTask.update_scaled_balances(user_asset_pairs)
+        finally:
+            clear_pending_rollback(fork_block)
+
+        logger.warning(
+            f"Rolled back blocks from {fork_block}: cleared {len(deleted_tables)} tables, "
+            f"recomputed {len(recomputed_tables)} latest-state tables, "
+            f"rewound {rewound_events} events, refreshed {len(user_asset_pairs)} balances"
+        )
+        return {
+            "fork_block": fork_block,
+            "tables": deleted_tables,
+            "uncleaned_tables": uncleaned_tables,
+            "latest_state_tables": recomputed_tables,
+            "events": rewound_events,
+            "balances": len(user_asset_pairs),
+        }
+
+    def get_event_tables(self) -> List[str]:
+        """Append-only event tables, the MergeTree tables sorted by log position."""
+        result = clickhouse_client.execute_query(
+            """
+            SELECT name
+            FROM system.tables
+            WHERE database = %(db)s
+              AND engine LIKE '%%MergeTree'
+              AND startsWith(sorting_key, 'blockNumber')
+            ORDER BY name
+            """,
+            parameters={"db": clickhouse_client.db_name},
+        )
+        return [row[0] for row in result.result_rows]
+
+    def delete_orphaned_rows(self, fork_block: int) -> List[str]:
+        deleted_tables = []
+        for table in self.get_event_tables():
+            try:
+                clickhouse_client.execute_query(
+                    f"DELETE FROM {clickhouse_client.db_name}.{table} "
+                    f"WHERE blockNumber >= %(fork_block)s",
+                    parameters={"fork_block": fork_block},
+                )
+                deleted_tables.append(table)
+            except Exception as e:
+                logger.error(f"Error rolling back {table} from block {fork_block}: {e}")
+        return deleted_tables
+
+    def get_materialized_views(self) -> Dict[str, List[str]]:
+        """Target table -> SELECT queries of the materialized views writing to it."""
+        result = clickhouse_client.execute_query(
+            """
+            SELECT create_table_query, as_select
+            FROM system.tables
+            WHERE database = %(db)s AND engine = 'MaterializedView'
+            """,
+            parameters={"db": clickhouse_client.db_name},
+        )
+        views = {}
+        for create_table_query, as_select in result.result_rows:
+            match = re.search(r"\bTO\s+[`\w]+\.`?(\w+)`?", create_table_query)
+            if match:
+                views.setdefault(match.group(1), []).append(as_select)
+        return views
+
+    def get_inserted_columns(self, table: str) -> List[str]:
+        """Columns of a table that its materialized views write, in table order."""
+        result = clickhouse_client.execute_query(
+            """
+            SELECT name FROM system.columns
+            WHERE database = %(db)s AND table = %(table)s AND default_kind = ''
+            ORDER BY position
+            """,
+            parameters={"db": clickhouse_client.db_name, "table": table},
+        )
+        return [row[0] for row in result.result_rows]
+
+    def recompute_latest_state(self, fork_block: int) -> List[str]:
+        """
+        Drop the latest-state rows derived from orphaned blocks and replay the
+        materialized views of each table over the cleaned event tables. The
+        tables keep the highest version per key, so replaying restores the last
+        canonical row of every key an orphaned block had overwritten.
+        """
+        views = self.get_materialized_views()
+        db_name = clickhouse_client.db_name
+        recomputed_tables = []
+        for table, block_column in self.LATEST_STATE_TABLES.items():
+            if table not in views:
+                continue
+            try:
+                columns = ", ".join(
+                    f"`{column}`" for column in self.get_inserted_columns(table)
+                )
+                clickhouse_client.execute_query(
+                    f"DELETE FROM {db_name}.{table} "
+                    f"WHERE {block_column} >= %(fork_block)s",
+                    parameters={"fork_block": fork_block},
+                )
+                for as_select in views[table]:
+                    clickhouse_client.execute_query(
+                        f"INSERT INTO {db_name}.{table} ({columns}) "
+                        f"SELECT {columns} FROM ({as_select})"
+                    )
+                recomputed_tables.append(table)
+            except Exception as e:
+                logger.error(f"Error recomputing {table} from block {fork_block}: {e}")
+        return recomputed_tables
+
+    def get_uncleaned_event_tables(
+        self, fork_block: int, cleaned_tables: List[str]
+    ) -> List[str]:
+        """Tables of events synced past the fork whose orphaned rows were kept."""
+        tables = set()
+        for model in self.EVENT_MODELS:
+            tables.update(
+                model.objects.filter(last_synced_block__gte=fork_block)
+                .exclude(name__in=cleaned_tables)
+                .values_list("name", flat=True)
+            )
+        return sorted(tables)
+
+    def rewind_event_cursors(self, fork_block: int, cleaned_tables: List[str]) -> int:
+        """Rewind the events whose tables were cleaned to the block before the fork."""
+        rewound = 0
+        for model in self.EVENT_MODELS:
+            rewound += model.objects.filter(
+                last_synced_block__gte=fork_block, name__in=cleaned_tables
+            ).update(last_synced_block=fork_block - 1)
+        return rewound
+
+
+ReorgRollbackTask = app.register_task(ReorgRollbackTask())
+
+
 class ChildSynchronizeTask(EventSynchronizeMixin, Task):
     event_model = Event
     clickhouse_client = clickhouse_client
     rpc_adapter = rpc_adapter
     network_name = NETWORK_NAME
 
+    # Event tables feeding view_user_health_factor, with the column naming the
+    # user or asset whose health factors they change and the dictionaries they
+    # are read through
+    USER_HEALTH_FACTOR_EVENTS = {
+        "ReserveUsedAsCollateralEnabled": ("user", ["dict_collateral_status"]),
+        "ReserveUsedAsCollateralDisabled": ("user", ["dict_collateral_status"]),
+        "UserEModeSet": ("user", ["dict_emode_status"]),
+    }
+    ASSET_HEALTH_FACTOR_EVENTS = {
+        "CollateralConfigurationChanged": (
+            "asset",
+            ["dict_latest_asset_configuration"],
+        ),
+        "EModeAssetCategoryChanged": ("asset", ["dict_latest_asset_configuration"]),
+        "ReserveDataUpdated": (
+            "reserve",
+            [
+                "dict_collateral_liquidity_index",
+                "dict_debt_liquidity_index",
+                "dict_latest_asset_configuration",
+            ],
+        ),
+    }
+
+    def post_handle_hook(
+        self, network_events: List[Any], start_block: int, end_block: int
+    ):
+        """
+        Refresh the UserHealthFactor store for the users whose collateral or eMode
+        status changed in the window, and for the holders of every asset whose
+        configuration or liquidity index changed.
+        """
+        try:
+            event_names = {network_event.name for network_event in network_events}
+            users = self.get_changed_keys(
+                self.USER_HEALTH_FACTOR_EVENTS, event_names, start_block, end_block
+            )
+            assets = self.get_changed_keys(
+                self.ASSET_HEALTH_FACTOR_EVENTS, event_names, start_block, end_block
+            )
+            if "EModeCategoryAdded" in event_names:
+                assets.update(self.get_emode_category_assets(start_block, end_block))
+            if not users and not assets:
+                return
+
+            dictionaries = {
+                dictionary
+                for events in (
+                    self.USER_HEALTH_FACTOR_EVENTS,
+                    self.ASSET_HEALTH_FACTOR_EVENTS,
+                )
+                for name, (_, event_dictionaries) in events.items()
+                if name in event_names
+                for dictionary in event_dictionaries
+            }
+            if assets:
+                dictionaries.add("dict_latest_asset_configuration")
+            # The asset configuration reads the liquidity index dictionaries, so
+            # it is reloaded last
+            dictionaries = sorted(
+                dictionaries,
+                key=lambda name: (name == "dict_latest_asset_configuration", name),
+            )
+            UpdateUserHealthFactorsTask.reload_dictionaries(dictionaries)
+
+            UpdateUserHealthFactorsTask.refresh_users(sorted(users))
+            UpdateUserHealthFactorsTask.refresh_asset_holders(sorted(assets))
+        except Exception as e:
+            logger.error(f"Error in post_handle_hook: {e}", exc_info=True)
+
+    def get_changed_keys(
+        self,
+        events: Dict[str, tuple],
+        event_names: set,
+        start_block: int,
+        end_block: int,
+    ) -> set:
+        """Distinct users or assets named by the given events in a block range."""
+        selects = [
+            f"SELECT {column} AS key FROM aave_ethereum.{name} "
+            f"WHERE blockNumber BETWEEN {start_block} AND {end_block}"
+            for name, (column, _) in events.items()
+            if name in event_names
+        ]
+        if not selects:
+            return set()
+        result = self.clickhouse_client.execute_query(
+            f"SELECT DISTINCT key FROM ({' UNION ALL '.join(selects)})"
+        )
+        return {row[0] for row in result.result_rows}
+
+    def get_emode_category_assets(self, start_block: int, end_block: int) -> set:
+        """Assets of the eMode categories (re)configured in a block range."""
+        result = self.clickhouse_client.execute_query(
+            f"""
+            SELECT DISTINCT asset
+            FROM aave_ethereum.LatestEModeAssetCategoryChanged FINAL
+            WHERE newCategoryId IN (
+                SELECT categoryId FROM aave_ethereum.EModeCategoryAdded
+                WHERE blockNumber BETWEEN {start_block} AND {end_block}
+            )
+            """
+        )
+        return {row[0] for row in result.result_rows}
+
 
 ChildSynchronizeTask = app.register_task(ChildSynchronizeTask())
 
@@ -288,6 +595,64 @@ class UpdateNetworkBlockInfoTask(Task):
 UpdateNetworkBlockInfoTask = app.register_task(UpdateNetworkBlockInfoTask())
 
 
+class ScheduledMergeTask(Task):
+    """Run coalesced OPTIMIZE ... FINAL requests off the ingestion path.
+
+    Called with `table_name` when the debounce interval of a merge request
+    elapses. Called without arguments (from celery beat) it sweeps every
+    deduplicating table and merges those with an overdue request or with at
+    least CLICKHOUSE_MERGE_PARTS_THRESHOLD active parts.
+    """
+
+    def run(self, table_name: str = None):
+        active_parts = clickhouse_client.get_active_parts()
+
+        if table_name:
+            self.merge_table(table_name, active_parts.get(table_name, 0), "debounce")
+            return
+
+        now = time.time()
+        for target in sorted(set(clickhouse_client.OPTIMIZE_TARGETS.values())):
+            parts = active_parts.get(target, 0)
+            requested_at = merge_scheduler.get_pending_request(target)
+            if parts >= merge_scheduler.MERGE_PARTS_THRESHOLD:
+                self.merge_table(target, parts, "parts_threshold")
+            elif (
+                requested_at
+                and now - requested_at >= merge_scheduler.MERGE_INTERVAL_SECONDS
+            ):
+                self.merge_table(target, parts, "overdue")
+
+    def merge_table(self, table_name: str, parts: int, reason: str):
+        if not merge_scheduler.acquire_merge_lock(table_name):
+            # A merge of this table is in flight, retry once it has had time to finish
+            logger.info(f"Merge of {table_name} already running, rescheduling")
+            self.apply_async(
+                kwargs={"table_name": table_name},
+                countdown=merge_scheduler.MERGE_INTERVAL_SECONDS,
+            )
+            return
+
+        try:
+            requested_at, requests = merge_scheduler.pop_pending_requests(table_name)
+            started_at = time.time()
+            clickhouse_client.optimize_table_now(table_name)
+            merge_scheduler.record_merge(
+                table_name=table_name,
+                requested_at=requested_at,
+                requests=requests,
+                parts=parts,
+                started_at=started_at,
+                finished_at=time.time(),
+                reason=reason,
+            )
+        finally:
+            merge_scheduler.release_merge_lock(table_name)
+
+
+ScheduledMergeTask = app.register_task(ScheduledMergeTask())
+
+
 class CalculateLiquidationHealthFactorMetricsTask(Task):
     """
     Task to calculate and store health factor metrics for liquidation events.
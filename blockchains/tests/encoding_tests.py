@@ -0,0 +1,117 @@
+import json
+import os
+import random
+
+from eth_abi import encode
+from hexbytes import HexBytes
+from web3 import Web3
+
+from blockchains.models import Event
+from utils.encoding import get_signature, get_topic_0
+from utils.tasks import EventSynchronizeMixin
+
+AAVE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "aave")
+ABI_PATHS = [
+    os.path.join(AAVE_DIR, "abi.json"),
+    os.path.join(AAVE_DIR, "price_abi.json"),
+]
+
+
+def load_event_abis():
+    event_abis = {}
+    for path in ABI_PATHS:
+        with open(path) as abi_file:
+            for abi in json.load(abi_file):
+                if abi.get("type") == "event":
+                    event_abis[get_topic_0(abi)] = abi
+    return event_abis
+
+
+def random_value(rng: random.Random, abi_type: str):
+    if abi_type.endswith("[]"):
+        return [random_value(rng, abi_type[:-2]) for _ in range(rng.randint(0, 4))]
+    if abi_type == "address":
+        return Web3.to_checksum_address(rng.randbytes(20))
+    if abi_type == "bool":
+        return rng.random() < 0.5
+    if abi_type == "string":
+        return "".join(rng.choice("abcdef ") for _ in range(rng.randint(0, 40)))
+    if abi_type == "bytes":
+        return rng.randbytes(rng.randint(0, 70))
+    if abi_type.startswith("bytes"):
+        return rng.randbytes(int(abi_type[5:]))
+    bits = int(abi_type.lstrip("uint") or 256)
+    if abi_type.startswith("int"):
+        return rng.randint(-(2 ** (bits - 1)), 2 ** (bits - 1) - 1)
+    # Mostly small amounts, as on chain, with the odd full-width value
+    return rng.randint(
+        0, 2**bits - 1 if rng.random() < 0.2 else min(2**bits - 1, 10**24)
+    )
+
+
+def make_raw_log(rng: random.Random, topic_0: str, abi: dict, block_number: int):
+    indexed = [row for row in abi["inputs"] if row["indexed"]]
+    non_indexed = [row for row in abi["inputs"] if not row["indexed"]]
+    topics = [HexBytes(topic_0)] + [
+        HexBytes(encode([row["type"]], [random_value(rng, row["type"])]))
+        for row in indexed
+    ]
+    data = encode(
+        [row["type"] for row in non_indexed],
+        [random_value(rng, row["type"]) for row in non_indexed],
+    )
+    return {
+        "address": Web3.to_checksum_address(rng.randbytes(20)),
+        "topics": topics,
+        "data": HexBytes(data),
+        "blockNumber": block_number,
+        "transactionHash": HexBytes(rng.randbytes(32)),
+        "transactionIndex": rng.randint(0, 300),
+        "blockHash": HexBytes(rng.randbytes(32)),
+        "logIndex": rng.randint(0, 1_000),
+        "removed": False,
+    }
+
+
+class TestEventRowDecoder:
+    def setup_method(self):
+        self.event_abis = load_event_abis()
+        self.sync = EventSynchronizeMixin()
+
+        rng = random.Random(7)
+        self.logs = [
+            make_raw_log(rng, topic_0, abi, 20_000_000 + rng.randint(0, 5_000))
+            for topic_0, abi in self.event_abis.items()
+            for _ in range(25)
+        ]
+        rng.shuffle(self.logs)
+
+    def test_signatures_resolve_every_abi(self):
+        for topic_0, abi in self.event_abis.items():
+            assert get_topic_0(abi) == topic_0
+            assert get_signature(abi).startswith(f"{abi['name']}(")
+
+    def test_row_decoder_matches_web3(self):
+        events = {
+            topic_0: Event(name=abi["name"], topic_0=topic_0, abi=abi)
+            for topic_0, abi in self.event_abis.items()
+        }
+        event_dicts = self.sync.process_raw_event_dicts(self.logs, self.event_abis)
+        expected = {
+            topic_0: [
+                tuple(row)
+                for row in self.sync.build_event_rows(events[topic_0], event_logs)
+            ]
+            for topic_0, event_logs in event_dicts.items()
+        }
+
+        actual = self.sync.process_raw_event_rows(self.logs, self.event_abis)
+
+        assert set(actual) == set(self.event_abis)
+        assert actual == expected
+
+    def test_unknown_topics_are_skipped(self):
+        abis = dict(list(self.event_abis.items())[:1])
+        rows = self.sync.process_raw_event_rows(self.logs, abis)
+        assert set(rows) == set(abis)
+        assert len(rows[next(iter(abis))]) == 25
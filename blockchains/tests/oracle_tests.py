@@ -0,0 +1,105 @@
+import random
+
+import pytest
+from eth_abi import encode
+
+from utils.oracle import (
+    FORWARD_DATA_TYPES,
+    FORWARD_METHOD_ID,
+    REPORT_DATA_TYPES,
+    TRANSMIT_DATA_TYPES,
+    TRASMIT_METHOD_ID,
+    InvalidMethodSignature,
+    decode_forwarder_calldata,
+    parse_forwarder_call,
+    parse_forwarder_call_abi,
+)
+
+
+def make_forwarder_call(rng: random.Random, observations=None) -> str:
+    """Synthetic forward(address, transmit(...)) call, 5% with unsorted observations."""
+    if observations is None:
+        observations = sorted(
+            rng.randint(-(2**191), 2**191 - 1)
+            if rng.random() < 0.1
+            else rng.randint(0, 10**12)
+            for _ in range(rng.randint(1, 31))
+        )
+        if rng.random() < 0.05:
+            rng.shuffle(observations)
+    report = encode(
+        REPORT_DATA_TYPES,
+        [rng.randbytes(32), rng.randbytes(32), observations],
+    )
+    signatures = rng.randint(1, 10)
+    transmit = bytes.fromhex(TRASMIT_METHOD_ID) + encode(
+        TRANSMIT_DATA_TYPES,
+        [
+            [rng.randbytes(32) for _ in range(3)],
+            report,
+            [rng.randbytes(32) for _ in range(signatures)],
+            [rng.randbytes(32) for _ in range(signatures)],
+            rng.randbytes(32),
+        ],
+    )
+    oracle = "0x" + rng.randbytes(20).hex()
+    return FORWARD_METHOD_ID + encode(FORWARD_DATA_TYPES, [oracle, transmit]).hex()
+
+
+def outcome(parse, input_data):
+    try:
+        return parse(input_data)
+    except Exception as e:
+        return type(e), str(e)
+
+
+class TestForwarderDecoder:
+    def test_canonical_calls_match_eth_abi(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            input_data = make_forwarder_call(rng)
+            assert outcome(parse_forwarder_call, input_data) == outcome(
+                parse_forwarder_call_abi, input_data
+            )
+
+    @pytest.mark.parametrize("mutation", ["flip", "truncate", "extend"])
+    def test_mutated_calls_match_eth_abi(self, mutation):
+        # Flipped bytes, truncated and extended calldata must give identical
+        # results and identical errors
+        rng = random.Random(mutation)
+        for _ in range(1_000):
+            input_data = make_forwarder_call(rng)
+            variant = bytearray.fromhex(input_data[len(FORWARD_METHOD_ID) :])
+            if mutation == "flip":
+                for _ in range(rng.randint(1, 3)):
+                    variant[rng.randrange(len(variant))] = rng.randrange(256)
+            elif mutation == "truncate":
+                variant = variant[: rng.randrange(len(variant))]
+            else:
+                variant += rng.randbytes(rng.randint(1, 64))
+            variant = FORWARD_METHOD_ID + variant.hex()
+            assert outcome(parse_forwarder_call, variant) == outcome(
+                parse_forwarder_call_abi, variant
+            )
+
+    def test_unsorted_observations_are_rejected(self):
+        input_data = make_forwarder_call(random.Random(1), observations=[3, 1, 2])
+        with pytest.raises(ValueError, match="observations not sorted"):
+            parse_forwarder_call(input_data)
+        with pytest.raises(ValueError, match="observations not sorted"):
+            parse_forwarder_call_abi(input_data)
+
+    def test_other_method_is_rejected(self):
+        with pytest.raises(InvalidMethodSignature):
+            parse_forwarder_call("0xa9059cbb" + "00" * 64)
+
+    def test_canonical_calls_use_fixed_offsets(self):
+        input_data = make_forwarder_call(random.Random(2), observations=[1, 2, 3])
+        calldata = bytes.fromhex(input_data[len(FORWARD_METHOD_ID) :])
+        parsed = decode_forwarder_calldata(calldata)
+        assert parsed == parse_forwarder_call_abi(input_data)
+        assert parsed["median_price"] == 2
+
+    def test_non_forward_calldata_is_not_decoded(self):
+        assert decode_forwarder_calldata(b"") is None
+        assert decode_forwarder_calldata(bytes(31)) is None
@@ -0,0 +1,115 @@
+import json
+import os
+import re
+from types import SimpleNamespace
+
+import numpy as np
+
+from payments import tasks
+from payments.positions import PositionMatrix
+
+# Recorded with `benchmark_liquidations --iterations 1 --assets <WETH> --record
+# --fixture ...` against ClickHouse loaded with the balances DDL and a seeded
+# snapshot: ordinary positions, 1e24-scale positions whose predicted health factor
+# lands just below, exactly on and just above 1.0, and an unconfigured asset
+FIXTURE_PATH = os.path.join(
+    os.path.dirname(__file__), "fixtures", "position_matrix.json"
+)
+FROM_TABLE_PATTERN = re.compile(r"FROM aave_ethereum\.(\w+)")
+
+
+def fixture_key(query: str) -> str:
+    """Recorded result a position matrix query is answered from."""
+    match = FROM_TABLE_PATTERN.search(query)
+    return match.group(1) if match else "predicted_prices"
+
+
+class FixtureClickHouseClient:
+    """Answers position matrix queries from the results recorded in a fixture."""
+
+    def __init__(self, queries):
+        self.queries = queries
+
+    def execute_query(self, query, parameters=None):
+        rows = [tuple(row) for row in self.queries[fixture_key(query)]]
+        return SimpleNamespace(
+            result_rows=rows, result_columns=[list(column) for column in zip(*rows)]
+        )
+
+
+class TestPositionMatrix:
+    def setup_method(self):
+        with open(FIXTURE_PATH) as fixture_file:
+            self.fixture = json.load(fixture_file)
+        self.matrix = PositionMatrix(
+            clickhouse_client=FixtureClickHouseClient(self.fixture["queries"])
+        )
+        self.matrix.load()
+
+    def test_candidates_match_sql_path(self, monkeypatch):
+        monkeypatch.setattr(tasks, "position_matrix", self.matrix)
+        updated_assets = self.fixture["updated_assets"]
+
+        candidates = tasks.EstimateFutureLiquidationCandidatesTask._get_at_risk_users_with_position_matrix(
+            updated_assets
+        )
+
+        expected = self.fixture["expected"]
+        assert len(candidates) == len(expected)
+        profits = [row[6] for row in candidates]
+        assert profits == sorted(profits, reverse=True)
+        for row, expected_row in zip(
+            sorted(candidates, key=lambda row: row[:3] + row[5:7]),
+            sorted(expected, key=lambda row: row[:3] + row[5:7]),
+        ):
+            assert row[:3] == expected_row[:3]
+            assert row[3:5] == expected_row[3:5]
+            assert row[5:16] == expected_row[5:16]
+            assert row[16] == updated_assets
+
+    def test_at_risk_users_match_sql_path(self):
+        predicted_prices = self.matrix.get_predicted_prices(
+            self.fixture["updated_assets"]
+        )
+        at_risk_users = self.matrix.at_risk_users(predicted_prices)
+
+        users = {user for user, _, _ in at_risk_users}
+        assert users == {row[0] for row in self.fixture["expected"]}
+        for user, current_hf, predicted_hf in at_risk_users:
+            assert current_hf > 1.0
+            assert predicted_hf <= 1.0
+
+    def test_no_at_risk_users_without_price_change(self):
+        assert self.matrix.at_risk_users({}) == []
+
+    def test_empty_store_falls_back_to_view(self):
+        queries = dict(self.fixture["queries"])
+        queries["view_user_health_factor"] = queries["UserHealthFactor"]
+        queries["UserHealthFactor"] = []
+        matrix = PositionMatrix(clickhouse_client=FixtureClickHouseClient(queries))
+        matrix.load()
+        predicted_prices = matrix.get_predicted_prices(self.fixture["updated_assets"])
+
+        assert matrix.at_risk_users(predicted_prices) == self.matrix.at_risk_users(
+            predicted_prices
+        )
+
+
+class TestPositionMatrixSums:
+    def test_sums_beyond_int64_do_not_wrap(self):
+        matrix = PositionMatrix(clickhouse_client=None)
+        # One user with two collateral positions of 6e18 effective value each
+        matrix._state = {
+            "cols": np.array([0, 1]),
+            "user_starts": np.array([0]),
+            "collateral_factor": np.array([6e22, 6e22]),
+            "collateral_divisor": np.array([1e4, 1e4]),
+            "accrued_debt": np.array([1e18, 1e18]),
+            "debt_divisor": np.array([1.0, 1.0]),
+        }
+
+        result = matrix.health_factors(np.array([1.0, 1.0]))
+
+        assert int(result["effective_collateral"][0]) == 12 * 10**18
+        assert int(result["effective_debt"][0]) == 2 * 10**18
+        assert float(result["health_factor"][0]) == 6.0
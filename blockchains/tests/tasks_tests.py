@@ -0,0 +1,158 @@
+from types import SimpleNamespace
+
+from blockchains.management.commands.replay_log_archive import Command as ReplayCommand
+from utils import log_archive
+from utils.tasks import EventSynchronizeMixin
+from utils.window_sizer import WindowController
+
+
+class RecordingSyncTask(EventSynchronizeMixin):
+    network_name = "ethereum"
+    persist_window_state = False
+    archive_raw_logs = False
+
+    def __init__(self, pipeline_depth: int, max_window: int = 100):
+        self.pipeline_depth = pipeline_depth
+        self.rpc_adapter = SimpleNamespace(max_blockrange_size_for_events=max_window)
+        self.fetched = []
+        self.committed = []
+
+    def fetch_event_window(self, start_block, end_block, **kwargs):
+        self.fetched.append((start_block, end_block))
+        return {}
+
+    def commit_event_window(self, start_block, end_block, **kwargs):
+        self.committed.append((start_block, end_block))
+
+
+class TestEventWindowWalk:
+    def walk(self, pipeline_depth, from_block, to_block, max_window=100):
+        task = RecordingSyncTask(pipeline_depth, max_window=max_window)
+        task.sync_event_windows(
+            network_events=[],
+            topics=[],
+            contract_addresses=[],
+            event_abis={},
+            global_from_block=from_block,
+            global_to_block=to_block,
+        )
+        return task
+
+    def test_sequential_one_block_shard_is_synced(self):
+        task = self.walk(pipeline_depth=0, from_block=1_000, to_block=1_000)
+        assert task.fetched == [(1_000, 1_000)]
+        assert task.committed == [(1_000, 1_000)]
+
+    def test_pipelined_one_block_shard_is_synced(self):
+        task = self.walk(pipeline_depth=2, from_block=1_000, to_block=1_000)
+        assert task.committed == [(1_000, 1_000)]
+
+    def test_sequential_walk_covers_range_up_to_last_block(self):
+        task = self.walk(pipeline_depth=0, from_block=0, to_block=25, max_window=10)
+        assert task.committed[0][0] == 0
+        assert task.committed[-1][1] == 25
+        for (_, end_block), (next_start, _) in zip(task.committed, task.committed[1:]):
+            assert next_start == end_block + 1
+
+
+class TestWindowController:
+    def test_truncated_window_keeps_size(self):
+        controller = WindowController(10_000, target_logs=1_000)
+        controller.record_success(2_000, logs=0, seconds=0.1)
+        assert controller.window == 4_000
+
+        controller.record_success(5, logs=500, seconds=0.1, truncated=True)
+        assert controller.window == 4_000
+
+    def test_full_window_rescales(self):
+        controller = WindowController(10_000, target_logs=1_000)
+        controller.record_success(2_000, logs=4_000, seconds=0.1)
+        assert controller.window == 1_000
+
+
+class TestUnsyncedEventLogs:
+    def test_logs_at_or_below_event_cursor_are_dropped(self):
+        task = RecordingSyncTask(pipeline_depth=0)
+        task.decode_event_rows = False
+        network_event = SimpleNamespace(last_synced_block=105)
+        event_logs = [SimpleNamespace(blockNumber=block) for block in (100, 105, 106)]
+
+        new_logs = task.get_unsynced_event_logs(network_event, event_logs)
+        assert [log.blockNumber for log in new_logs] == [106]
+
+
+class RecordingClickhouseClient:
+    def __init__(self):
+        self.inserted = []
+
+    def insert_event_logs(self, event, rows):
+        self.inserted.extend(rows)
+
+    def optimize_table(self, table_name):
+        pass
+
+
+class RecordingEvents(list):
+    """Event queryset stand-in recording the updates made through it."""
+
+    def __init__(self, events):
+        super().__init__(events)
+        self.updates = []
+
+    def filter(self, **kwargs):
+        return self
+
+    def update(self, **kwargs):
+        self.updates.append(kwargs)
+        return len(self)
+
+
+class ReplayTask(EventSynchronizeMixin):
+    network_name = "ethereum"
+    decode_event_rows = True
+    deduplicate_event_rows = False
+
+    def __init__(self, events):
+        self.clickhouse_client = RecordingClickhouseClient()
+        self.event_model = SimpleNamespace(objects=RecordingEvents(events))
+
+
+class TestLogArchiveReplay:
+    def test_segment_below_event_cursor_is_replayed(self, monkeypatch):
+        event = SimpleNamespace(
+            id=1,
+            name="Supply",
+            topic_0="0xtopic",
+            abi={},
+            last_synced_block=200,
+            logs_count=0,
+        )
+        task = ReplayTask([event])
+        # Rows end with address, blockNumber, transactionHash, transactionIndex,
+        # logIndex and blockTimestamp
+        rows = [
+            ("0xuser", 10, "0xpool", block, f"0xtx{block}", 0, 0, 0)
+            for block in (150, 200)
+        ]
+        monkeypatch.setattr(
+            log_archive, "plan_replay", lambda segments, keys, from_block: [None]
+        )
+        monkeypatch.setattr(
+            ReplayCommand,
+            "_decode_segments",
+            lambda self, task, plan, event_abis, options: iter(
+                [({"0xtopic": rows}, len(rows))]
+            ),
+        )
+
+        replayed = ReplayCommand()._replay(
+            task,
+            [event],
+            {("0xtopic", "0xpool")},
+            [],
+            {"from_block": 100, "workers": 1, "batch_logs": 100_000},
+        )
+
+        assert replayed == 2
+        assert task.clickhouse_client.inserted == rows
+        assert task.filter_synced_event_logs
@@ -0,0 +1,262 @@
+"""
+First-seen deduplication of mempool transactions across providers.
+
+The mempool fan-in listener consumes several providers at once, so every oracle
+update arrives up to once per provider. FirstSeenTracker keeps the hashes seen
+in the last MEMPOOL_DEDUP_TTL_SECONDS in an insertion ordered dict (at most
+MEMPOOL_DEDUP_MAX_ENTRIES) and only the first sighting of a hash is forwarded.
+
+Every later sighting is a lead time sample: how far the provider lagged behind
+the first one, and how far the first provider led. Per-provider counts and lead
+times are logged and cached under mempool_first_seen_stats every
+MEMPOOL_FIRST_SEEN_STATS_INTERVAL seconds.
+
+TransactionTimingTracking rows of forwarded oracle updates are buffered and
+inserted in one statement every MEMPOOL_TIMING_FLUSH_SECONDS, instead of one
+RecordTransactionTimingTask per sighting. The single-source
+listen_pending_transactions listener uses a tracker for these batched timings
+only.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from asgiref.sync import sync_to_async
+from decouple import config
+from django.core.cache import cache
+
+from oracles.tasks import UpdateConfirmedTransactionTimestampsTask
+from utils.clickhouse.client import clickhouse_client
+
+logger = logging.getLogger(__name__)
+
+MEMPOOL_DEDUP_TTL_SECONDS = config("MEMPOOL_DEDUP_TTL_SECONDS", cast=float, default=600)
+MEMPOOL_DEDUP_MAX_ENTRIES = config(
+    "MEMPOOL_DEDUP_MAX_ENTRIES", cast=int, default=100_000
+)
+MEMPOOL_FIRST_SEEN_STATS_INTERVAL = config(
+    "MEMPOOL_FIRST_SEEN_STATS_INTERVAL", cast=int, default=60
+)
+MEMPOOL_TIMING_FLUSH_SECONDS = config(
+    "MEMPOOL_TIMING_FLUSH_SECONDS", cast=float, default=5.0
+)
+
+# Sightings of these providers are MEV-Share timestamps, every other provider
+# is a public mempool
+MEV_SHARE_PROVIDERS = frozenset({"flashbots"})
+
+STATS_KEY = "mempool_first_seen_stats"
+
+
+class Sighting:
+    __slots__ = (
+        "provider",
+        "seen_at",
+        "unconfirmed_ts",
+        "mev_share_ts",
+        "asset_source",
+    )
+
+    def __init__(self, provider: str, seen_at: float):
+        self.provider = provider
+        self.seen_at = seen_at
+        self.unconfirmed_ts = 0
+        self.mev_share_ts = 0
+        self.asset_source = None
+
+
+class FirstSeenTracker:
+    def __init__(
+        self,
+        ttl: float = MEMPOOL_DEDUP_TTL_SECONDS,
+        max_entries: int = MEMPOOL_DEDUP_MAX_ENTRIES,
+        stats_interval: int = MEMPOOL_FIRST_SEEN_STATS_INTERVAL,
+        flush_interval: float = MEMPOOL_TIMING_FLUSH_SECONDS,
+    ):
+        self.ttl = ttl
+        self.max_entries = max(max_entries, 1)
+        self.stats_interval = stats_interval
+        self.flush_interval = flush_interval
+
+        self.sightings: "OrderedDict[str, Sighting]" = OrderedDict()
+        self.pending_timings = set()
+        self.tasks = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.provider_stats = {}
+
+    def _stats(self, provider: str) -> Dict:
+        stats = self.provider_stats.get(provider)
+        if stats is None:
+            stats = self.provider_stats[provider] = {
+                "seen": 0,
+                "first": 0,
+                "lag_count": 0,
+                "lag_total": 0.0,
+                "lag_max": 0.0,
+                "lead_count": 0,
+                "lead_total": 0.0,
+                "lead_max": 0.0,
+            }
+        return stats
+
+    def _evict(self, now: float):
+        sightings = self.sightings
+        while sightings:
+            tx_hash, sighting = next(iter(sightings.items()))
+            if len(sightings) < self.max_entries and now - sighting.seen_at <= self.ttl:
+                break
+            sightings.popitem(last=False)
+            self.pending_timings.discard(tx_hash)
+
+    def observe(self, tx_hash: str, provider: str) -> bool:
+        """Record a sighting of a transaction, True if it is the first one."""
+        now = time.monotonic()
+        tx_hash = tx_hash.lower()
+        self._evict(now)
+
+        stats = self._stats(provider)
+        stats["seen"] += 1
+        sighting = self.sightings.get(tx_hash)
+        if sighting is None:
+            sighting = self.sightings[tx_hash] = Sighting(provider, now)
+            self._set_timestamp(tx_hash, sighting, provider)
+            stats["first"] += 1
+            return True
+
+        if sighting.provider != provider:
+            lag = now - sighting.seen_at
+            stats["lag_count"] += 1
+            stats["lag_total"] += lag
+            stats["lag_max"] = max(stats["lag_max"], lag)
+            leader = self._stats(sighting.provider)
+            leader["lead_count"] += 1
+            leader["lead_total"] += lag
+            leader["lead_max"] = max(leader["lead_max"], lag)
+        self._set_timestamp(tx_hash, sighting, provider)
+        return False
+
+    def _set_timestamp(self, tx_hash: str, sighting: Sighting, provider: str):
+        # Only the first public and the first MEV-Share sighting are timestamps
+        field = "mev_share_ts" if provider in MEV_SHARE_PROVIDERS else "unconfirmed_ts"
+        if getattr(sighting, field):
+            return
+        setattr(sighting, field, int(time.time()))
+        if sighting.asset_source is not None:
+            self.pending_timings.add(tx_hash)
+
+    def set_asset_source(self, tx_hash: str, asset_source: str):
+        """Mark a forwarded transaction as an oracle update, its timing is recorded."""
+        tx_hash = tx_hash.lower()
+        sighting = self.sightings.get(tx_hash)
+        if sighting is not None:
+            sighting.asset_source = asset_source
+            self.pending_timings.add(tx_hash)
+
+    def get_stats(self) -> Dict:
+        return {
+            provider: {
+                "seen": stats["seen"],
+                "first": stats["first"],
+                "avg_lag_ms": round(
+                    stats["lag_total"] / max(stats["lag_count"], 1) * 1000, 2
+                ),
+                "max_lag_ms": round(stats["lag_max"] * 1000, 2),
+                "avg_lead_ms": round(
+                    stats["lead_total"] / max(stats["lead_count"], 1) * 1000, 2
+                ),
+                "max_lead_ms": round(stats["lead_max"] * 1000, 2),
+            }
+            for provider, stats in self.provider_stats.items()
+        }
+
+    async def start(self):
+        if self.tasks:
+            return
+        self.tasks = [asyncio.create_task(self._flush_timings_loop())]
+        if self.stats_interval > 0:
+            self.tasks.append(asyncio.create_task(self._report_stats()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        await self.flush_timings()
+
+    async def _flush_timings_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_timings()
+
+    async def flush_timings(self):
+        if not self.pending_timings:
+            return
+        rows = [
+            (
+                tx_hash,
+                self.sightings[tx_hash].asset_source,
+                self.sightings[tx_hash].unconfirmed_ts,
+                self.sightings[tx_hash].mev_share_ts,
+            )
+            for tx_hash in self.pending_timings
+        ]
+        self.pending_timings = set()
+        try:
+            await sync_to_async(insert_transaction_timings, thread_sensitive=False)(
+                rows
+            )
+        except Exception as e:
+            logger.error(f"Error recording {len(rows)} transaction timings: {e}")
+
+    async def _report_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            stats = self.get_stats()
+            self.reset_stats()
+            for provider, provider_stats in sorted(stats.items()):
+                logger.info(
+                    f"{provider} over {self.stats_interval}s: "
+                    f"{provider_stats['seen']} seen, {provider_stats['first']} first; "
+                    f"lag {provider_stats['avg_lag_ms']}ms avg / "
+                    f"{provider_stats['max_lag_ms']}ms max, "
+                    f"lead {provider_stats['avg_lead_ms']}ms avg / "
+                    f"{provider_stats['max_lead_ms']}ms max"
+                )
+            try:
+                cache.set(
+                    STATS_KEY,
+                    {"providers": stats, "recorded_at": time.time()},
+                    timeout=None,
+                )
+            except Exception as e:
+                logger.error(f"Error caching first-seen stats: {e}")
+
+
+def insert_transaction_timings(rows):
+    """Insert (tx_hash, asset_source, unconfirmed_ts, mev_share_ts) timing rows."""
+    clickhouse_client.execute_query(
+        """
+        INSERT INTO aave_ethereum.TransactionTimingTracking
+        SELECT
+            tupleElement(row, 1) AS txn_id,
+            anyState(tupleElement(row, 2)) AS asset_source,
+            maxState(toUInt64(tupleElement(row, 3))) AS unconfirmed_tx_ts,
+            maxState(toUInt64(0)) AS confirmed_tx_ts,
+            maxState(toUInt64(tupleElement(row, 4))) AS mev_share_ts
+        FROM (SELECT arrayJoin(%(rows)s) AS row)
+        GROUP BY txn_id
+        """,
+        parameters={"rows": rows},
+    )
+    logger.info(f"Recorded timings of {len(rows)} transactions")
+    UpdateConfirmedTransactionTimestampsTask.delay()
+
+
+def get_first_seen_stats() -> Optional[Dict]:
+    """Per-provider stats of the last reporting interval of the fan-in listener."""
+    return cache.get(STATS_KEY)
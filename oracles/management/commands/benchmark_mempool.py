@@ -0,0 +1,211 @@
+"""
+Management command to benchmark the mempool listener hot path.
+
+USAGE EXAMPLES:
+
+    # Record 100000 raw pending transaction frames from NETWORK_WSS, then compare
+    # frames per second: orjson.loads of every frame vs the raw-frame forwarder
+    # prefilter
+    python manage.py benchmark_mempool --suite mempool_prefilter \\
+        --fixture /tmp/mempool.jsonl --record --iterations 100000
+
+    # Forwarder calls per second, eth_abi decoding vs the fixed-offset decoder, on
+    # synthetic calls plus the forwarder calls of a recorded mempool capture, if given
+    python manage.py benchmark_mempool --suite forwarder_decoder --iterations 20000 \\
+        --fixture /tmp/mempool.jsonl
+"""
+
+import asyncio
+import json
+import random
+import time
+
+import orjson
+import websockets
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from eth_abi import encode
+
+from blockchains.management.commands.benchmark_base import BenchmarkCommand
+from utils.constants import NETWORK_WSS
+from utils.oracle import (
+    FORWARD_DATA_TYPES,
+    FORWARD_METHOD_ID,
+    REPORT_DATA_TYPES,
+    TRANSMIT_DATA_TYPES,
+    TRASMIT_METHOD_ID,
+    is_forwarder_frame,
+    parse_forwarder_call,
+    parse_forwarder_call_abi,
+)
+
+
+class Command(BenchmarkCommand, BaseCommand):
+    help = "Benchmark mempool frame prefiltering and forwarder call decoding"
+
+    SUITES = ["mempool_prefilter", "forwarder_decoder"]
+
+    def add_suite_arguments(self, parser):
+        parser.add_argument(
+            "--fixture",
+            type=str,
+            help="Path of the recorded mempool capture (JSON lines)",
+        )
+        parser.add_argument(
+            "--record",
+            action="store_true",
+            help="Record --iterations frames from NETWORK_WSS before the suite",
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=500,
+            help="Frames to record or synthetic forwarder calls (default: 500)",
+        )
+
+    def _run_mempool_prefilter(self, options):
+        """Frames per second parsing every mempool frame vs prefiltering raw frames."""
+        capture_path = options["fixture"]
+        if not capture_path:
+            raise CommandError("--fixture is required for the mempool_prefilter suite")
+        if options["record"]:
+            asyncio.run(
+                self._record_mempool_capture(capture_path, options["iterations"])
+            )
+
+        with open(capture_path) as f:
+            frames = [json.loads(line) for line in f if line.strip()]
+        transmitters = frozenset(
+            t.lower() for t in cache.get("transmitters_for_websockets") or []
+        )
+        self.stdout.write(
+            f"Capture: {len(frames)} frames, {len(transmitters)} known transmitters"
+        )
+        if not transmitters:
+            self.stdout.write(
+                self.style.WARNING("No transmitters cached, every frame is rejected")
+            )
+
+        def is_relevant(msg):
+            tx_data = msg.get("params", {}).get("result")
+            if not isinstance(tx_data, dict):
+                return False
+            to_address = (tx_data.get("to") or "").lower()
+            return (tx_data.get("input") or "").startswith(
+                FORWARD_METHOD_ID
+            ) and to_address in transmitters
+
+        start = time.perf_counter()
+        accepted = sum(1 for frame in frames if is_relevant(orjson.loads(frame)))
+        parse_rate = self._report(
+            f"orjson.loads every frame ({accepted} accepted)",
+            len(frames),
+            time.perf_counter() - start,
+            "frames",
+        )
+
+        start = time.perf_counter()
+        accepted = sum(
+            1
+            for frame in frames
+            if is_forwarder_frame(frame, transmitters)
+            and is_relevant(orjson.loads(frame))
+        )
+        prefilter_rate = self._report(
+            f"raw-frame prefilter ({accepted} accepted)",
+            len(frames),
+            time.perf_counter() - start,
+            "frames",
+        )
+
+        self._report_speedup(prefilter_rate, parse_rate)
+
+    async def _record_mempool_capture(self, capture_path: str, frames: int):
+        subscribe_message = {
+            "id": "1",
+            "jsonrpc": "2.0",
+            "method": "eth_subscribe",
+            "params": ["newPendingTransactions", True],
+        }
+        recorded = 0
+        async with websockets.connect(
+            NETWORK_WSS, ping_interval=None, max_size=2**24, compression=None
+        ) as websocket:
+            await websocket.send(json.dumps(subscribe_message))
+            with open(capture_path, "w") as f:
+                while recorded < frames:
+                    frame = await websocket.recv()
+                    if isinstance(frame, bytes):
+                        frame = frame.decode()
+                    f.write(json.dumps(frame) + "\n")
+                    recorded += 1
+        self.stdout.write(f"Recorded {recorded} frames to {capture_path}")
+
+    def _run_forwarder_decoder(self, options):
+        """Forwarder calls per second, eth_abi decoding vs fixed-offset decoding."""
+        rng = random.Random(0)
+        inputs = [self._make_forwarder_call(rng) for _ in range(options["iterations"])]
+        if options["fixture"]:
+            with open(options["fixture"]) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    tx_data = orjson.loads(json.loads(line)).get("params", {})
+                    tx_data = tx_data.get("result")
+                    if isinstance(tx_data, dict) and (
+                        tx_data.get("input") or ""
+                    ).startswith(FORWARD_METHOD_ID):
+                        inputs.append(tx_data["input"])
+        self.stdout.write(f"Inputs: {len(inputs)} forwarder calls")
+
+        # Only calls both decoders accept are timed
+        valid = []
+        for input_data in inputs:
+            try:
+                parse_forwarder_call_abi(input_data)
+            except Exception:
+                continue
+            valid.append(input_data)
+
+        start = time.perf_counter()
+        for input_data in valid:
+            parse_forwarder_call_abi(input_data)
+        legacy_rate = self._report(
+            "eth_abi decode", len(valid), time.perf_counter() - start, "calls"
+        )
+
+        start = time.perf_counter()
+        for input_data in valid:
+            parse_forwarder_call(input_data)
+        optimised_rate = self._report(
+            "fixed-offset decoder", len(valid), time.perf_counter() - start, "calls"
+        )
+        self._report_speedup(optimised_rate, legacy_rate)
+
+    def _make_forwarder_call(self, rng: random.Random) -> str:
+        """Synthetic forward(address, transmit(...)) call, 5% with unsorted observations."""
+        observations = sorted(
+            rng.randint(-(2**191), 2**191 - 1)
+            if rng.random() < 0.1
+            else rng.randint(0, 10**12)
+            for _ in range(rng.randint(1, 31))
+        )
+        if rng.random() < 0.05:
+            rng.shuffle(observations)
+        report = encode(
+            REPORT_DATA_TYPES,
+            [rng.randbytes(32), rng.randbytes(32), observations],
+        )
+        signatures = rng.randint(1, 10)
+        transmit = bytes.fromhex(TRASMIT_METHOD_ID) + encode(
+            TRANSMIT_DATA_TYPES,
+            [
+                [rng.randbytes(32) for _ in range(3)],
+                report,
+                [rng.randbytes(32) for _ in range(signatures)],
+                [rng.randbytes(32) for _ in range(signatures)],
+                rng.randbytes(32),
+            ],
+        )
+        oracle = "0x" + rng.randbytes(20).hex()
+        return FORWARD_METHOD_ID + encode(FORWARD_DATA_TYPES, [oracle, transmit]).hex()
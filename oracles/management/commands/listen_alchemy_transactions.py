@@ -7,6 +7,7 @@ from oracles.management.commands.listen_base import WebsocketCommand
 from utils.oracle import (
     InvalidMethodSignature,
     InvalidObservations,
+    is_forwarder_frame,
     parse_forwarder_call,
 )
 
@@ -37,6 +38,11 @@ class Command(WebsocketCommand, BaseCommand):
         logger.debug(f"Subscribe message created: {message}")
         return message
 
+    def prefilter_frame(self, frame) -> bool:
+        # The subscription already filters on transmitters, only forwarder calls
+        # are worth parsing
+        return is_forwarder_frame(frame)
+
     async def process(self, response):
         """
         Process incoming pending transaction data and parse forwarder calls.
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+from typing import Any, Callable, FrozenSet, Optional
 
 import orjson as json
 import websockets
@@ -8,16 +9,27 @@ from django.core.cache import cache
 
 from oracles.contracts.numerator import get_numerator
 from oracles.tasks import InsertTransactionNumeratorTask
-from utils.constants import NETWORK_NAME, NETWORK_WSS, PROTOCOL_NAME
+from payments.fast_path import MEMPOOL_FAST_PATH_ENABLED, fast_path_detector
+from utils.constants import (
+    NETWORK_NAME,
+    NETWORK_WSS,
+    PROTOCOL_NAME,
+    WEBSOCKET_ALLOW_LIST_REFRESH_SECONDS,
+)
+from utils.message_pool import PRIORITY_NORMAL, MessagePool
 
 logger = logging.getLogger(__name__)
 
 
 class WebsocketCommand:
+    # Allow-lists cached by UpdateTransmittersForPriceAggregatorsTask, held in memory
+    # so the message path never blocks the event loop on Redis
+    allowed_transmitters: FrozenSet[str] = frozenset()
+    authorized_senders: FrozenSet[str] = frozenset()
     help = "Subscribe to new blocks on the Ethereum blockchain using websockets"
 
     async def listen(self):
-        wss = NETWORK_WSS
+        wss = self.get_wss()
         logger.info(f"Connecting to {wss} for {PROTOCOL_NAME} on {NETWORK_NAME}")
 
         # Pre-compute subscribe message once
@@ -27,6 +39,23 @@ class WebsocketCommand:
         subscribe_message_json = json.dumps(subscribe_message)
         logger.info(subscribe_message_json)
 
+        await self.start_allow_list_refresh()
+        await self.start_fast_path()
+        await self.start_message_pool()
+
+        await self.consume_websocket(wss, subscribe_message_json)
+
+        await self.message_pool.stop()
+
+    async def consume_websocket(
+        self,
+        wss: str,
+        subscribe_message_json: str,
+        handle_frame: Optional[Callable[[Any], None]] = None,
+    ):
+        """Reconnecting recv loop of one subscription, frames go to handle_frame."""
+        handle_frame = handle_frame or self.handle_frame
+
         # Reconnection loop
         while True:
             try:
@@ -41,12 +70,7 @@ class WebsocketCommand:
 
                     # Process messages as fast as possible
                     while True:
-                        msg = json.loads(await websocket.recv())
-                        if "params" not in msg:
-                            continue
-
-                        # Process message without awaiting to reduce latency
-                        asyncio.create_task(self.process(msg))
+                        handle_frame(await websocket.recv())
 
             except websockets.exceptions.ConnectionClosed as e:
                 logger.warning(f"Connection closed with error: {e}. Reconnecting...")
@@ -55,6 +79,17 @@ class WebsocketCommand:
                 logger.error(f"Error in connection: {e}")
                 break
 
+    def handle_frame(self, frame):
+        if not self.prefilter_frame(frame):
+            return
+
+        msg = json.loads(frame)
+        if "params" not in msg:
+            return
+
+        # Hand off to the bounded worker pool, the recv loop never waits on processing
+        self.message_pool.submit(msg, self.get_message_priority(msg))
+
     def handle(self, *args, **options):
         # Use uvloop if available for better performance
         try:
@@ -66,19 +101,76 @@ class WebsocketCommand:
 
         asyncio.run(self.listen())
 
+    def load_allow_lists(self):
+        """Reload the allow-lists from the cache, a missing list keeps the previous one."""
+        cached = cache.get_many(
+            ["transmitters_for_websockets", "authorized_senders_for_websockets"]
+        )
+        transmitters = cached.get("transmitters_for_websockets")
+        authorized_senders = cached.get("authorized_senders_for_websockets")
+        if transmitters:
+            self.allowed_transmitters = frozenset(t.lower() for t in transmitters)
+        if authorized_senders:
+            self.authorized_senders = frozenset(s.lower() for s in authorized_senders)
+        if not transmitters or not authorized_senders:
+            logger.warning("No transmitters or authorized senders in cache")
+
+    async def refresh_allow_lists(self):
+        while True:
+            await asyncio.sleep(WEBSOCKET_ALLOW_LIST_REFRESH_SECONDS)
+            try:
+                await sync_to_async(self.load_allow_lists, thread_sensitive=False)()
+            except Exception as e:
+                logger.error(f"Error refreshing allow-lists: {e}")
+
+    async def start_allow_list_refresh(self):
+        await sync_to_async(self.load_allow_lists, thread_sensitive=False)()
+        self.allow_list_task = asyncio.create_task(self.refresh_allow_lists())
+
+    async def start_fast_path(self):
+        if MEMPOOL_FAST_PATH_ENABLED:
+            await sync_to_async(fast_path_detector.warm_up, thread_sensitive=False)()
+
+    async def start_message_pool(self):
+        self.message_pool = MessagePool(
+            self.process, name=self.__module__.rsplit(".", 1)[-1]
+        )
+        await self.message_pool.start()
+
+    def prefilter_frame(self, frame) -> bool:
+        """Check a raw frame before it is parsed, False skips it."""
+        return True
+
+    def get_message_priority(self, msg) -> int:
+        """Priority of a frame in the message pool, lower values are processed first."""
+        return PRIORITY_NORMAL
+
+    def get_wss(self) -> str:
+        return NETWORK_WSS
+
     def get_subscribe_message(self):
         raise NotImplementedError
 
     async def process(self, response):
         raise NotImplementedError
 
-    async def handle_oracle_update(self, parsed_data: dict, tx_data: dict):
+    async def get_asset_sources(self, oracle_address: str):
+        """(asset, asset_source) pairs fed by an oracle, read off the event loop."""
+        return await sync_to_async(cache.get, thread_sensitive=False)(
+            f"underlying_asset_source_{oracle_address}"
+        )
+
+    async def handle_oracle_update(
+        self, parsed_data: dict, tx_data: dict, asset_sources: Optional[list] = None
+    ):
         """
         Handle oracle price updates and make liquidation decisions.
 
         Args:
             parsed_data: Parsed oracle data from forwarder call
             tx_data: Original transaction data
+            asset_sources: (asset, asset_source) pairs of the oracle if the caller
+                already looked them up
         """
         median_price = parsed_data["median_price"]
         oracle_address = parsed_data["oracle_address"]
@@ -86,11 +178,11 @@ class WebsocketCommand:
         transmitter = tx_data["to"].lower() if tx_data["to"] else None
         # sender = tx_data["from"].lower() if tx_data["from"] else None
 
-        asset_sources = cache.get(f"underlying_asset_source_{oracle_address}")
-        allowed_transmitters = cache.get("transmitters_for_websockets")
+        if asset_sources is None:
+            asset_sources = await self.get_asset_sources(oracle_address)
         transaction_numerators = []
 
-        if asset_sources and transmitter in allowed_transmitters:
+        if asset_sources and transmitter in self.allowed_transmitters:
             for asset, asset_source in asset_sources:
                 logger.info(
                     f"Processing oracle update for {asset} with median price: {median_price}"
@@ -102,10 +194,16 @@ class WebsocketCommand:
                         transaction=parsed_data,
                     )
                 )
-            InsertTransactionNumeratorTask.delay(
-                transaction_numerators=transaction_numerators,
-                hash=tx_data["hash"],
-            )
+            if MEMPOOL_FAST_PATH_ENABLED:
+                # Detect in this process, the audit rows are written afterwards
+                await sync_to_async(fast_path_detector.detect, thread_sensitive=False)(
+                    transaction_numerators
+                )
+            else:
+                InsertTransactionNumeratorTask.delay(
+                    parsed_numerator_logs=transaction_numerators,
+                    hash=tx_data["hash"],
+                )
             logger.info(
                 f"Inserted transaction numerators for {asset} with median price: {median_price}"
             )
@@ -1,13 +1,28 @@
+import asyncio
 import logging
 
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
 from django.core.management.base import BaseCommand
 
-from balances.tasks import ParentBalancesSynchronizeTask
-from blockchains.tasks import ParentSynchronizeTask, UpdateNetworkBlockInfoTask
+from balances.tasks import ChildBalancesSynchronizeTask, ParentBalancesSynchronizeTask
+from blockchains.tasks import (
+    ChildSynchronizeTask,
+    ParentSynchronizeTask,
+    ReorgRollbackTask,
+    UpdateNetworkBlockInfoTask,
+)
 from oracles.management.commands.listen_base import WebsocketCommand
-from oracles.tasks import PriceEventDynamicSynchronizeTask
-from utils.constants import NETWORK_NAME
+from oracles.tasks import PriceEventDynamicSynchronizeTask, PriceEventSynchronizeTask
+from utils.constants import NETWORK_NAME, TIP_INGESTION_ENABLED
+from utils.message_pool import PRIORITY_HIGH
+from utils.reorg import (
+    REORG_PROTECTION_ENABLED,
+    BlockHashRingBuffer,
+    get_pending_rollback,
+    mark_rollback_pending,
+)
+from utils.rpc import rpc_adapter
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +35,63 @@ logging.basicConfig(
 class Command(WebsocketCommand, BaseCommand):
     help = "Subscribe to new blocks on the Ethereum blockchain using websockets"
 
+    # Child tasks whose events are ingested straight from block receipts in tip mode
+    TIP_SYNC_TASKS = [
+        ChildSynchronizeTask,
+        PriceEventSynchronizeTask,
+        ChildBalancesSynchronizeTask,
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tip_lock = asyncio.Lock()
+        self.block_hashes = None
+
+    def check_reorg(self, block_number: int, block_hash: str, parent_hash: str) -> bool:
+        """
+        Record the head in the block hash ring buffer and queue a rollback of the
+        orphaned blocks if it reveals a reorganisation. Returns True if a rollback
+        was queued, tip ingestion is then held until the rollback has finished.
+        """
+        if self.block_hashes is None:
+            self.block_hashes = BlockHashRingBuffer()
+
+        fork_block = self.block_hashes.push(
+            block_number,
+            block_hash,
+            parent_hash,
+            lambda number: rpc_adapter.client.to_hex(
+                rpc_adapter.client.eth.get_block(number)["hash"]
+            ),
+        )
+        if fork_block is None:
+            return False
+        # Hold tip ingestion before the rollback can start, the task releases it
+        mark_rollback_pending(fork_block)
+        ReorgRollbackTask.delay(fork_block)
+        return True
+
+    def ingest_tip_block(self, block_number: int) -> bool:
+        """
+        Fetch the receipts of a block once and commit its logs for every event
+        model. Returns True if all enabled events are now synced to the block, so
+        the parent range syncs can be skipped.
+        """
+        try:
+            receipts = rpc_adapter.client.eth.get_block_receipts(block_number)
+            block_logs = [log for receipt in receipts for log in receipt["logs"]]
+            caught_up = True
+            for task in self.TIP_SYNC_TASKS:
+                caught_up &= task.ingest_block_logs(block_logs, block_number)
+            return caught_up
+        except Exception as e:
+            logger.error(f"Tip ingestion of block {block_number} failed: {e}")
+            return False
+
+    def get_message_priority(self, msg) -> int:
+        # Every head is needed by the reorg buffer and tip ingestion, never shed them
+        return PRIORITY_HIGH
+
     def get_subscribe_message(self):
         message = {
             "id": "1",
@@ -45,6 +117,7 @@ class Command(WebsocketCommand, BaseCommand):
             # Extract block information
             block_number_hex = block_data.get("number")
             block_hash = block_data.get("hash")
+            parent_hash = block_data.get("parentHash")
             block_timestamp_hex = block_data.get("timestamp")
 
             if not block_number_hex:
@@ -76,9 +149,39 @@ class Command(WebsocketCommand, BaseCommand):
                 except Exception as e:
                     logger.error(f"Failed to queue NetworkBlockInfo update task: {e}")
 
-            ParentSynchronizeTask.delay()
-            PriceEventDynamicSynchronizeTask.delay()
-            ParentBalancesSynchronizeTask.delay()
+            caught_up = False
+            # Heads are checked and ingested one at a time and in order, a block
+            # arriving early simply waits for the previous one
+            async with self.tip_lock:
+                if REORG_PROTECTION_ENABLED and block_hash and parent_hash:
+                    try:
+                        await sync_to_async(self.check_reorg, thread_sensitive=False)(
+                            block_number, block_hash, parent_hash
+                        )
+                    except Exception as e:
+                        logger.error(f"Reorg check of block {block_number} failed: {e}")
+
+                # Nothing is committed while a rollback is queued or running, the
+                # range syncs re-ingest the canonical blocks once it has finished
+                pending_rollback = await sync_to_async(
+                    get_pending_rollback, thread_sensitive=False
+                )()
+                if pending_rollback is not None:
+                    logger.warning(
+                        f"Holding block {block_number} until the rollback from "
+                        f"block {pending_rollback} has finished"
+                    )
+                    return
+                if TIP_INGESTION_ENABLED:
+                    caught_up = await sync_to_async(
+                        self.ingest_tip_block, thread_sensitive=False
+                    )(block_number)
+
+            # Range syncs remain the catch-up path for lagging events and failures
+            if not caught_up:
+                ParentSynchronizeTask.delay()
+                PriceEventDynamicSynchronizeTask.delay()
+                ParentBalancesSynchronizeTask.delay()
             # EstimateFutureLiquidationCandidatesTask.delay(
             #     [["newBlock", block_number, block_timestamp]]
             # )
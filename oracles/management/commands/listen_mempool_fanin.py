@@ -0,0 +1,222 @@
+"""
+Management command to consume every mempool source in one process.
+
+QuickNode newPendingTransactions, Alchemy alchemy_pendingTransactions and the
+Flashbots MEV-Share SSE stream are consumed concurrently in one event loop. Each
+forwarder call is deduplicated by transaction hash (oracles.first_seen) and only
+its first sighting is parsed and handed to handle_oracle_update, so an oracle
+update triggers downstream work once however many providers report it.
+
+Per-provider first-seen counts and lead times are logged and cached every
+MEMPOOL_FIRST_SEEN_STATS_INTERVAL seconds; transaction timings are written to
+TransactionTimingTracking in batches.
+
+USAGE EXAMPLES:
+
+    # Every source
+    python manage.py listen_mempool_fanin
+
+    # Public mempool providers only
+    python manage.py listen_mempool_fanin --sources quicknode alchemy
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+import orjson as json
+import requests
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from sseclient import SSEClient
+
+from oracles.first_seen import FirstSeenTracker
+from oracles.management.commands.listen_alchemy_transactions import (
+    Command as AlchemyTransactionsCommand,
+)
+from oracles.management.commands.listen_base import WebsocketCommand
+from oracles.management.commands.listen_flashbots import MEV_SHARE_MAINNET
+from oracles.management.commands.listen_pending_transactions import (
+    Command as PendingTransactionsCommand,
+)
+from utils.message_pool import PRIORITY_HIGH
+from utils.oracle import (
+    FORWARD_METHOD_ID,
+    InvalidMethodSignature,
+    InvalidObservations,
+    is_forwarder_frame,
+    parse_forwarder_call,
+)
+
+logger = logging.getLogger(__name__)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+
+class Command(WebsocketCommand, BaseCommand):
+    help = (
+        "Consume all mempool sources in one process and forward each oracle update once"
+    )
+
+    WEBSOCKET_SOURCES = {
+        "quicknode": PendingTransactionsCommand,
+        "alchemy": AlchemyTransactionsCommand,
+    }
+    SOURCES = [*WEBSOCKET_SOURCES, "flashbots"]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sources",
+            nargs="+",
+            choices=self.SOURCES,
+            default=self.SOURCES,
+            help="Mempool sources to consume (default: all)",
+        )
+        parser.add_argument(
+            "--mev-share-endpoint",
+            default=MEV_SHARE_MAINNET,
+            help=f"MEV-Share SSE endpoint (default: {MEV_SHARE_MAINNET})",
+        )
+
+    def handle(self, *args, **options):
+        self.sources = options["sources"]
+        self.mev_share_endpoint = options["mev_share_endpoint"]
+        super().handle(*args, **options)
+
+    async def listen(self):
+        logger.info(f"Consuming mempool sources: {', '.join(self.sources)}")
+        await self.start_allow_list_refresh()
+        await self.start_fast_path()
+        await self.start_message_pool()
+        self.first_seen = FirstSeenTracker()
+        await self.first_seen.start()
+
+        consumers = []
+        for source in self.sources:
+            if source == "flashbots":
+                consumers.append(self.consume_mev_share())
+                continue
+
+            source_command = self.WEBSOCKET_SOURCES[source]()
+            subscribe_message = await sync_to_async(
+                source_command.get_subscribe_message, thread_sensitive=True
+            )()
+            consumers.append(
+                self.consume_websocket(
+                    source_command.get_wss(),
+                    json.dumps(subscribe_message),
+                    lambda frame, source=source: self.handle_source_frame(
+                        source, frame
+                    ),
+                )
+            )
+        await asyncio.gather(*consumers)
+
+        await self.first_seen.stop()
+        await self.message_pool.stop()
+
+    def handle_source_frame(self, source: str, frame):
+        if not is_forwarder_frame(frame, self.allowed_transmitters):
+            return
+
+        tx_data = json.loads(frame).get("params", {}).get("result")
+        if isinstance(tx_data, dict):
+            self.handle_transaction(source, tx_data)
+
+    def handle_transaction(self, source: str, tx_data: dict):
+        """Forward the first sighting of a transaction, later ones only feed stats."""
+        tx_hash = tx_data.get("hash")
+        if tx_hash and self.first_seen.observe(tx_hash, source):
+            self.message_pool.submit((source, tx_data), PRIORITY_HIGH)
+
+    async def consume_mev_share(self):
+        """Read the blocking SSE stream on a thread, forwarder calls go to the loop."""
+        loop = asyncio.get_running_loop()
+        thread = threading.Thread(
+            target=self._read_mev_share, args=(loop,), daemon=True
+        )
+        thread.start()
+        await asyncio.Event().wait()
+
+    def _read_mev_share(self, loop):
+        headers = {
+            "Accept": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "User-Agent": "mev-share-django-listener/1.0",
+        }
+        while True:
+            try:
+                with requests.get(
+                    self.mev_share_endpoint, headers=headers, stream=True, timeout=90
+                ) as resp:
+                    resp.raise_for_status()
+                    logger.info("Connected to MEV-Share")
+                    for msg in SSEClient(resp).events():
+                        for tx_data in self._parse_mev_share_event(msg.data):
+                            loop.call_soon_threadsafe(
+                                self.handle_transaction, "flashbots", tx_data
+                            )
+            except Exception as e:
+                logger.error(f"MEV-Share stream error: {type(e).__name__}: {e}")
+                time.sleep(0.1)
+
+    def _parse_mev_share_event(self, data):
+        """Forwarder calls to known transmitters of an event, as transaction dicts."""
+        data = (data or "").strip()
+        if not data or data.lower() in (":ping", "ping"):
+            return []
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            return []
+
+        tx_hash = event.get("hash")
+        transactions = []
+        for tx in event.get("txs") or []:
+            to_address = (tx.get("to") or "").lower()
+            if (
+                tx_hash
+                and tx.get("functionSelector") == FORWARD_METHOD_ID
+                and tx.get("callData")
+                and to_address in self.allowed_transmitters
+            ):
+                # MEV-Share hides the sender
+                transactions.append(
+                    {"hash": tx_hash, "to": to_address, "input": tx["callData"]}
+                )
+        return transactions
+
+    async def process(self, message):
+        source, tx_data = message
+        if not self._is_relevant_transaction(tx_data):
+            return
+
+        try:
+            parsed_data = parse_forwarder_call(tx_data["input"])
+        except (InvalidMethodSignature, InvalidObservations, ValueError) as e:
+            logger.warning(
+                f"Invalid forwarder call in transaction {tx_data['hash']}: {e}"
+            )
+            return
+
+        asset_sources = await self.get_asset_sources(parsed_data["oracle_address"])
+        if asset_sources:
+            self.first_seen.set_asset_source(tx_data["hash"], asset_sources[0][1])
+
+        logger.info(
+            f"Processing forwarder call {tx_data['hash']} first seen on {source}"
+        )
+        await self.handle_oracle_update(parsed_data, tx_data, asset_sources or [])
+
+    def _is_relevant_transaction(self, tx_data: dict) -> bool:
+        """Forwarder call to a known transmitter, from an authorized sender if known."""
+        if not (tx_data.get("input") or "").startswith(FORWARD_METHOD_ID):
+            return False
+        if (tx_data.get("to") or "").lower() not in self.allowed_transmitters:
+            return False
+        sender = tx_data.get("from")
+        return sender is None or sender.lower() in self.authorized_senders
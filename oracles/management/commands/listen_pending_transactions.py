@@ -1,22 +1,24 @@
-import asyncio
 import logging
-import time
 
-import orjson as json
-import websockets
-from django.core.cache import cache
 from django.core.management.base import BaseCommand
 
+from oracles.first_seen import FirstSeenTracker
 from oracles.management.commands.listen_base import WebsocketCommand
-from oracles.tasks import RecordTransactionTimingTask
+from utils.message_pool import PRIORITY_HIGH, PRIORITY_LOW
 from utils.oracle import (
     InvalidMethodSignature,
     InvalidObservations,
+    is_forwarder_frame,
     parse_forwarder_call,
 )
 
 logger = logging.getLogger(__name__)
 
+# Provider name of this listener's sightings, as in listen_mempool_fanin
+MEMPOOL_SOURCE = "quicknode"
+
+QUICKNODE_WSS = "wss://distinguished-chaotic-field.quiknode.pro/72950ba7ca289f717c9fecd5a8ff574d94ed7eb0"
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -47,46 +49,38 @@ class Command(WebsocketCommand, BaseCommand):
         logger.debug(f"Subscribe message created: {message}")
         return message
 
-    async def listen(self):
+    def prefilter_frame(self, frame) -> bool:
         """
-        Override the listen method to use QuickNode WebSocket endpoint.
+        Skip frames that are not forwarder calls to a known transmitter without
+        parsing them, which is almost the whole mempool.
         """
-        wss = "wss://distinguished-chaotic-field.quiknode.pro/72950ba7ca289f717c9fecd5a8ff574d94ed7eb0"
-        logger.info(f"Connecting to QuickNode mempool WebSocket: {wss}")
-
-        # Pre-compute subscribe message once
-        subscribe_message = self.get_subscribe_message()
-        subscribe_message_json = json.dumps(subscribe_message)
-        logger.info(f"Subscription message: {subscribe_message_json}")
-
-        # Reconnection loop
-        while True:
-            try:
-                # Attempt to connect with optimized settings
-                async with websockets.connect(
-                    wss,
-                    ping_interval=None,  # Disable ping/pong
-                    max_size=2**24,  # Increase max message size
-                    compression=None,  # Disable compression
-                ) as websocket:
-                    await websocket.send(subscribe_message_json)
-                    logger.info("Successfully subscribed to QuickNode mempool")
-
-                    # Process messages as fast as possible
-                    while True:
-                        msg = json.loads(await websocket.recv())
-                        if "params" not in msg:
-                            continue
-
-                        # Process message without awaiting to reduce latency
-                        asyncio.create_task(self.process(msg))
-
-            except websockets.exceptions.ConnectionClosed as e:
-                logger.warning(f"Connection closed with error: {e}. Reconnecting...")
-                await asyncio.sleep(0.1)  # Reduced reconnection delay
-            except Exception as e:
-                logger.error(f"Error in connection: {e}")
-                break
+        self.total_transactions += 1
+        if self.total_transactions % 10_000 == 0:
+            logger.info(
+                f"Received {self.total_transactions} transactions, "
+                f"filtered {self.filtered_transactions}, "
+                f"successfully processed {self.processed_transactions}"
+            )
+        return is_forwarder_frame(frame, self.allowed_transmitters)
+
+    def get_message_priority(self, msg) -> int:
+        """Forwarder calls go first, the rest of the mempool is shed under overload."""
+        tx_data = msg["params"].get("result")
+        if isinstance(tx_data, dict) and (tx_data.get("input") or "").startswith(
+            "0x6fadcf72"
+        ):
+            return PRIORITY_HIGH
+        return PRIORITY_LOW
+
+    def get_wss(self) -> str:
+        return QUICKNODE_WSS
+
+    async def listen(self):
+        # Only batches the timings of this single source, the fan-in listener
+        # reports first-seen stats
+        self.first_seen = FirstSeenTracker(stats_interval=0)
+        await self.first_seen.start()
+        await super().listen()
 
     async def process(self, response):
         """
@@ -98,15 +92,6 @@ class Command(WebsocketCommand, BaseCommand):
                 return
 
             tx_data = response["params"]["result"]
-            self.total_transactions += 1
-
-            # Log every 100 transactions for monitoring
-            if self.total_transactions % 100 == 0:
-                logger.info(
-                    f"Processed {self.total_transactions} transactions, "
-                    f"filtered {self.filtered_transactions}, "
-                    f"successfully processed {self.processed_transactions}"
-                )
 
             # Filter for relevant transactions
             if not self._is_relevant_transaction(tx_data):
@@ -125,17 +110,14 @@ class Command(WebsocketCommand, BaseCommand):
                     # Parse the forwarder call
                     parsed_data = parse_forwarder_call(tx_data["input"])
 
-                    # Record unconfirmed transaction timing with oracle address
-                    tx_hash = tx_data.get("hash")
-                    oracle_address = parsed_data.get("oracle_address")
-                    if tx_hash and oracle_address:
-                        asyncio.create_task(
-                            self._record_unconfirmed_transaction(
-                                tx_hash, oracle_address
-                            )
-                        )
-
-                    await self.handle_oracle_update(parsed_data, tx_data)
+                    asset_sources = await self.get_asset_sources(
+                        parsed_data["oracle_address"]
+                    )
+                    self._record_unconfirmed_transaction(tx_data, asset_sources)
+
+                    await self.handle_oracle_update(
+                        parsed_data, tx_data, asset_sources or []
+                    )
                     self.processed_transactions += 1
 
                 except InvalidMethodSignature as e:
@@ -163,12 +145,8 @@ class Command(WebsocketCommand, BaseCommand):
             bool: True if transaction is relevant for oracle processing
         """
         try:
-            # Get cached transmitters and authorized senders
-            allowed_transmitters = cache.get("transmitters_for_websockets", [])
-            authorized_senders = cache.get("authorized_senders_for_websockets", [])
-
-            if not allowed_transmitters or not authorized_senders:
-                logger.warning("No transmitters or authorized senders in cache")
+            # In-memory allow-lists, refreshed off the event loop
+            if not self.allowed_transmitters or not self.authorized_senders:
                 return False
 
             # Must have input data (for forwarder calls)
@@ -182,12 +160,12 @@ class Command(WebsocketCommand, BaseCommand):
 
             to_address = to_address.lower()
             # Must be to a known transmitter
-            if to_address not in allowed_transmitters:
+            if to_address not in self.allowed_transmitters:
                 return False
 
-            from_address = tx_data.get("from", "").lower()
+            from_address = (tx_data.get("from") or "").lower()
             # Must be from an authorized sender
-            if from_address not in authorized_senders:
+            if from_address not in self.authorized_senders:
                 return False
 
             # Run Tenderly simulation for relevant transactions
@@ -223,36 +201,19 @@ class Command(WebsocketCommand, BaseCommand):
             logger.error(f"Error filtering transaction: {e}. {tx_data}")
             return False
 
-    async def _record_unconfirmed_transaction(self, tx_hash: str, oracle_address: str):
+    def _record_unconfirmed_transaction(self, tx_data: dict, asset_sources):
         """
-        Record the unconfirmed transaction timestamp in ClickHouse.
-
-        Args:
-            tx_hash: The transaction hash
-            oracle_address: The oracle address from the parsed transaction
+        Queue the unconfirmed timestamp of an oracle update, the first-seen tracker
+        writes the buffered timings in one insert every MEMPOOL_TIMING_FLUSH_SECONDS.
         """
-        try:
-            unconfirmed_ts = int(time.time())
-
-            # Get asset sources for this oracle address
-            asset_sources = cache.get(f"underlying_asset_source_{oracle_address}")
-
-            if asset_sources:
-                # Record timing for each asset source
-                for asset, asset_source in asset_sources:
-                    RecordTransactionTimingTask.delay(
-                        tx_hash=tx_hash,
-                        asset_source=asset_source,
-                        unconfirmed_tx_ts=unconfirmed_ts,
-                        confirmed_tx_ts=0,
-                        mev_share_ts=0,
-                    )
-                    logger.debug(
-                        f"Recorded unconfirmed tx {tx_hash} for asset_source {asset_source}"
-                    )
-            else:
-                logger.warning(
-                    f"No asset sources found for oracle {oracle_address}, skipping timing record"
-                )
-        except Exception as e:
-            logger.error(f"Error recording unconfirmed transaction {tx_hash}: {e}")
+        tx_hash = tx_data.get("hash")
+        if not tx_hash:
+            return
+        if not asset_sources:
+            logger.warning(
+                f"No asset sources found for transaction {tx_hash}, "
+                "skipping timing record"
+            )
+            return
+        self.first_seen.observe(tx_hash, MEMPOOL_SOURCE)
+        self.first_seen.set_asset_source(tx_hash, asset_sources[0][1])
@@ -28,9 +28,9 @@ SELECT
         / CAST(aave_ethereum.PriceLatestEventRawDenominator.denominator AS Float64)
         * CAST(aave_ethereum.PriceLatestEventRawMultiplier.multiplier AS Float64)
     ) AS UInt256) AS historical_price_max_cap_precomputed
-FROM aave_ethereum.PriceLatestEventRawNumerator
-INNER JOIN aave_ethereum.PriceLatestEventRawDenominator ON aave_ethereum.PriceLatestEventRawNumerator.asset = aave_ethereum.PriceLatestEventRawDenominator.asset
-INNER JOIN aave_ethereum.PriceLatestEventRawMultiplier ON aave_ethereum.PriceLatestEventRawNumerator.asset = aave_ethereum.PriceLatestEventRawMultiplier.asset
-INNER JOIN aave_ethereum.PriceLatestEventRawMaxCap ON aave_ethereum.PriceLatestEventRawNumerator.asset = aave_ethereum.PriceLatestEventRawMaxCap.asset
-INNER JOIN aave_ethereum.LatestAssetSourceTokenMetadata
+FROM aave_ethereum.PriceLatestEventRawNumerator FINAL
+INNER JOIN aave_ethereum.PriceLatestEventRawDenominator FINAL ON aave_ethereum.PriceLatestEventRawNumerator.asset = aave_ethereum.PriceLatestEventRawDenominator.asset
+INNER JOIN aave_ethereum.PriceLatestEventRawMultiplier FINAL ON aave_ethereum.PriceLatestEventRawNumerator.asset = aave_ethereum.PriceLatestEventRawMultiplier.asset
+INNER JOIN aave_ethereum.PriceLatestEventRawMaxCap FINAL ON aave_ethereum.PriceLatestEventRawNumerator.asset = aave_ethereum.PriceLatestEventRawMaxCap.asset
+INNER JOIN aave_ethereum.LatestAssetSourceTokenMetadata FINAL
     ON aave_ethereum.PriceLatestEventRawNumerator.asset_source = aave_ethereum.LatestAssetSourceTokenMetadata.asset_source;
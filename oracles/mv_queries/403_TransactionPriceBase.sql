@@ -46,9 +46,9 @@ SELECT
         / CAST(aave_ethereum.PriceLatestEventRawDenominator.denominator AS Float64)
         * CAST(aave_ethereum.PriceLatestTransactionRawMultiplier.multiplier AS Float64)
     ) AS UInt256) AS historical_price_max_cap_precomputed
-FROM aave_ethereum.PriceLatestTransactionRawNumerator
-INNER JOIN aave_ethereum.PriceLatestEventRawDenominator ON aave_ethereum.PriceLatestTransactionRawNumerator.asset = aave_ethereum.PriceLatestEventRawDenominator.asset
-INNER JOIN aave_ethereum.PriceLatestTransactionRawMultiplier ON aave_ethereum.PriceLatestTransactionRawNumerator.asset = aave_ethereum.PriceLatestTransactionRawMultiplier.asset
-INNER JOIN aave_ethereum.PriceLatestEventRawMaxCap ON aave_ethereum.PriceLatestTransactionRawNumerator.asset = aave_ethereum.PriceLatestEventRawMaxCap.asset
-INNER JOIN aave_ethereum.LatestAssetSourceTokenMetadata
+FROM aave_ethereum.PriceLatestTransactionRawNumerator FINAL
+INNER JOIN aave_ethereum.PriceLatestEventRawDenominator FINAL ON aave_ethereum.PriceLatestTransactionRawNumerator.asset = aave_ethereum.PriceLatestEventRawDenominator.asset
+INNER JOIN aave_ethereum.PriceLatestTransactionRawMultiplier FINAL ON aave_ethereum.PriceLatestTransactionRawNumerator.asset = aave_ethereum.PriceLatestTransactionRawMultiplier.asset
+INNER JOIN aave_ethereum.PriceLatestEventRawMaxCap FINAL ON aave_ethereum.PriceLatestTransactionRawNumerator.asset = aave_ethereum.PriceLatestEventRawMaxCap.asset
+INNER JOIN aave_ethereum.LatestAssetSourceTokenMetadata FINAL
     ON aave_ethereum.PriceLatestTransactionRawNumerator.asset_source = aave_ethereum.LatestAssetSourceTokenMetadata.asset_source;
@@ -1,17 +1,20 @@
 import logging
+import time
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import web3
 from celery import Task
 from django.core.cache import cache
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from eth_utils import get_all_event_abis
 from web3.datastructures import AttributeDict
 
 from balances.models import BalanceEvent
+from balances.tasks import UpdateUserHealthFactorsTask
 from liquidations_v2.celery_app import app
 from oracles.contracts.denominator import get_denominator
 from oracles.contracts.interface import PriceOracleInterface
@@ -334,9 +337,25 @@ class PriceEventSynchronizeTask(EventSynchronizeMixin, Task):
     clickhouse_client = clickhouse_client
     rpc_adapter = rpc_adapter
     network_name = NETWORK_NAME
+    # get_numerator / get_multiplier read decoded web3 logs
+    decode_event_rows = False
 
-    def run(self, event_ids: List[int]):
+    def run(
+        self,
+        event_ids: List[int],
+        backfill_key: Optional[str] = None,
+        shard_index: Optional[int] = None,
+    ):
         """Default run method for child synchronize tasks."""
+        if backfill_key is not None:
+            self.run_backfill_shard(backfill_key, shard_index)
+            return
+        self.run_coalesced(event_ids, self.run_active_event_sync)
+
+    def get_tip_events(self):
+        return PriceEvent.objects.filter(is_enabled=True, is_active=True)
+
+    def run_active_event_sync(self, event_ids: List[int]):
         active_event_ids = PriceEvent.objects.filter(
             is_active=True, id__in=event_ids
         ).values_list("id", flat=True)
@@ -356,7 +375,7 @@ class PriceEventSynchronizeTask(EventSynchronizeMixin, Task):
     def handle_event_logs(self, network_events: List[Any], event_dicts: Dict):
         parsed_numerator_logs = []
         parsed_multiplier_logs = []
-        updated_network_events = []
+        inserted_logs = {}
 
         # Ensure new transmission is the last event to sync. This ensures approximately
         # accurate prices when secondary fields like max asset cap are updated.
@@ -375,22 +394,31 @@ class PriceEventSynchronizeTask(EventSynchronizeMixin, Task):
                     contract_addresses__contains=address
                 )
                 for network_event in network_events.iterator():
+                    new_event_logs = self.get_unsynced_event_logs(
+                        network_event, event_logs_for_address
+                    )
+                    if not new_event_logs:
+                        continue
                     parsed_numerator_logs.extend(
                         self.get_parsed_logs(
-                            network_event, event_logs_for_address, get_numerator
+                            network_event, new_event_logs, get_numerator
                         )
                     )
                     parsed_multiplier_logs.extend(
                         self.get_parsed_logs(
-                            network_event, event_logs_for_address, get_multiplier
+                            network_event, new_event_logs, get_multiplier
                         )
                     )
-                    network_event.logs_count += len(event_logs_for_address)
                     max_block_number = max(
-                        event_log.blockNumber for event_log in event_logs_for_address
+                        event_log.blockNumber for event_log in new_event_logs
+                    )
+                    logs_count, last_inserted_block = inserted_logs.get(
+                        network_event.id, (0, 0)
+                    )
+                    inserted_logs[network_event.id] = (
+                        logs_count + len(new_event_logs),
+                        max(last_inserted_block, max_block_number),
                     )
-                    network_event.last_inserted_block = max_block_number
-                    updated_network_events.append(network_event)
 
         self.bulk_insert_raw_price_events(
             table_name="EventRawNumerator", logs=parsed_numerator_logs
@@ -405,9 +433,14 @@ class PriceEventSynchronizeTask(EventSynchronizeMixin, Task):
             table_name="TransactionRawMultiplier", logs=parsed_multiplier_logs
         )
 
-        PriceEvent.objects.bulk_update(
-            updated_network_events, ["logs_count", "last_inserted_block"]
-        )
+        # Concurrent commits of the same events must not overwrite each other
+        for event_id, (logs_count, last_inserted_block) in inserted_logs.items():
+            PriceEvent.objects.filter(id=event_id).update(
+                logs_count=F("logs_count") + logs_count,
+                last_inserted_block=Greatest(
+                    "last_inserted_block", last_inserted_block
+                ),
+            )
 
     def get_parsed_logs(
         self, network_event: PriceEvent, event_logs_for_address: List[Any], parser_func
@@ -436,6 +469,9 @@ class PriceEventSynchronizeTask(EventSynchronizeMixin, Task):
                 break
             except Exception as e:
                 logger.error(f"Error inserting rows: {e}")
+                # Fail the window so its cursor is not moved past lost rows
+                if i == 2:
+                    raise
 
         for i in range(3):
             try:
@@ -449,6 +485,17 @@ class PriceEventSynchronizeTask(EventSynchronizeMixin, Task):
     ):
         UpdateTransmittersForPriceAggregatorsTask.delay()
 
+        repriced_assets = set(
+            PriceEvent.objects.filter(
+                id__in=[network_event.id for network_event in network_events],
+                last_inserted_block__gte=start_block,
+            ).values_list("asset", flat=True)
+        )
+        if repriced_assets:
+            UpdateUserHealthFactorsTask.delay(
+                assets=sorted(repriced_assets), requested_at=time.time()
+            )
+
 
 PriceEventSynchronizeTask = app.register_task(PriceEventSynchronizeTask())
 
@@ -686,6 +733,16 @@ PriceTransactionDynamicSynchronizeTask = app.register_task(
 
 class InsertTransactionNumeratorTask(BasePriceMixin, Task):
     def run(self, parsed_numerator_logs: List[Any], hash: str):
+        self.insert_numerators(parsed_numerator_logs)
+        from payments.tasks import EstimateFutureLiquidationCandidatesTask
+
+        # Trigger the future liquidation candidates estimation task
+        EstimateFutureLiquidationCandidatesTask.run(
+            parsed_numerator_logs=parsed_numerator_logs,
+        )
+
+    def insert_numerators(self, parsed_numerator_logs: List[Any]):
+        """Store predicted numerators and refresh the asset configuration dictionary."""
         logger.info(f"Parsed numerator logs: {parsed_numerator_logs}")
         self.bulk_insert_raw_price_events(
             table_name="TransactionRawNumerator", logs=parsed_numerator_logs
@@ -694,12 +751,6 @@ class InsertTransactionNumeratorTask(BasePriceMixin, Task):
         clickhouse_client.execute_query(
             """SYSTEM RELOAD DICTIONARY aave_ethereum.dict_latest_asset_configuration"""
         )
-        from payments.tasks import EstimateFutureLiquidationCandidatesTask
-
-        # Trigger the future liquidation candidates estimation task
-        EstimateFutureLiquidationCandidatesTask.run(
-            parsed_numerator_logs=parsed_numerator_logs,
-        )
 
 
 InsertTransactionNumeratorTask = app.register_task(InsertTransactionNumeratorTask())
@@ -0,0 +1,94 @@
+"""
+Broker-free liquidation detection for mempool oracle updates.
+
+The default path hands the numerators of a parsed forwarder call to celery:
+InsertTransactionNumeratorTask inserts them, reloads
+dict_latest_asset_configuration and only then runs
+EstimateFutureLiquidationCandidatesTask. With MEMPOOL_FAST_PATH_ENABLED the
+listener process does the detection itself:
+
+1. numerators become predicted prices on the resident position matrix
+2. at-risk users are evaluated on the same snapshot and detections are logged
+   and notified right away
+3. the audit rows (TransactionRawNumerator with the dictionary reload, and
+   LiquidationDetections) are written afterwards by a background writer thread
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+from decouple import config
+
+from oracles.tasks import InsertTransactionNumeratorTask
+from payments.positions import position_matrix
+from payments.tasks import EstimateFutureLiquidationCandidatesTask
+
+logger = logging.getLogger(__name__)
+
+MEMPOOL_FAST_PATH_ENABLED = config(
+    "MEMPOOL_FAST_PATH_ENABLED", cast=bool, default=False
+)
+
+
+class FastPathDetector:
+    def __init__(self):
+        # A single writer keeps the audit rows in detection order
+        self.audit_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="fast-path-audit"
+        )
+
+    def warm_up(self):
+        """Load the position matrix before the first oracle update arrives."""
+        position_matrix.ensure_fresh()
+
+    def detect(self, parsed_numerator_logs: List[Any]) -> List[List[Any]]:
+        """
+        Detect liquidations for transaction numerators, each log being
+        [asset, asset_source, asset_source_type, timestamp, blockNumber,
+        transaction_hash, type, price]. Returns the liquidation candidates.
+        """
+        start = time.perf_counter()
+        self.audit_executor.submit(self._write_numerators, parsed_numerator_logs)
+
+        position_matrix.ensure_fresh()
+        predicted_prices = {}
+        for log in parsed_numerator_logs:
+            asset, numerator = log[0], log[7]
+            predicted_price = position_matrix.predict_transaction_price(
+                asset, numerator
+            )
+            if predicted_price is None:
+                logger.warning(
+                    f"[FAST_PATH] No transaction price terms for {asset}, "
+                    "using its historical event price"
+                )
+                continue
+            predicted_prices[asset] = predicted_price
+
+        candidates = EstimateFutureLiquidationCandidatesTask.detect(
+            parsed_numerator_logs, predicted_prices
+        )
+        logger.info(
+            f"[FAST_PATH] {len(candidates)} liquidation candidates for "
+            f"{len(predicted_prices)} predicted prices in "
+            f"{(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+        if candidates:
+            self.audit_executor.submit(self._write_detections, candidates)
+        return candidates
+
+    def _write_numerators(self, parsed_numerator_logs: List[Any]):
+        try:
+            InsertTransactionNumeratorTask.insert_numerators(parsed_numerator_logs)
+        except Exception as e:
+            logger.error(f"[FAST_PATH] Error writing transaction numerators: {e}")
+
+    def _write_detections(self, candidates: List[List[Any]]):
+        EstimateFutureLiquidationCandidatesTask._append_liquidation_detections(
+            candidates
+        )
+
+
+fast_path_detector = FastPathDetector()
@@ -0,0 +1,137 @@
+"""
+Management command to benchmark liquidation detection for oracle updates.
+
+Predicted health factors for oracle updates of the given assets are computed by the
+SQL query of EstimateFutureLiquidationCandidatesTask and by the resident NumPy
+position matrix. --record writes the position matrix queries and the SQL path
+candidates to the fixture of blockchains/tests/positions_tests.py.
+
+USAGE EXAMPLES:
+
+    python manage.py benchmark_liquidations --iterations 100 \\
+        --assets 0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2
+
+    python manage.py benchmark_liquidations --iterations 1 \\
+        --assets 0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2 --record \\
+        --fixture blockchains/tests/fixtures/position_matrix.json
+"""
+
+import json
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blockchains.management.commands.benchmark_base import BenchmarkCommand
+from payments.positions import PositionMatrix
+from payments.tasks import EstimateFutureLiquidationCandidatesTask
+from utils.clickhouse.client import clickhouse_client
+
+
+class Command(BenchmarkCommand, BaseCommand):
+    help = "Benchmark SQL vs position matrix liquidation detection"
+
+    SUITES = ["liquidation_simulator"]
+
+    def add_suite_arguments(self, parser):
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=100,
+            help="Number of predictions per run (default: 100)",
+        )
+        parser.add_argument(
+            "--assets",
+            type=str,
+            help="Comma separated assets with a predicted price update "
+            "(default: every configured asset)",
+        )
+        parser.add_argument(
+            "--fixture",
+            type=str,
+            help="Path the position matrix fixture is recorded to",
+        )
+        parser.add_argument(
+            "--record",
+            action="store_true",
+            help="Record the position matrix fixture after the suite",
+        )
+
+    def _run_liquidation_simulator(self, options):
+        """SQL predicted health factors vs the resident NumPy position matrix."""
+        if options["record"] and not options["fixture"]:
+            raise CommandError("--fixture is required to record")
+
+        iterations = options["iterations"]
+        if options["assets"]:
+            updated_assets = [
+                asset.strip().lower() for asset in options["assets"].split(",")
+            ]
+        else:
+            updated_assets = [
+                row[0]
+                for row in clickhouse_client.execute_query(
+                    "SELECT asset FROM aave_ethereum.dict_latest_asset_configuration"
+                ).result_rows
+            ]
+        task = EstimateFutureLiquidationCandidatesTask
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            candidates = task._get_at_risk_users_with_predicted_prices(updated_assets)
+        sql_rate = self._report(
+            "sql query", iterations, time.perf_counter() - start, "predictions"
+        )
+
+        matrix = PositionMatrix()
+        start = time.perf_counter()
+        matrix.load()
+        self._report("matrix load", 1, time.perf_counter() - start, "loads")
+
+        predicted_prices = matrix.get_predicted_prices(updated_assets)
+        prices = matrix.price_vector(predicted_prices)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            at_risk_users = matrix.at_risk_users(predicted_prices, prices)
+            matrix.liquidation_candidates([user for user, _, _ in at_risk_users])
+        matrix_rate = self._report(
+            f"matrix predict ({len(matrix._state['users'])} users)",
+            iterations,
+            time.perf_counter() - start,
+            "predictions",
+        )
+        self._report_speedup(matrix_rate, sql_rate)
+
+        if options["record"]:
+            self._record_position_matrix_fixture(
+                options["fixture"], updated_assets, candidates
+            )
+
+    def _record_position_matrix_fixture(
+        self, fixture_path: str, updated_assets, candidates
+    ):
+        """Record the position matrix queries and the SQL path candidates."""
+        queries = {}
+
+        class RecordingClient:
+            def execute_query(self, query, parameters=None):
+                result = clickhouse_client.execute_query(query, parameters=parameters)
+                match = re.search(r"FROM aave_ethereum\.(\w+)", query)
+                key = match.group(1) if match else "predicted_prices"
+                queries[key] = [list(row) for row in result.result_rows]
+                return result
+
+        matrix = PositionMatrix(clickhouse_client=RecordingClient())
+        matrix.load()
+        matrix.get_predicted_prices(updated_assets)
+        fixture = {
+            "updated_assets": updated_assets,
+            "queries": queries,
+            # Without the updated_assets and detected_at columns
+            "expected": [list(row[:16]) for row in candidates],
+        }
+        with open(fixture_path, "w") as f:
+            json.dump(fixture, f)
+        self.stdout.write(
+            f"Recorded {len(fixture['expected'])} SQL path candidates to {fixture_path}"
+        )
@@ -464,7 +464,7 @@ class Command(BaseCommand):
             transactionHash,
             type,
             numerator
-        FROM aave_ethereum.PriceLatestTransactionRawNumerator
+        FROM aave_ethereum.PriceLatestTransactionRawNumerator FINAL
         WHERE asset IN ({assets_str})
         """
 
@@ -0,0 +1,405 @@
+"""
+Resident users x assets position matrix for predicted health factors.
+
+Keeps every user's accrued balances, collateral flags, eMode status and liquidation
+thresholds in NumPy arrays, so that applying a price vector and computing predicted
+health factors for all users is a handful of vectorised operations instead of a
+ClickHouse round trip. Positions are stored sparsely (one entry per user/asset pair
+with a balance) and reloaded from ClickHouse in the background once stale.
+
+The arithmetic mirrors EstimateFutureLiquidationCandidatesTask's SQL: balances come
+from view_future_user_asset_effective_balances, current health factors from the
+UserHealthFactor store, and effective values are computed in Float64 with the same
+operation order, floored per asset and summed as exact integers. Both paths should
+therefore agree on health factors; the parity test checks this on a recorded
+fixture of realistic positions, not at the edges of the UInt256 range.
+
+The snapshot also holds the price independent terms of LatestPriceTransaction
+(denominator, multiplier, caps and multiplier growth to the next block), so the
+mempool fast path can turn a freshly computed numerator into a predicted price
+without inserting it and reloading dict_latest_asset_configuration first, and
+the rows of LiquidationCandidates_Memory, so at-risk users are matched to their
+liquidation opportunities without another query.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from decouple import config
+
+from utils.clickhouse.client import clickhouse_client
+
+logger = logging.getLogger(__name__)
+
+POSITION_MATRIX_ENABLED = config("POSITION_MATRIX_ENABLED", cast=bool, default=True)
+POSITION_MATRIX_MAX_AGE_SECONDS = config(
+    "POSITION_MATRIX_MAX_AGE_SECONDS", cast=int, default=30
+)
+
+USD_THRESHOLD = 10000
+# Floored effective values summing to less than this are summed in int64, with
+# headroom for the rounding of the Float64 total the check is made on
+INT64_SUM_LIMIT = 2**62
+
+
+class PositionMatrix:
+    def __init__(self, clickhouse_client=clickhouse_client):
+        self.clickhouse_client = clickhouse_client
+        self.loaded_at = None
+        self._reload_lock = threading.Lock()
+        self._state = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._state is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return (
+            self.loaded_at is None
+            or time.time() - self.loaded_at > POSITION_MATRIX_MAX_AGE_SECONDS
+        )
+
+    def ensure_fresh(self):
+        """Load synchronously the first time, afterwards reload in the background."""
+        if not self.is_loaded:
+            self.load()
+        elif self.is_stale and not self._reload_lock.locked():
+            threading.Thread(target=self.load, daemon=True).start()
+
+    def load(self):
+        """Rebuild all arrays from ClickHouse and swap them in atomically."""
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            start = time.time()
+            state = self._build_state()
+            self._state = state
+            self.loaded_at = time.time()
+            logger.info(
+                f"Loaded position matrix with {len(state['users'])} users, "
+                f"{len(state['assets'])} assets and {len(state['rows'])} positions "
+                f"in {self.loaded_at - start:.3f}s"
+            )
+        finally:
+            self._reload_lock.release()
+
+    def _build_state(self) -> Dict:
+        asset_columns = self.clickhouse_client.execute_query(
+            """
+            SELECT
+                asset,
+                toFloat64(decimals_places),
+                toFloat64(eModeLiquidationThreshold),
+                toFloat64(collateralLiquidationThreshold),
+                toFloat64(historical_event_price)
+            FROM aave_ethereum.dict_latest_asset_configuration
+            """
+        ).result_columns
+        position_columns = self.clickhouse_client.execute_query(
+            """
+            SELECT
+                user,
+                asset,
+                toFloat64(accrued_collateral_balance),
+                toFloat64(accrued_debt_balance),
+                dictGetOrDefault('aave_ethereum.dict_collateral_status', 'is_enabled_as_collateral', tuple(user, asset), toInt8(0)),
+                dictGetOrDefault('aave_ethereum.dict_emode_status', 'is_enabled_in_emode', toString(user), toInt8(0))
+            FROM aave_ethereum.view_future_user_asset_effective_balances
+            """
+        ).result_columns
+        current_query = """
+            SELECT user, health_factor, effective_collateral_usd, effective_debt_usd
+            FROM aave_ethereum.{table}
+            """
+        current_columns = self.clickhouse_client.execute_query(
+            current_query.format(table="UserHealthFactor")
+        ).result_columns
+        if not current_columns and position_columns:
+            # The store is empty until UpdateUserHealthFactorsTask first rebuilds it
+            logger.error(
+                "UserHealthFactor is empty, reading current health factors from "
+                "view_user_health_factor"
+            )
+            current_columns = self.clickhouse_client.execute_query(
+                current_query.format(table="view_user_health_factor")
+            ).result_columns
+        price_factor_rows = self.clickhouse_client.execute_query(
+            """
+            SELECT
+                asset,
+                toFloat64(denominator),
+                toFloat64(multiplier),
+                toUInt8(max_cap_type),
+                max_cap_uint256,
+                multiplier_cap,
+                multiplier_growth_to_next_block
+            FROM aave_ethereum.LatestPriceTransactionBase
+            """
+        ).result_rows
+        candidate_rows = self.clickhouse_client.execute_query(
+            """
+            SELECT
+                user,
+                collateral_asset,
+                debt_asset,
+                debt_to_cover,
+                profit,
+                effective_collateral,
+                effective_debt,
+                collateral_balance,
+                debt_balance,
+                liquidation_bonus,
+                collateral_price,
+                debt_price,
+                collateral_decimals,
+                debt_decimals
+            FROM aave_ethereum.LiquidationCandidates_Memory
+            ORDER BY profit DESC
+            """
+        ).result_rows
+        liquidation_candidates = {}
+        for row in candidate_rows:
+            liquidation_candidates.setdefault(row[0], []).append(row)
+
+        # Assets missing from the configuration dictionary get the SQL defaults
+        assets = list(asset_columns[0]) if asset_columns else []
+        asset_index = {asset: i for i, asset in enumerate(assets)}
+        extra_assets = (
+            sorted(set(position_columns[1]) - set(asset_index))
+            if position_columns
+            else []
+        )
+        for asset in extra_assets:
+            asset_index[asset] = len(assets)
+            assets.append(asset)
+
+        def asset_vector(column: int, default: float) -> np.ndarray:
+            values = np.full(len(assets), default, dtype=np.float64)
+            if asset_columns:
+                values[: len(asset_columns[0])] = asset_columns[column]
+            return values
+
+        decimals_places = asset_vector(1, 1.0)
+        emode_thresholds = asset_vector(2, 0.0)
+        collateral_thresholds = asset_vector(3, 0.0)
+        historical_prices = asset_vector(4, 0.0)
+
+        position_users = position_columns[0] if position_columns else []
+        users = sorted(set(position_users))
+        user_index = {user: i for i, user in enumerate(users)}
+
+        rows = np.fromiter(
+            (user_index[user] for user in position_users), dtype=np.int64
+        )
+        cols = np.fromiter(
+            (asset_index[asset] for asset in (position_columns or [[], []])[1]),
+            dtype=np.int64,
+        )
+        if position_columns:
+            accrued_collateral = np.asarray(position_columns[2], dtype=np.float64)
+            accrued_debt = np.asarray(position_columns[3], dtype=np.float64)
+            collateral_enabled = np.asarray(position_columns[4], dtype=np.float64)
+            in_emode = np.asarray(position_columns[5], dtype=np.int8) == 1
+        else:
+            accrued_collateral = accrued_debt = collateral_enabled = np.zeros(0)
+            in_emode = np.zeros(0, dtype=bool)
+
+        # Positions grouped by user, so per-user sums are one np.add.reduceat
+        order = np.argsort(rows, kind="stable")
+        rows, cols = rows[order], cols[order]
+        accrued_collateral, accrued_debt = (
+            accrued_collateral[order],
+            accrued_debt[order],
+        )
+        collateral_enabled, in_emode = collateral_enabled[order], in_emode[order]
+        user_starts = np.flatnonzero(np.diff(rows, prepend=-1))
+
+        liquidation_thresholds = np.where(
+            in_emode, emode_thresholds[cols], collateral_thresholds[cols]
+        )
+        # Price independent terms of the SQL expressions, in the same order:
+        # acc * threshold * enabled * price / (10000 * decimals) and
+        # acc * price / decimals, with an extra 1e8 in the USD divisors
+        collateral_factor = accrued_collateral * liquidation_thresholds
+        collateral_factor *= collateral_enabled
+        collateral_divisor = 10000 * decimals_places[cols]
+        debt_divisor = decimals_places[cols]
+
+        current_health_factor = np.full(len(users), np.nan)
+        current_collateral_usd = np.zeros(len(users))
+        current_debt_usd = np.zeros(len(users))
+        if current_columns:
+            for user, health_factor, collateral_usd, debt_usd in zip(*current_columns):
+                i = user_index.get(user)
+                if i is not None:
+                    current_health_factor[i] = health_factor
+                    current_collateral_usd[i] = collateral_usd
+                    current_debt_usd[i] = debt_usd
+
+        return {
+            "users": users,
+            "assets": assets,
+            "asset_index": asset_index,
+            "rows": rows,
+            "cols": cols,
+            "user_starts": user_starts,
+            "collateral_factor": collateral_factor,
+            "collateral_divisor": collateral_divisor,
+            "accrued_debt": accrued_debt,
+            "debt_divisor": debt_divisor,
+            "historical_prices": historical_prices,
+            "current_health_factor": current_health_factor,
+            "current_collateral_usd": current_collateral_usd,
+            "current_debt_usd": current_debt_usd,
+            "price_factors": {row[0]: row[1:] for row in price_factor_rows},
+            "liquidation_candidates": liquidation_candidates,
+        }
+
+    def get_predicted_prices(self, assets: List[str]) -> Dict[str, float]:
+        """Latest predicted transaction prices for the given assets."""
+        result = self.clickhouse_client.execute_query(
+            """
+            SELECT
+                asset,
+                toFloat64(dictGetOrDefault('aave_ethereum.dict_latest_asset_configuration', 'predicted_transaction_price', asset, toUInt256(0)))
+            FROM (SELECT arrayJoin(%(assets)s) AS asset)
+            """,
+            parameters={"assets": list(assets)},
+        )
+        return dict(result.result_rows)
+
+    def predict_transaction_price(self, asset: str, numerator: int) -> Optional[float]:
+        """
+        predicted_price of LatestPriceTransaction for a new transaction numerator,
+        None if the snapshot has no transaction price terms for the asset.
+        """
+        factors = self._state["price_factors"].get(asset)
+        if factors is None:
+            return None
+        (
+            denominator,
+            multiplier,
+            max_cap_type,
+            max_cap_uint256,
+            multiplier_cap,
+            multiplier_growth_to_next_block,
+        ) = factors
+        if not denominator or not multiplier:
+            return None
+
+        if max_cap_type in (0, 1):
+            price = min(
+                max_cap_uint256, float(int(numerator / denominator * multiplier))
+            )
+        else:
+            price = (
+                min(
+                    multiplier * (1 + multiplier_growth_to_next_block / multiplier),
+                    multiplier_cap,
+                )
+                * float(numerator)
+                / denominator
+            )
+        return float(math.floor(price))
+
+    def price_vector(self, predicted_prices: Dict[str, float]) -> np.ndarray:
+        """Historical event prices with the given assets replaced by predicted prices."""
+        state = self._state
+        prices = state["historical_prices"].copy()
+        for asset, price in predicted_prices.items():
+            i = state["asset_index"].get(asset)
+            if i is not None:
+                prices[i] = price
+        return prices
+
+    def health_factors(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Effective collateral, effective debt and health factor of every user."""
+        state = self._state
+        user_starts = state["user_starts"]
+        position_prices = prices[state["cols"]]
+        collateral = state["collateral_factor"] * position_prices
+        debt = state["accrued_debt"] * position_prices
+
+        def user_sums(values: np.ndarray) -> np.ndarray:
+            # Floored per position and summed exactly like the SQL UInt256 sums.
+            # Effective values are in USD * 1e8 units and fit int64 in practice,
+            # larger totals are summed as Python ints instead of wrapping around
+            if not len(values):
+                return np.zeros(0, dtype=np.int64)
+            floored = np.floor(values)
+            if floored.sum() < INT64_SUM_LIMIT:
+                return np.add.reduceat(floored.astype(np.int64), user_starts)
+            exact = np.array([int(value) for value in floored], dtype=object)
+            return np.add.reduceat(exact, user_starts)
+
+        effective_collateral = user_sums(collateral / state["collateral_divisor"])
+        effective_debt = user_sums(debt / state["debt_divisor"])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            health_factor = np.where(
+                effective_debt == 0,
+                999.9,
+                effective_collateral.astype(np.float64)
+                / effective_debt.astype(np.float64),
+            )
+
+        return {
+            "health_factor": health_factor,
+            "effective_collateral": effective_collateral,
+            "effective_debt": effective_debt,
+            "effective_collateral_usd": user_sums(
+                collateral / (state["collateral_divisor"] * 1e8)
+            ),
+            "effective_debt_usd": user_sums(debt / (state["debt_divisor"] * 1e8)),
+        }
+
+    def at_risk_users(
+        self, predicted_prices: Dict[str, float], prices: Optional[np.ndarray] = None
+    ) -> List[tuple]:
+        """
+        Users with a current health factor above 1 whose health factor drops to or
+        below 1 under the predicted prices, as (user, current_hf, predicted_hf).
+        """
+        state = self._state
+        if prices is None:
+            prices = self.price_vector(predicted_prices)
+        predicted = self.health_factors(prices)
+        current_health_factor = state["current_health_factor"]
+
+        mask = (
+            (current_health_factor > 1.0)
+            & (predicted["health_factor"] <= 1.0)
+            & (predicted["effective_collateral_usd"] > USD_THRESHOLD)
+            & (predicted["effective_debt_usd"] > USD_THRESHOLD)
+            & (state["current_collateral_usd"] > USD_THRESHOLD)
+            & (state["current_debt_usd"] > USD_THRESHOLD)
+        )
+        users = state["users"]
+        return [
+            (
+                users[i],
+                float(current_health_factor[i]),
+                float(predicted["health_factor"][i]),
+            )
+            for i in np.flatnonzero(mask)
+        ]
+
+    def liquidation_candidates(self, users: List[str]) -> List[tuple]:
+        """
+        LiquidationCandidates_Memory rows of the given users, most profitable first:
+        (user, collateral_asset, debt_asset, debt_to_cover, profit,
+        effective_collateral, effective_debt, collateral_balance, debt_balance,
+        liquidation_bonus, collateral_price, debt_price, collateral_decimals,
+        debt_decimals).
+        """
+        candidates = self._state["liquidation_candidates"]
+        rows = [row for user in users for row in candidates.get(user, ())]
+        rows.sort(key=lambda row: row[4], reverse=True)
+        return rows
+
+
+position_matrix = PositionMatrix()
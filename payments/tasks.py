@@ -4,12 +4,14 @@ import os
 from collections import defaultdict
 from datetime import datetime
 from itertools import combinations
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 from celery import Task
 from web3 import Web3
 
+from balances.tasks import UpdateUserHealthFactorsTask
 from liquidations_v2.celery_app import app
+from payments.positions import POSITION_MATRIX_ENABLED, position_matrix
 from utils.clickhouse.client import clickhouse_client
 from utils.interfaces.base import BaseContractInterface
 from utils.simplepush import send_simplepush_notification
@@ -24,7 +26,8 @@ class EstimateFutureLiquidationCandidatesTask(Task):
     This task:
     1. Identifies assets that were updated in the transaction numerator
     2. Calculates health factors using predicted_transaction_price for updated assets
-       and historical_event_price for other assets
+       and historical_event_price for other assets, in-process on the resident
+       position matrix (payments.positions) or, when disabled, in ClickHouse
     3. Finds users who have health_factor > 1 on view 146 (current)
        but health_factor < 1 using predicted prices
     4. Retrieves liquidation candidates from LiquidationCandidates_Memory for these users
@@ -33,6 +36,7 @@ class EstimateFutureLiquidationCandidatesTask(Task):
     """
 
     clickhouse_client = clickhouse_client
+    use_position_matrix = POSITION_MATRIX_ENABLED
 
     def run(self, parsed_numerator_logs: List[Any]):
         """
@@ -68,9 +72,14 @@ class EstimateFutureLiquidationCandidatesTask(Task):
 
             # Step 2: Get liquidation candidates in a single optimized query
             # This combines the at-risk users query and liquidation candidates lookup
-            liquidation_candidates = self._get_at_risk_users_with_predicted_prices(
-                updated_assets
-            )
+            if self.use_position_matrix:
+                liquidation_candidates = self._get_at_risk_users_with_position_matrix(
+                    updated_assets
+                )
+            else:
+                liquidation_candidates = self._get_at_risk_users_with_predicted_prices(
+                    updated_assets
+                )
 
             if not liquidation_candidates:
                 logger.info("[LIQUIDATION_DETECTION] No liquidation candidates found")
@@ -98,6 +107,33 @@ class EstimateFutureLiquidationCandidatesTask(Task):
                 exc_info=True,
             )
 
+    def detect(
+        self, parsed_numerator_logs: List[Any], predicted_prices: Dict[str, float]
+    ) -> List[List[Any]]:
+        """
+        Detection part of run for the mempool fast path: at-risk users under the
+        given predicted prices on the resident position matrix, logged and notified
+        right away. Appending the detections is left to the caller.
+        """
+        updated_assets, _, _ = self._extract_updated_assets_and_metadata(
+            parsed_numerator_logs
+        )
+        if not updated_assets:
+            return []
+
+        liquidation_candidates = self._get_at_risk_users_with_position_matrix(
+            updated_assets, predicted_prices
+        )
+        if liquidation_candidates:
+            self._send_notification(liquidation_candidates, updated_assets)
+            logger.warning(
+                f"[LIQUIDATION_DETECTED] *** LIQUIDATION OPPORTUNITIES FOUND *** "
+                f"Users: {len(set(c[0] for c in liquidation_candidates))} | "
+                f"Opportunities: {len(liquidation_candidates)} | "
+                f"Potential Profit: ${sum(float(c[6]) for c in liquidation_candidates):,.2f}"
+            )
+        return liquidation_candidates
+
     def _extract_updated_assets_and_metadata(self, parsed_numerator_logs: List[Any]):
         """
         Extract unique asset addresses, transaction hashes, and block numbers from parsed logs.
@@ -146,6 +182,7 @@ class EstimateFutureLiquidationCandidatesTask(Task):
         # Build CASE statement for dynamic price selection
         # For updated assets, use predicted_transaction_price; for others, use historical_event_price
         assets_str = ", ".join([f"'{asset}'" for asset in updated_assets])
+        health_factor_table = UpdateUserHealthFactorsTask.get_health_factor_table()
 
         query = f"""
         WITH
@@ -238,7 +275,7 @@ class EstimateFutureLiquidationCandidatesTask(Task):
                 effective_collateral_usd,
                 effective_debt_usd,
                 health_factor AS current_health_factor
-            FROM aave_ethereum.view_user_health_factor
+            FROM aave_ethereum.{health_factor_table}
         ),
         at_risk_users AS (
             SELECT
@@ -279,47 +316,89 @@ class EstimateFutureLiquidationCandidatesTask(Task):
 
         try:
             result = self.clickhouse_client.execute_query(query)
-            liquidation_candidates = []
-
-            if result.result_rows:
-                num_users = len(set([row[0] for row in result.result_rows]))
-                logger.info(
-                    f"[LIQUIDATION_DETECTION] Found {len(result.result_rows)} liquidation opportunities "
-                    f"for {num_users} users with declining health factors"
-                )
+            return self._build_liquidation_candidates(
+                result.result_rows, updated_assets
+            )
 
-                for row in result.result_rows:
-                    user = row[0]
-                    current_hf = float(row[3])
-                    predicted_hf = float(row[4])
-                    profit = float(row[6])
-
-                    # Convert tuple to list and append updated_assets array and timestamp
-                    row_data = list(row)
-                    row_data.append(
-                        updated_assets
-                    )  # Add updated_assets as the 17th field
-                    row_data.append(
-                        datetime.now()
-                    )  # Add detected_at timestamp as the 18th field
-                    liquidation_candidates.append(row_data)
-
-                    # Log individual liquidation opportunity
-                    logger.info(
-                        f"[LIQUIDATION_OPPORTUNITY] User: {user} | "
-                        f"Current HF: {current_hf:.4f} → Predicted HF: {predicted_hf:.4f} | "
-                        f"Profit: ${profit:,.2f}"
-                    )
+        except Exception as e:
+            logger.error(
+                f"[LIQUIDATION_DETECTION_ERROR] Error calculating liquidation opportunities: {e}",
+                exc_info=True,
+            )
+            return []
 
-            return liquidation_candidates
+    def _get_at_risk_users_with_position_matrix(
+        self,
+        updated_assets: List[str],
+        predicted_prices: Optional[Dict[str, float]] = None,
+    ) -> List[List[Any]]:
+        """
+        Same result as _get_at_risk_users_with_predicted_prices, but predicted health
+        factors are computed in-process on the resident position matrix, which
+        also holds the liquidation candidates of at-risk users. Only the predicted
+        prices, unless given, are read from ClickHouse.
+        """
+        try:
+            position_matrix.ensure_fresh()
+            if predicted_prices is None:
+                predicted_prices = position_matrix.get_predicted_prices(updated_assets)
+            at_risk_users = position_matrix.at_risk_users(predicted_prices)
+            if not at_risk_users:
+                return []
+
+            health_factors = {
+                user: (current_hf, predicted_hf)
+                for user, current_hf, predicted_hf in at_risk_users
+            }
+            rows = [
+                (row[0], row[1], row[2], *health_factors[row[0]], *row[3:])
+                for row in position_matrix.liquidation_candidates(list(health_factors))
+            ]
+            return self._build_liquidation_candidates(rows, updated_assets)
 
         except Exception as e:
             logger.error(
-                f"[LIQUIDATION_DETECTION_ERROR] Error calculating liquidation opportunities: {e}",
+                f"[LIQUIDATION_DETECTION_ERROR] Error simulating liquidation opportunities: {e}",
                 exc_info=True,
             )
             return []
 
+    def _build_liquidation_candidates(
+        self, rows: List[Any], updated_assets: List[str]
+    ) -> List[List[Any]]:
+        """Append updated_assets and detected_at to each candidate row and log it."""
+        liquidation_candidates = []
+
+        if rows:
+            num_users = len(set([row[0] for row in rows]))
+            logger.info(
+                f"[LIQUIDATION_DETECTION] Found {len(rows)} liquidation opportunities "
+                f"for {num_users} users with declining health factors"
+            )
+
+            for row in rows:
+                user = row[0]
+                current_hf = float(row[3])
+                predicted_hf = float(row[4])
+                profit = float(row[6])
+
+                # Convert tuple to list and append updated_assets array and timestamp
+                row_data = list(row)
+                row_data.append(updated_assets)  # Add updated_assets as the 17th field
+                row_data.append(
+                    datetime.now()
+                )  # Add detected_at timestamp as the 18th field
+                liquidation_candidates.append(row_data)
+
+                # Log individual liquidation opportunity
+                logger.info(
+                    f"[LIQUIDATION_OPPORTUNITY] User: {user} | "
+                    f"Current HF: {current_hf:.4f} → Predicted HF: {predicted_hf:.4f} | "
+                    f"Profit: ${profit:,.2f}"
+                )
+
+        return liquidation_candidates
+
     def _append_liquidation_detections(self, candidates: List[List[Any]]):
         """Append liquidation detections to ClickHouse Log table."""
         try:
@@ -0,0 +1,224 @@
+"""
+Range-sharded historical backfills for event groups.
+
+A backfill splits an event group's [from_block, to_block] into disjoint shards that
+child synchronize tasks walk concurrently. Each shard records the last block it has
+committed, the completed ranges of all shards form an interval set, and the group's
+last_synced_block only advances over the contiguous prefix of that set. A shard
+that dies therefore never lets last_synced_block skip its unsynced blocks, and
+dispatching the same group again resumes every shard where it stopped.
+
+While a backfill is active its events are skipped by the parent synchronize tasks,
+so head syncs do not walk the same range. The plan is removed once the prefix
+reaches to_block.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from decouple import config
+from django.core.cache import cache
+
+from utils.sync_scheduler import get_event_group_key
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_SHARDS = config("EVENT_BACKFILL_SHARDS", cast=int, default=8)
+BACKFILL_MIN_SHARD_BLOCKS = config(
+    "EVENT_BACKFILL_MIN_SHARD_BLOCKS", cast=int, default=10_000
+)
+
+PLAN_KEY = "event_backfill_plan_{backfill_key}"
+PROGRESS_KEY = "event_backfill_progress_{backfill_key}_{shard_index}"
+EVENT_KEY = "event_backfill_event_{model}_{event_id}"
+
+
+class IntervalSet:
+    """Disjoint, sorted, inclusive block intervals; adjacent intervals are merged."""
+
+    def __init__(self, intervals: List[Tuple[int, int]] = ()):
+        self.intervals: List[Tuple[int, int]] = []
+        for start, end in intervals:
+            self.add(start, end)
+
+    def add(self, start: int, end: int):
+        if end < start:
+            return
+        merged = []
+        for interval_start, interval_end in self.intervals:
+            if interval_end + 1 < start or end + 1 < interval_start:
+                merged.append((interval_start, interval_end))
+            else:
+                start = min(start, interval_start)
+                end = max(end, interval_end)
+        merged.append((start, end))
+        self.intervals = sorted(merged)
+
+    def contiguous_end(self, start: int) -> int:
+        """Last block b such that [start, b] is covered, or start - 1 if start is not."""
+        for interval_start, interval_end in self.intervals:
+            if interval_start <= start <= interval_end:
+                return interval_end
+        return start - 1
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return iter(self.intervals)
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+
+def get_backfill_key(event_model: Any, event_ids: List[int]) -> str:
+    return get_event_group_key(event_model, event_ids)
+
+
+def plan_shards(
+    from_block: int,
+    to_block: int,
+    shards: int = BACKFILL_SHARDS,
+    min_shard_blocks: int = BACKFILL_MIN_SHARD_BLOCKS,
+) -> List[Tuple[int, int]]:
+    """Split [from_block, to_block] into at most `shards` disjoint, contiguous ranges."""
+    blocks = to_block - from_block + 1
+    if blocks <= 0:
+        return []
+    shards = max(1, min(shards, blocks // max(min_shard_blocks, 1)))
+    size, remainder = divmod(blocks, shards)
+
+    ranges = []
+    start = from_block
+    for i in range(shards):
+        end = start + size - 1 + (1 if i < remainder else 0)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+def create_backfill(
+    event_model: Any,
+    event_ids: List[int],
+    from_block: int,
+    to_block: int,
+    shards: int = BACKFILL_SHARDS,
+) -> str:
+    """
+    Plan a backfill for an event group and mark its events as backfilling.
+    An unfinished plan for the same group is kept, so dispatching again resumes it.
+    """
+    backfill_key = get_backfill_key(event_model, event_ids)
+    plan = {
+        "model": event_model._meta.model_name,
+        "event_ids": sorted(event_ids),
+        "from_block": from_block,
+        "to_block": to_block,
+        "shards": plan_shards(from_block, to_block, shards),
+        "created_at": time.time(),
+    }
+    if cache.add(PLAN_KEY.format(backfill_key=backfill_key), plan, timeout=None):
+        for shard_index, (start, _) in enumerate(plan["shards"]):
+            cache.set(
+                PROGRESS_KEY.format(backfill_key=backfill_key, shard_index=shard_index),
+                start - 1,
+                timeout=None,
+            )
+        logger.info(
+            f"Planned backfill {backfill_key} of {len(event_ids)} events from "
+            f"{from_block} to {to_block} in {len(plan['shards'])} shards"
+        )
+    else:
+        logger.info(f"Resuming backfill {backfill_key}")
+
+    cache.set_many(
+        {
+            EVENT_KEY.format(model=plan["model"], event_id=event_id): backfill_key
+            for event_id in event_ids
+        },
+        timeout=None,
+    )
+    return backfill_key
+
+
+def get_backfill(backfill_key: str) -> Optional[Dict]:
+    return cache.get(PLAN_KEY.format(backfill_key=backfill_key))
+
+
+def get_shard_progress(backfill_key: str, plan: Dict) -> List[int]:
+    """Last committed block of every shard."""
+    keys = [
+        PROGRESS_KEY.format(backfill_key=backfill_key, shard_index=shard_index)
+        for shard_index in range(len(plan["shards"]))
+    ]
+    values = cache.get_many(keys)
+    return [values.get(key, start - 1) for key, (start, _) in zip(keys, plan["shards"])]
+
+
+def record_shard_progress(backfill_key: str, shard_index: int, block: int):
+    # Each shard has a single writer walking in block order
+    cache.set(
+        PROGRESS_KEY.format(backfill_key=backfill_key, shard_index=shard_index),
+        block,
+        timeout=None,
+    )
+
+
+def get_completed_ranges(backfill_key: str, plan: Dict) -> IntervalSet:
+    progress = get_shard_progress(backfill_key, plan)
+    return IntervalSet(
+        (start, last_block) for (start, _), last_block in zip(plan["shards"], progress)
+    )
+
+
+def advance_last_synced_block(event_model: Any, backfill_key: str) -> Optional[int]:
+    """
+    Move the group's last_synced_block to the end of the contiguous completed
+    prefix and finish the backfill once it reaches to_block. The update only ever
+    moves last_synced_block forward, so concurrent shards can call it freely.
+    """
+    plan = get_backfill(backfill_key)
+    if plan is None:
+        return None
+
+    completed = get_completed_ranges(backfill_key, plan)
+    prefix_end = completed.contiguous_end(plan["from_block"])
+    if prefix_end >= plan["from_block"]:
+        event_model.objects.filter(
+            id__in=plan["event_ids"], last_synced_block__lt=prefix_end
+        ).update(last_synced_block=prefix_end)
+
+    if prefix_end >= plan["to_block"]:
+        clear_backfill(backfill_key, plan)
+        logger.info(
+            f"Backfill {backfill_key} completed from {plan['from_block']} "
+            f"to {plan['to_block']}"
+        )
+    return prefix_end
+
+
+def clear_backfill(backfill_key: str, plan: Optional[Dict] = None):
+    plan = plan or get_backfill(backfill_key)
+    if plan is None:
+        return
+    cache.delete_many(
+        [PLAN_KEY.format(backfill_key=backfill_key)]
+        + [
+            PROGRESS_KEY.format(backfill_key=backfill_key, shard_index=shard_index)
+            for shard_index in range(len(plan["shards"]))
+        ]
+        + [
+            EVENT_KEY.format(model=plan["model"], event_id=event_id)
+            for event_id in plan["event_ids"]
+        ]
+    )
+
+
+def get_backfilling_event_ids(event_model: Any, event_ids: List[int]) -> Dict[int, str]:
+    """Backfill key of every given event that belongs to an active backfill."""
+    model = event_model._meta.model_name
+    keys = {
+        EVENT_KEY.format(model=model, event_id=event_id): event_id
+        for event_id in event_ids
+    }
+    return {
+        keys[key]: backfill_key for key, backfill_key in cache.get_many(keys).items()
+    }
@@ -1,18 +1,22 @@
 import logging
+import os
 import threading
 import time
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 import clickhouse_connect
+from clickhouse_connect.driver.exceptions import OperationalError
+from clickhouse_connect.driver.httputil import get_pool_manager
 from decouple import config
 
 from blockchains.models import Event
+from utils.clickhouse import merge_scheduler
 
 logger = logging.getLogger(__name__)
 
 
 class ClickHouseClient:
-    def __init__(self):
+    def __init__(self, pooled: Optional[bool] = None):
         logger.info("Initializing ClickHouse client")
         self._lock = threading.Lock()
         self._connection_config = {
@@ -23,24 +27,99 @@ class ClickHouseClient:
             "verify": False,
             "connect_timeout": 10,
             "send_receive_timeout": 30,
-            "pool_mgr": None,  # Disable connection pooling to avoid session conflicts
         }
         self.network_name = config("NETWORK_NAME")
         self.protocol_name = config("PROTOCOL_NAME")
         self.db_name = f"{self.protocol_name}_{self.network_name}"
 
-        logger.info("ClickHouse client initialized successfully")
+        # Pooled mode shares one sessionless client across threads. Without a
+        # session_id ClickHouse never serialises queries, so SESSION_IS_LOCKED
+        # cannot occur and the global lock is no longer needed.
+        self.pooled = (
+            config("CLICKHOUSE_POOLED", cast=bool, default=True)
+            if pooled is None
+            else pooled
+        )
+        self.pool_size = config("CLICKHOUSE_POOL_SIZE", cast=int, default=8)
+        self._pool_mgr = None
+        self._shared_client = None
+        self._owner_pid = os.getpid()
+        self.merge_scheduler_enabled = config(
+            "CLICKHOUSE_MERGE_SCHEDULER", cast=bool, default=True
+        )
+        # Blocks per event table partition (~5 months of Ethereum mainnet)
+        self.event_partition_blocks = config(
+            "CLICKHOUSE_EVENT_PARTITION_BLOCKS", cast=int, default=1_000_000
+        )
+
+        logger.info(
+            f"ClickHouse client initialized successfully "
+            f"(pooled={self.pooled}, pool_size={self.pool_size})"
+        )
 
     def _get_client(self):
         """Get a fresh client connection for each operation to avoid session locking"""
         return clickhouse_connect.get_client(**self._connection_config)
 
+    def _get_shared_client(self):
+        """
+        Get the process-wide sessionless client backed by a bounded connection pool.
+        The pool blocks once `pool_size` connections are checked out, which caps
+        the number of concurrent HTTP requests made against ClickHouse.
+        """
+        if self._owner_pid != os.getpid():
+            # Forked worker (celery prefork), never reuse the parent's sockets
+            self._lock = threading.Lock()
+            self._shared_client = None
+            self._pool_mgr = None
+            self._owner_pid = os.getpid()
+
+        client = self._shared_client
+        if client is not None:
+            return client
+
+        with self._lock:
+            if self._shared_client is None:
+                if self._pool_mgr is None:
+                    self._pool_mgr = get_pool_manager(
+                        verify=self._connection_config["verify"],
+                        maxsize=self.pool_size,
+                        num_pools=1,
+                        block=True,
+                    )
+                self._shared_client = clickhouse_connect.get_client(
+                    **self._connection_config,
+                    pool_mgr=self._pool_mgr,
+                    autogenerate_session_id=False,
+                )
+            return self._shared_client
+
+    def _reset_shared_client(self):
+        """Drop the shared client so the next operation reconnects."""
+        with self._lock:
+            client, self._shared_client = self._shared_client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def close(self):
+        """Close the shared client and release pooled connections."""
+        self._reset_shared_client()
+        if self._pool_mgr is not None:
+            self._pool_mgr.clear()
+            self._pool_mgr = None
+
     def _execute_with_retry(self, operation, max_retries=3, retry_delay=1):
-        """Execute an operation with retry logic for session lock errors"""
+        """Execute an operation with retry logic for session lock and connection errors"""
         last_exception = None
 
         for attempt in range(max_retries):
             try:
+                if self.pooled:
+                    return operation(self._get_shared_client())
+
                 with self._lock:
                     client = self._get_client()
                     result = operation(client)
@@ -50,6 +129,19 @@ class ClickHouseClient:
                 last_exception = e
                 error_str = str(e)
 
+                # Connection level failure in pooled mode, rebuild the shared client
+                if self.pooled and isinstance(e, OperationalError):
+                    if attempt < max_retries - 1:
+                        wait_time = retry_delay * (2**attempt)
+                        logger.warning(
+                            f"ClickHouse connection error, retrying in {wait_time}s "
+                            f"(attempt {attempt + 1}/{max_retries}): {e}"
+                        )
+                        self._reset_shared_client()
+                        time.sleep(wait_time)
+                        continue
+                    raise
+
                 # Check if it's a session lock error
                 if "SESSION_IS_LOCKED" in error_str or "373" in error_str:
                     if attempt < max_retries - 1:
@@ -111,9 +203,55 @@ class ClickHouseClient:
         except Exception as e:
             logger.error(f"Error creating table {table_name}: {e}")
 
+    def get_event_table_ddl(
+        self,
+        table_name: str,
+        columns: List[Tuple[str, str]],
+        address_columns: List[str],
+    ) -> str:
+        """
+        ReplacingMergeTree DDL for an event table. Rows are ordered by log position and
+        partitioned by block range, so block range scans only read the parts they
+        need, and address columns get bloom filter skip indexes for per-user lookups.
+
+        The sorting key ends in (logIndex, transactionHash), so a log written twice
+        collapses to one row on merge, and retried insert blocks are dropped by
+        the non-replicated deduplication window.
+        """
+        columns_str = ", ".join(f'"{name}" {type}' for name, type in columns)
+        indexes_str = "".join(
+            f', INDEX "idx_{name}" "{name}" TYPE bloom_filter(0.01) GRANULARITY 4'
+            for name in address_columns
+        )
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.db_name}.{table_name} "
+            f"({columns_str}{indexes_str}) "
+            f"ENGINE = ReplacingMergeTree "
+            f"PARTITION BY intDiv(blockNumber, {self.event_partition_blocks}) "
+            f"ORDER BY (blockNumber, transactionIndex, logIndex, transactionHash) "
+            f"SETTINGS non_replicated_deduplication_window = 1000"
+        )
+
     def create_event_table(self, event: Event):
-        columns = event._get_clickhouse_columns()
-        self.create_table(event.name, columns)
+        try:
+            logger.info(
+                f"Creating event table {event.name} in database {self.db_name} if it doesn't exist"
+            )
+            ddl = self.get_event_table_ddl(
+                event.name,
+                event._get_clickhouse_columns(),
+                event._get_clickhouse_address_columns(),
+            )
+
+            def operation(client):
+                return client.command(ddl)
+
+            result = self._execute_with_retry(operation)
+            logger.info(
+                f"Table {event.name} created successfully with status: {result}"
+            )
+        except Exception as e:
+            logger.error(f"Error creating table {event.name}: {e}")
 
     def insert_rows(self, table_name: str, rows: List[Dict]):
         logger.info(f"Inserting {len(rows)} rows into table {table_name}")
@@ -130,6 +268,20 @@ class ClickHouseClient:
     def insert_event_logs(self, event: Event, rows: List[Dict]):
         self.insert_rows(event.name, rows)
 
+    def get_event_log_keys(
+        self, table_name: str, from_block: int, to_block: int
+    ) -> Set[Tuple[str, int]]:
+        """(transactionHash, logIndex) of the rows already stored for a block range."""
+        result = self.execute_query(
+            f"""
+            SELECT transactionHash, logIndex
+            FROM {self.db_name}.{table_name}
+            WHERE blockNumber BETWEEN %(from_block)s AND %(to_block)s
+            """,
+            parameters={"from_block": from_block, "to_block": to_block},
+        )
+        return {(row[0], row[1]) for row in result.result_rows}
+
     def select_rows(self, table_name):
         query = f"SELECT * FROM {self.db_name}.{table_name}"
 
@@ -150,6 +302,26 @@ class ClickHouseClient:
 
         return self._execute_with_retry(operation)
 
+    def stream_query(
+        self, query: str, parameters: Dict = None, settings: Dict = None
+    ) -> Iterator[List[tuple]]:
+        """
+        Yield the result of a query in row blocks as they arrive from the server.
+        Runs on a dedicated sessionless connection so a long-lived stream neither
+        holds a pooled connection nor the non-pooled session lock.
+        """
+        client = clickhouse_connect.get_client(
+            **self._connection_config, autogenerate_session_id=False
+        )
+        try:
+            with client.query_row_block_stream(
+                query, parameters=parameters, settings=settings
+            ) as stream:
+                for block in stream:
+                    yield block
+        finally:
+            client.close()
+
     def truncate_table(self, table_name: str):
         """Truncate a table (remove all rows but keep structure)"""
         try:
@@ -214,9 +386,10 @@ class ClickHouseClient:
                     logger.info(
                         f"Deleted records from {table_name} for {len(asset_source_pairs)} asset-source pairs"
                     )
-                    time.sleep(
-                        0.5
-                    )  # Add delay between operations to prevent session conflicts
+                    if not self.pooled:
+                        time.sleep(
+                            0.5
+                        )  # Add delay between operations to prevent session conflicts
                 else:
                     logger.info(
                         f"Skipping {table_name} (type: {table_type}) - views are computed"
@@ -230,55 +403,69 @@ class ClickHouseClient:
         logger.info(f"Oracle records deletion completed. Results: {deleted_counts}")
         return deleted_counts
 
-    def optimize_table(self, table_name: str):
-        if table_name in [
-            "CollateralConfigurationChanged",
-            "EModeAssetCategoryChanged",
-            "EModeCategoryAdded",
-            "AssetSourceUpdated",
-            "TokenMetadata",
-            "AssetSourceTokenMetadata",
-            "NetworkBlockInfo",
-            "Balances_v2",
-        ]:
-
-            def operation(client):
-                return client.command(
-                    f"OPTIMIZE TABLE {self.db_name}.Latest{table_name} FINAL;"
-                )
-
-            self._execute_with_retry(operation)
-            logger.info(f"Optimized table {table_name} in database {self.db_name}")
-
-        if table_name in [
-            "EventRawNumerator",
-            "EventRawDenominator",
-            "EventRawMaxCap",
-            "EventRawMultiplier",
-            "TransactionRawNumerator",
-            "TransactionRawMultiplier",
-        ]:
-
-            def operation(client):
-                return client.command(
-                    f"OPTIMIZE TABLE {self.db_name}.PriceLatest{table_name} FINAL;"
-                )
-
-            self._execute_with_retry(operation)
-            logger.info(f"Optimized table {table_name} in database {self.db_name}")
+    # Event or raw table name -> ReplacingMergeTree table that deduplicates it
+    OPTIMIZE_TARGETS = {
+        **{
+            table_name: f"Latest{table_name}"
+            for table_name in [
+                "CollateralConfigurationChanged",
+                "EModeAssetCategoryChanged",
+                "EModeCategoryAdded",
+                "AssetSourceUpdated",
+                "TokenMetadata",
+                "AssetSourceTokenMetadata",
+                "NetworkBlockInfo",
+                "Balances_v2",
+            ]
+        },
+        **{
+            table_name: f"PriceLatest{table_name}"
+            for table_name in [
+                "EventRawNumerator",
+                "EventRawDenominator",
+                "EventRawMaxCap",
+                "EventRawMultiplier",
+                "TransactionRawNumerator",
+                "TransactionRawMultiplier",
+            ]
+        },
+        "CollateralLiquidityIndex": "CollateralLiquidityIndex",
+        "DebtLiquidityIndex": "DebtLiquidityIndex",
+        "LatestBalances_v2": "LatestBalances_v2",
+    }
 
-        if table_name in [
-            "CollateralLiquidityIndex",
-            "DebtLiquidityIndex",
-        ]:
+    def optimize_table(self, table_name: str):
+        """
+        Request a FINAL merge of the table deduplicating `table_name`.
+        With the merge scheduler enabled the merge is debounced and run off the
+        calling path, otherwise it runs immediately.
+        """
+        target = self.OPTIMIZE_TARGETS.get(table_name)
+        if target is None:
+            return
 
-            def operation(client):
-                return client.command(
-                    f"OPTIMIZE TABLE {self.db_name}.{table_name} FINAL;"
-                )
+        if self.merge_scheduler_enabled:
+            merge_scheduler.request_merge(target)
+        else:
+            self.optimize_table_now(target)
 
-            self._execute_with_retry(operation)
-            logger.info(f"Optimized table {table_name} in database {self.db_name}")
+    def optimize_table_now(self, target: str):
+        def operation(client):
+            return client.command(f"OPTIMIZE TABLE {self.db_name}.{target} FINAL;")
+
+        self._execute_with_retry(operation)
+        logger.info(f"Optimized table {target} in database {self.db_name}")
+
+    def get_active_parts(self) -> Dict[str, int]:
+        """Number of active parts per table in the database."""
+        query = f"""
+        SELECT table, count() AS parts
+        FROM system.parts
+        WHERE database = '{self.db_name}' AND active
+        GROUP BY table
+        """
+        result = self.execute_query(query)
+        return {row[0]: row[1] for row in result.result_rows}
 
 
 clickhouse_client = ClickHouseClient()
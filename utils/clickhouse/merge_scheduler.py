@@ -0,0 +1,132 @@
+"""
+Debounced OPTIMIZE ... FINAL scheduling for ReplacingMergeTree tables.
+
+Ingestion only records that a table needs merging. The first request for a table
+schedules ScheduledMergeTask after CLICKHOUSE_MERGE_INTERVAL_SECONDS, and every
+request arriving before it runs is coalesced into that single merge. A periodic
+sweep (ScheduledMergeTask without arguments, registered in celery beat) also merges
+any table whose active part count reaches CLICKHOUSE_MERGE_PARTS_THRESHOLD.
+
+Readers that need deduplicated rows must query with FINAL (or argMax), since a
+table may hold unmerged versions for up to one merge interval.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from decouple import config
+from django.core.cache import cache
+
+from liquidations_v2.celery_app import app
+
+logger = logging.getLogger(__name__)
+
+MERGE_INTERVAL_SECONDS = config(
+    "CLICKHOUSE_MERGE_INTERVAL_SECONDS", cast=int, default=30
+)
+MERGE_PARTS_THRESHOLD = config("CLICKHOUSE_MERGE_PARTS_THRESHOLD", cast=int, default=50)
+MERGE_LOCK_TIMEOUT = 60 * 30  # 30 minutes
+
+MERGE_TASK_NAME = "blockchains.tasks.ScheduledMergeTask"
+
+PENDING_KEY = "clickhouse_merge_pending_{table_name}"
+REQUESTS_KEY = "clickhouse_merge_requests_{table_name}"
+LOCK_KEY = "clickhouse_merge_lock_{table_name}"
+METRICS_KEY = "clickhouse_merge_metrics_{table_name}"
+
+
+def request_merge(table_name: str):
+    """Mark a table as needing a merge, scheduling one if none is pending."""
+    if cache.add(PENDING_KEY.format(table_name=table_name), time.time(), timeout=None):
+        app.send_task(
+            MERGE_TASK_NAME,
+            kwargs={"table_name": table_name},
+            countdown=MERGE_INTERVAL_SECONDS,
+        )
+        logger.debug(f"Scheduled merge of {table_name} in {MERGE_INTERVAL_SECONDS}s")
+
+    requests_key = REQUESTS_KEY.format(table_name=table_name)
+    cache.add(requests_key, 0, timeout=None)
+    try:
+        cache.incr(requests_key)
+    except ValueError:
+        # Key was consumed by a merge between add and incr
+        cache.add(requests_key, 1, timeout=None)
+
+
+def get_pending_request(table_name: str) -> Optional[float]:
+    """Timestamp of the oldest uncoalesced request for a table, if any."""
+    return cache.get(PENDING_KEY.format(table_name=table_name))
+
+
+def acquire_merge_lock(table_name: str) -> bool:
+    return cache.add(
+        LOCK_KEY.format(table_name=table_name), "locked", MERGE_LOCK_TIMEOUT
+    )
+
+
+def release_merge_lock(table_name: str):
+    cache.delete(LOCK_KEY.format(table_name=table_name))
+
+
+def pop_pending_requests(table_name: str) -> Tuple[Optional[float], int]:
+    """
+    Claim all pending requests for a table before merging it.
+    Requests arriving after this call schedule a new merge.
+    """
+    pending_key = PENDING_KEY.format(table_name=table_name)
+    requests_key = REQUESTS_KEY.format(table_name=table_name)
+    values = cache.get_many([pending_key, requests_key])
+    cache.delete_many([pending_key, requests_key])
+    return values.get(pending_key), values.get(requests_key) or 0
+
+
+def record_merge(
+    table_name: str,
+    requested_at: Optional[float],
+    requests: int,
+    parts: int,
+    started_at: float,
+    finished_at: float,
+    reason: str,
+):
+    lag = finished_at - requested_at if requested_at else 0.0
+    metrics = {
+        "requested_at": requested_at,
+        "merged_at": finished_at,
+        "lag_seconds": lag,
+        "duration_seconds": finished_at - started_at,
+        "coalesced_requests": requests,
+        "parts_before": parts,
+        "reason": reason,
+    }
+    cache.set(METRICS_KEY.format(table_name=table_name), metrics, timeout=None)
+    logger.info(
+        f"Merged {table_name} ({reason}): {requests} requests coalesced, "
+        f"{parts} parts, lag {lag:.1f}s, took {metrics['duration_seconds']:.1f}s"
+    )
+
+
+def get_merge_metrics(tables: List[str], active_parts: Dict[str, int]) -> List[Dict]:
+    """Current merge lag and last merge statistics for each table."""
+    now = time.time()
+    rows = []
+    for table_name in tables:
+        requested_at = get_pending_request(table_name)
+        last_merge = cache.get(METRICS_KEY.format(table_name=table_name)) or {}
+        rows.append(
+            {
+                "table": table_name,
+                "active_parts": active_parts.get(table_name, 0),
+                "pending_lag_seconds": now - requested_at if requested_at else 0.0,
+                "pending_requests": cache.get(
+                    REQUESTS_KEY.format(table_name=table_name), 0
+                ),
+                "last_merged_at": last_merge.get("merged_at"),
+                "last_lag_seconds": last_merge.get("lag_seconds"),
+                "last_duration_seconds": last_merge.get("duration_seconds"),
+                "last_coalesced_requests": last_merge.get("coalesced_requests"),
+            }
+        )
+    return rows
@@ -31,3 +31,65 @@ NETWORK_RPC = config("NETWORK_RPC")
 NETWORK_WSS = config("NETWORK_WSS")
 
 PRICE_CACHE_EXPIRY = 60  # 1 minute
+
+# Number of block windows prefetched ahead of the insert stage (0 disables pipelining)
+EVENT_SYNC_PIPELINE_DEPTH = config("EVENT_SYNC_PIPELINE_DEPTH", cast=int, default=0)
+
+# Decode event logs straight into ClickHouse rows instead of web3 AttributeDicts
+EVENT_SYNC_DECODE_ROWS = config("EVENT_SYNC_DECODE_ROWS", cast=bool, default=True)
+
+# Skip logs whose (transactionHash, logIndex) is already stored for the synced window
+EVENT_SYNC_DEDUPLICATE = config("EVENT_SYNC_DEDUPLICATE", cast=bool, default=True)
+
+# listen_blocks ingests each new head from eth_getBlockReceipts, falling back to the
+# parent range syncs only when events lag behind or the block fails
+TIP_INGESTION_ENABLED = config("TIP_INGESTION_ENABLED", cast=bool, default=False)
+
+# Parent syncs merge event groups whose last_synced_block are within this many blocks
+# into one child run with a single combined eth_getLogs filter (0 = exact buckets)
+EVENT_SYNC_MERGE_LAG_BLOCKS = config(
+    "EVENT_SYNC_MERGE_LAG_BLOCKS", cast=int, default=1_000
+)
+
+# Pack eth_call batches into Multicall3 aggregate3 calls (same address on all EVM chains)
+MULTICALL_ENABLED = config("MULTICALL_ENABLED", cast=bool, default=False)
+
+MULTICALL3_ADDRESS = config(
+    "MULTICALL3_ADDRESS", default="0xcA11bde05977b3631167028862bE2a173976CA11"
+)
+
+# View calls packed into a single aggregate3 eth_call
+MULTICALL_BATCH_SIZE = config("MULTICALL_BATCH_SIZE", cast=int, default=500)
+
+# Users per get_scaled_balance request
+ETH_CALL_BATCH_SIZE = config(
+    "ETH_CALL_BATCH_SIZE", cast=int, default=5000 if MULTICALL_ENABLED else 100
+)
+
+# Concurrent eth_call batches in flight per RPC executor
+RPC_EXECUTOR_CONCURRENCY = config("RPC_EXECUTOR_CONCURRENCY", cast=int, default=4)
+
+# Metered eth_calls per second allowed per RPC executor (0 disables rate limiting)
+RPC_EXECUTOR_RATE_LIMIT = config("RPC_EXECUTOR_RATE_LIMIT", cast=float, default=200)
+
+# User/asset pairs per backfill checkpoint and insert block
+BACKFILL_CHECKPOINT_SIZE = config("BACKFILL_CHECKPOINT_SIZE", cast=int, default=5000)
+
+# Stream user/asset pairs from ClickHouse into balance backfills instead of a CSV export
+BACKFILL_STREAMING = config("BACKFILL_STREAMING", cast=bool, default=True)
+
+# User/asset pairs per keyset page of a streaming balance backfill query
+BACKFILL_STREAM_PAGE_SIZE = config(
+    "BACKFILL_STREAM_PAGE_SIZE", cast=int, default=100_000
+)
+
+# Full rebuild interval of LatestBalances_v2_Memory, windows in between apply only touched pairs
+LATEST_BALANCES_MEMORY_REBUILD_SECONDS = config(
+    "LATEST_BALANCES_MEMORY_REBUILD_SECONDS", cast=int, default=3600
+)
+
+# Interval at which mempool listeners reload their in-memory transmitter and
+# authorized sender allow-lists from the cache
+WEBSOCKET_ALLOW_LIST_REFRESH_SECONDS = config(
+    "WEBSOCKET_ALLOW_LIST_REFRESH_SECONDS", cast=float, default=5.0
+)
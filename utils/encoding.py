@@ -1,10 +1,15 @@
-from typing import Any, Dict, Union
+import re
+from typing import Any, Dict, List, Tuple, Union
 
 from eth_abi import decode, encode
 from eth_utils import keccak
 from hexbytes import HexBytes
+from web3 import Web3
+from web3._utils.events import get_event_data
 from web3.datastructures import AttributeDict
 
+STATIC_WORD_TYPE = re.compile(r"^(u?int\d*|address|bool|bytes([1-9]|[12]\d|3[0-2]))$")
+
 
 def get_signature(event_abi: Dict[str, Any]) -> str:
     """
@@ -178,3 +183,128 @@ def get_decoded_params(function_abi: dict, result: str) -> dict:
 
 def get_short_hex(hex_str: str) -> str:
     return hex_str[:6] + "..." + hex_str[-4:]
+
+
+def _word_decoder(abi_type: str, indexed: bool = False):
+    """Return a function decoding one 32-byte ABI word into its `decode_any` form."""
+    if indexed and not STATIC_WORD_TYPE.match(abi_type):
+        # Indexed dynamic values are stored as their keccak hash
+        return lambda word: "0x" + word.hex()
+    if abi_type.startswith("uint"):
+        return lambda word: int.from_bytes(word, "big")
+    if abi_type.startswith("int"):
+        return lambda word: int.from_bytes(word, "big", signed=True)
+    if abi_type == "address":
+        return lambda word: "0x" + word[12:].hex()
+    if abi_type == "bool":
+        return lambda word: int(any(word))
+    size = int(abi_type[len("bytes") :])
+    return lambda word: "0x" + word[:size].hex()
+
+
+class EventLogDecoder:
+    """
+    Precompiled decoder for a single event ABI.
+
+    Turns a raw eth_getLogs entry into a flat tuple in ClickHouse column order:
+    event args in ABI order, followed by address, blockNumber, transactionHash,
+    transactionIndex, logIndex and blockTimestamp. Values are identical to
+    `decode_any(get_event_data(...))`, but indexed topics and static data words
+    are sliced directly instead of going through web3 and nested AttributeDicts.
+    ABIs with dynamic non-indexed inputs fall back to the web3 decoder per log.
+    """
+
+    def __init__(self, event_abi: Dict[str, Any]):
+        self.event_abi = event_abi
+        self.arg_names = [row["name"] for row in event_abi["inputs"]]
+        self.topics_count = 1 + sum(1 for row in event_abi["inputs"] if row["indexed"])
+        self.is_static = all(
+            row["indexed"] or STATIC_WORD_TYPE.match(row["type"])
+            for row in event_abi["inputs"]
+        )
+
+        # (source, position, decoder) per input, source is "topic" or "data"
+        self.fields = []
+        topic_position, data_position = 1, 0
+        for row in event_abi["inputs"] if self.is_static else []:
+            if row["indexed"]:
+                self.fields.append(
+                    ("topic", topic_position, _word_decoder(row["type"], indexed=True))
+                )
+                topic_position += 1
+            else:
+                self.fields.append(("data", data_position, _word_decoder(row["type"])))
+                data_position += 32
+        self.data_size = data_position
+        self._codec = None
+
+    def decode(self, log: Dict[str, Any], block_timestamp: int) -> Tuple:
+        if self.is_static:
+            args = self._decode_args(log)
+        else:
+            args = self._decode_args_with_web3(log)
+
+        return args + (
+            log["address"].lower(),
+            log["blockNumber"],
+            decode_hex(log["transactionHash"]),
+            log["transactionIndex"],
+            log["logIndex"],
+            block_timestamp,
+        )
+
+    def _decode_args(self, log: Dict[str, Any]) -> Tuple:
+        topics = log["topics"]
+        data = bytes(log["data"])
+        if len(topics) != self.topics_count or len(data) < self.data_size:
+            raise ValueError(
+                f"Log {decode_hex(log['transactionHash'])}:{log['logIndex']} "
+                f"does not match event {self.event_abi['name']}"
+            )
+
+        values = []
+        for source, position, decoder in self.fields:
+            if source == "topic":
+                values.append(decoder(bytes(topics[position])))
+            else:
+                values.append(decoder(data[position : position + 32]))
+        return tuple(values)
+
+    def _decode_args_with_web3(self, log: Dict[str, Any]) -> Tuple:
+        if self._codec is None:
+            self._codec = Web3().codec
+        event_args = decode_any(get_event_data(self._codec, self.event_abi, log)).args
+        return tuple(getattr(event_args, name) for name in self.arg_names)
+
+
+_event_log_decoders: Dict[str, EventLogDecoder] = {}
+
+
+def get_event_log_decoder(topic_0: str, event_abi: Dict[str, Any]) -> EventLogDecoder:
+    """Return the cached decoder for a topic, compiling it on first use."""
+    decoder = _event_log_decoders.get(topic_0)
+    if decoder is None or decoder.event_abi != event_abi:
+        decoder = EventLogDecoder(event_abi)
+        _event_log_decoders[topic_0] = decoder
+    return decoder
+
+
+def decode_event_rows(
+    raw_event_dicts: List[Dict[str, Any]],
+    event_abis: Dict[str, Any],
+    timestamps: Dict[int, int],
+) -> Dict[str, List[Tuple]]:
+    """Decode raw logs into ClickHouse rows grouped by topic_0."""
+    event_rows = {}
+    for log in raw_event_dicts:
+        topic0 = f"0x{log['topics'][0].hex()}"
+        event_abi = event_abis.get(topic0)
+        if not event_abi:
+            continue
+        decoder = get_event_log_decoder(topic0, event_abi)
+        if topic0 not in event_rows:
+            event_rows[topic0] = []
+        event_rows[topic0].append(
+            decoder.decode(log, timestamps[int(log["blockNumber"])])
+        )
+    return event_rows
@@ -7,6 +7,11 @@ from eth_abi import decode, encode
 from eth_utils import keccak
 
 from oracles.contracts.utils import RpcCacheStorage
+from utils.constants import MULTICALL3_ADDRESS, MULTICALL_BATCH_SIZE, MULTICALL_ENABLED
+from utils.interfaces.executor import RpcRateLimitError
+
+AGGREGATE3_SIGNATURE = "aggregate3((address,bool,bytes)[])"
+AGGREGATE3_SELECTOR = keccak(text=AGGREGATE3_SIGNATURE)[:4]
 
 
 class BaseContractInterface:
@@ -15,6 +20,11 @@ class BaseContractInterface:
     batch RPC calls, ABI management, and result decoding.
     """
 
+    use_multicall = MULTICALL_ENABLED
+    multicall_address = MULTICALL3_ADDRESS
+    multicall_batch_size = MULTICALL_BATCH_SIZE
+    rpc_executor = None
+
     def __init__(self, contract_address: str):
         """
         Initialize the interface with a contract address.
@@ -47,6 +57,9 @@ class BaseContractInterface:
         Raises:
             RuntimeError: If the batch request fails
         """
+        if self.rpc_executor is not None:
+            return self.rpc_executor.post(batch)
+
         headers = {"Content-Type": "application/json"}
         try:
             response = requests.post(
@@ -125,9 +138,102 @@ class BaseContractInterface:
         Returns:
             List of RPC responses
         """
+        if self.use_multicall and len(call_targets) > 1:
+            return self.multicall_eth_call(call_targets)
         batch = self.prepare_eth_call_batch(call_targets)
         return self._make_batch_request(batch)
 
+    def prepare_multicall_batch(self, call_targets: List[dict]) -> List[dict]:
+        """
+        Packs call targets into Multicall3 aggregate3 eth_call requests of at most
+        multicall_batch_size calls each, with allowFailure set on every call.
+
+        Args:
+            call_targets: List of call target dictionaries
+
+        Returns:
+            List of JSON-RPC request objects, one per aggregate3 call
+        """
+        batch = []
+        for i in range(0, len(call_targets), self.multicall_batch_size):
+            calls = [
+                (
+                    call.get("to", self.contract_address),
+                    True,
+                    keccak(text=call["method_signature"])[:4]
+                    + encode(call["param_types"], call["params"]),
+                )
+                for call in call_targets[i : i + self.multicall_batch_size]
+            ]
+            calldata = AGGREGATE3_SELECTOR + encode(["(address,bool,bytes)[]"], [calls])
+            batch.append(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "eth_call",
+                    "params": [
+                        {"to": self.multicall_address, "data": "0x" + calldata.hex()},
+                        "latest",
+                    ],
+                    "id": len(batch),
+                }
+            )
+        return batch
+
+    def multicall_eth_call(self, call_targets: List[dict]) -> List[dict]:
+        """
+        Executes call targets through Multicall3 aggregate3.
+
+        Results are unpacked into the same per-call JSON-RPC responses returned by
+        the plain eth_call batch, in call target order. Calls that revert inside
+        the aggregate, or whose aggregate call fails as a whole, are retried as
+        individual eth_calls so their responses match the plain batch exactly.
+
+        Args:
+            call_targets: List of call target dictionaries
+
+        Returns:
+            List of RPC responses
+        """
+        responses = [None] * len(call_targets)
+        batch = self.prepare_multicall_batch(call_targets)
+        try:
+            raw_results = self._make_batch_request(batch)
+        except RpcRateLimitError:
+            raise
+        except RuntimeError:
+            raw_results = []
+        if not isinstance(raw_results, list):
+            raw_results = []
+
+        for rpc_result in raw_results:
+            offset = rpc_result.get("id", 0) * self.multicall_batch_size
+            result_value = rpc_result.get("result")
+            if not result_value or result_value == "0x":
+                continue
+            try:
+                (results,) = decode(["(bool,bytes)[]"], bytes.fromhex(result_value[2:]))
+            except Exception:
+                continue
+            for j, (success, return_data) in enumerate(results):
+                if success and offset + j < len(responses):
+                    responses[offset + j] = {
+                        "jsonrpc": "2.0",
+                        "id": offset + j,
+                        "result": "0x" + return_data.hex(),
+                    }
+
+        failed = [i for i, response in enumerate(responses) if response is None]
+        if failed:
+            fallback = self._make_batch_request(
+                self.prepare_eth_call_batch([call_targets[i] for i in failed])
+            )
+            if not isinstance(fallback, list):
+                return fallback
+            for rpc_result in fallback:
+                i = failed[rpc_result.get("id", 0)]
+                responses[i] = {**rpc_result, "id": i}
+        return responses
+
     def get_abi_method(self, method_name: str) -> Dict:
         """
         Returns the ABI entry for a method by name.
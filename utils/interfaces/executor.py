@@ -0,0 +1,229 @@
+"""
+Shared JSON-RPC executor for bulk eth_call workloads such as balance backfills.
+
+A single executor owns a keep-alive requests.Session sized for its worker pool, a
+token bucket limiting metered calls per second, and an adaptive batch size that is
+halved whenever the provider rate limits (HTTP 429 / -32005) and grown back slowly
+on success. Contract interfaces are bound to it with RpcExecutor.bind, after which
+their batch_eth_call requests go through the executor.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.constants import (
+    ETH_CALL_BATCH_SIZE,
+    NETWORK_RPC,
+    RPC_EXECUTOR_CONCURRENCY,
+    RPC_EXECUTOR_RATE_LIMIT,
+)
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ERROR_CODES = {-32005, -32029, 429}
+
+
+class RpcRateLimitError(RuntimeError):
+    """Raised when the provider rejects a request for exceeding its limits."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        if self.rate <= 0:
+            return
+        # Requests larger than the bucket would never fit, let them drain it instead
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait_seconds = (tokens - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+class RpcExecutor:
+    """
+    Runs batched eth_calls over a pooled session with bounded concurrency,
+    rate limiting and adaptive batch sizing.
+    """
+
+    def __init__(
+        self,
+        rpc_url: Optional[str] = None,
+        concurrency: int = RPC_EXECUTOR_CONCURRENCY,
+        rate_limit: float = RPC_EXECUTOR_RATE_LIMIT,
+        batch_size: int = ETH_CALL_BATCH_SIZE,
+        min_batch_size: int = 10,
+        timeout: int = 20,
+    ):
+        self.rpc_url = rpc_url or NETWORK_RPC
+        self.concurrency = max(1, concurrency)
+        self.bucket = TokenBucket(rate_limit)
+        self.max_batch_size = batch_size
+        self.min_batch_size = min(min_batch_size, batch_size)
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.rate_limited = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.concurrency * 2, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def bind(self, interface):
+        """Route an interface's RPC batches through this executor."""
+        interface.rpc_url = self.rpc_url
+        interface.rpc_executor = self
+        return interface
+
+    def post(self, batch: List[dict]) -> Any:
+        """
+        Send a JSON-RPC batch over the pooled session.
+
+        Raises:
+            RpcRateLimitError: If the provider rate limits the batch or any call in it
+            RuntimeError: If the batch request fails otherwise
+        """
+        self.bucket.acquire(len(batch))
+        try:
+            response = self.session.post(self.rpc_url, json=batch, timeout=self.timeout)
+        except Exception as e:
+            raise RuntimeError(f"Batch RPC request failed: {e}")
+
+        if response.status_code == 429:
+            raise RpcRateLimitError("Batch RPC request rate limited (HTTP 429)")
+        try:
+            response.raise_for_status()
+            results = response.json()
+        except Exception as e:
+            raise RuntimeError(f"Batch RPC request failed: {e}")
+
+        for result in results if isinstance(results, list) else [results]:
+            error = result.get("error") if isinstance(result, dict) else None
+            if error and self.is_rate_limit_error(error):
+                raise RpcRateLimitError(
+                    f"Batch RPC request rate limited: {error.get('message')}"
+                )
+        return results
+
+    @staticmethod
+    def is_rate_limit_error(error: Dict) -> bool:
+        message = str(error.get("message", "")).lower()
+        return (
+            error.get("code") in RATE_LIMIT_ERROR_CODES
+            or "rate limit" in message
+            or "too many requests" in message
+        )
+
+    def _shrink_batch_size(self, size: int):
+        with self.lock:
+            self.rate_limited += 1
+            self.batch_size = max(self.min_batch_size, min(self.batch_size, size // 2))
+            logger.warning(f"RPC rate limited, batch size reduced to {self.batch_size}")
+
+    def _grow_batch_size(self):
+        with self.lock:
+            self.batch_size = min(
+                self.max_batch_size,
+                self.batch_size + max(1, self.batch_size // 10),
+            )
+
+    def call_in_batches(
+        self, items: List[Any], fn: Callable[[List[Any]], Dict], max_retries: int = 8
+    ) -> Dict:
+        """
+        Apply fn to consecutive slices of items sized by the adaptive batch size,
+        merging the returned dicts. A rate limited slice is retried at half size
+        after a backoff.
+        """
+        results = {}
+        retries = 0
+        i = 0
+        while i < len(items):
+            batch = items[i : i + self.batch_size]
+            try:
+                results.update(fn(batch))
+            except RpcRateLimitError:
+                retries += 1
+                if retries > max_retries:
+                    raise
+                self._shrink_batch_size(len(batch))
+                time.sleep(min(2**retries * 0.25, 10))
+                continue
+            retries = 0
+            self._grow_batch_size()
+            i += len(batch)
+        return results
+
+    def map_unordered(self, fn: Callable[[Any], Any], jobs: Iterable[Any]):
+        """
+        Run fn over jobs on the worker pool, keeping at most `concurrency` jobs in
+        flight, and yield (job, result) pairs as they complete.
+        """
+        jobs = iter(jobs)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = {}
+            for job in jobs:
+                pending[pool.submit(fn, job)] = job
+                if len(pending) >= self.concurrency:
+                    break
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = pending.pop(future)
+                    next_job = next(jobs, None)
+                    if next_job is not None:
+                        pending[pool.submit(fn, next_job)] = next_job
+                    yield job, future.result()
+
+    def map_ordered(self, fn: Callable[[Any], Any], jobs: Iterable[Any]):
+        """
+        Like map_unordered, but yield (job, result) pairs in submission order. Jobs
+        are only pulled from the iterable as slots free up, so a streaming source
+        is never read further ahead than `concurrency` jobs.
+        """
+        jobs = iter(jobs)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            pending = deque()
+            for job in jobs:
+                pending.append((job, pool.submit(fn, job)))
+                if len(pending) >= self.concurrency:
+                    break
+
+            while pending:
+                job, future = pending.popleft()
+                result = future.result()
+                next_job = next(jobs, None)
+                if next_job is not None:
+                    pending.append((next_job, pool.submit(fn, next_job)))
+                yield job, result
+
+    def close(self):
+        self.session.close()
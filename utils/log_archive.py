@@ -0,0 +1,238 @@
+"""
+Local archive of raw eth_getLogs responses.
+
+With LOG_ARCHIVE_ENABLED the sync walkers write every fetched window, including
+empty ones, to a gzipped segment file before decoding it:
+
+    <LOG_ARCHIVE_DIR>/<network>/<model>/<filter_key>.filter.json
+    <LOG_ARCHIVE_DIR>/<network>/<model>/<filter_key>/<from_block>-<to_block>.json.gz
+
+The filter file holds the topics and contract addresses of the eth_getLogs filter,
+segment names carry the block range, so the archive is indexed by directory
+listing alone. Segments are written to a temporary file and renamed, a retried
+window simply replaces its segment.
+
+replay_log_archive rebuilds event tables from the segments without any RPC call.
+Segments of overlapping filters or windows are replayed in block order with
+per (topic_0, address) cursors, so every log is decoded once.
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import orjson
+from decouple import config
+from hexbytes import HexBytes
+
+from utils.constants import NETWORK_NAME
+from utils.encoding import decode_event_rows
+from utils.rpc import get_evm_block_timestamps
+
+logger = logging.getLogger(__name__)
+
+LOG_ARCHIVE_ENABLED = config("LOG_ARCHIVE_ENABLED", cast=bool, default=False)
+LOG_ARCHIVE_DIR = config("LOG_ARCHIVE_DIR", default="log_archive")
+LOG_ARCHIVE_COMPRESSION_LEVEL = config(
+    "LOG_ARCHIVE_COMPRESSION_LEVEL", cast=int, default=6
+)
+
+SEGMENT_PATTERN = re.compile(r"^(\d+)-(\d+)\.json\.gz$")
+HEX_FIELDS = ("data", "transactionHash", "blockHash")
+
+
+@dataclass
+class Segment:
+    path: str
+    from_block: int
+    to_block: int
+    topics: Set[str]
+    addresses: Set[str]
+
+    def keys(self) -> Set[Tuple[str, str]]:
+        return {(topic, address) for topic in self.topics for address in self.addresses}
+
+
+def get_model_dir(model: str, archive_dir: str = LOG_ARCHIVE_DIR) -> str:
+    return os.path.join(archive_dir, NETWORK_NAME, model)
+
+
+def get_filter_key(topics: List[str], contract_addresses: List[str]) -> str:
+    filter_ids = ",".join(sorted(topic.lower() for topic in topics)) + "|"
+    filter_ids += ",".join(sorted(address.lower() for address in contract_addresses))
+    return hashlib.sha1(filter_ids.encode()).hexdigest()[:16]
+
+
+def _encode_log(log: Any) -> Dict:
+    encoded = {}
+    for key, value in log.items():
+        if key == "topics":
+            value = [HexBytes(topic).to_0x_hex() for topic in value]
+        elif isinstance(value, (bytes, bytearray)):
+            value = HexBytes(value).to_0x_hex()
+        encoded[key] = value
+    return encoded
+
+
+def _decode_log(log: Dict) -> Dict:
+    log["topics"] = [HexBytes(topic) for topic in log["topics"]]
+    for key in HEX_FIELDS:
+        if key in log:
+            log[key] = HexBytes(log[key])
+    return log
+
+
+def _write_atomic(path: str, payload: bytes):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_segment(
+    model: str,
+    topics: List[str],
+    contract_addresses: List[str],
+    from_block: int,
+    to_block: int,
+    raw_event_dicts: List[Any],
+    archive_dir: str = LOG_ARCHIVE_DIR,
+) -> str:
+    """Archive the raw logs of one eth_getLogs window, returns the segment path."""
+    model_dir = get_model_dir(model, archive_dir)
+    filter_key = get_filter_key(topics, contract_addresses)
+
+    filter_path = os.path.join(model_dir, f"{filter_key}.filter.json")
+    if not os.path.exists(filter_path):
+        _write_atomic(
+            filter_path,
+            orjson.dumps(
+                {
+                    "topics": sorted(topic.lower() for topic in topics),
+                    "contract_addresses": sorted(
+                        address.lower() for address in contract_addresses
+                    ),
+                }
+            ),
+        )
+
+    path = os.path.join(
+        model_dir, filter_key, f"{from_block:012d}-{to_block:012d}.json.gz"
+    )
+    payload = orjson.dumps([_encode_log(log) for log in raw_event_dicts])
+    _write_atomic(
+        path, gzip.compress(payload, compresslevel=LOG_ARCHIVE_COMPRESSION_LEVEL)
+    )
+    return path
+
+
+def read_segment(path: str) -> List[Dict]:
+    with open(path, "rb") as f:
+        return [_decode_log(log) for log in orjson.loads(gzip.decompress(f.read()))]
+
+
+def list_segments(
+    model: str,
+    from_block: int = 0,
+    to_block: Optional[int] = None,
+    archive_dir: str = LOG_ARCHIVE_DIR,
+) -> List[Segment]:
+    """Segments overlapping [from_block, to_block], ordered by block range."""
+    model_dir = get_model_dir(model, archive_dir)
+    if not os.path.isdir(model_dir):
+        return []
+
+    segments = []
+    for entry in os.listdir(model_dir):
+        if not entry.endswith(".filter.json"):
+            continue
+        filter_key = entry[: -len(".filter.json")]
+        with open(os.path.join(model_dir, entry), "rb") as f:
+            archive_filter = orjson.loads(f.read())
+
+        segment_dir = os.path.join(model_dir, filter_key)
+        if not os.path.isdir(segment_dir):
+            continue
+        for name in os.listdir(segment_dir):
+            match = SEGMENT_PATTERN.match(name)
+            if match is None:
+                continue
+            start, end = int(match.group(1)), int(match.group(2))
+            if end < from_block or (to_block is not None and start > to_block):
+                continue
+            segments.append(
+                Segment(
+                    path=os.path.join(segment_dir, name),
+                    from_block=start,
+                    to_block=end,
+                    topics=set(archive_filter["topics"]),
+                    addresses=set(archive_filter["contract_addresses"]),
+                )
+            )
+    return sorted(segments, key=lambda segment: (segment.from_block, segment.to_block))
+
+
+def plan_replay(
+    segments: List[Segment], keys: Set[Tuple[str, str]], from_block: int
+) -> Iterator[Tuple[Segment, Dict[Tuple[str, str], int]]]:
+    """
+    Segments covering any of the (topic_0, address) keys, each with the cursor of
+    every key it covers: only its logs above the cursor are new. Cursors move to
+    the end of every replayed segment, so overlapping segments decode a log once.
+    """
+    cursors = {key: from_block - 1 for key in keys}
+    for segment in segments:
+        segment_keys = segment.keys() & keys
+        segment_cursors = {
+            key: cursors[key] for key in segment_keys if cursors[key] < segment.to_block
+        }
+        if not segment_cursors:
+            continue
+        yield segment, segment_cursors
+        for key in segment_cursors:
+            cursors[key] = segment.to_block
+
+
+def load_segment_logs(
+    path: str, log_cursors: Dict[Tuple[str, str], int], to_block: Optional[int] = None
+) -> List[Dict]:
+    """Raw logs of a segment that are new for their key's cursor and within to_block."""
+    logs = []
+    for log in read_segment(path):
+        cursor = log_cursors.get(
+            (f"0x{log['topics'][0].hex()}", log["address"].lower())
+        )
+        if cursor is None or log["blockNumber"] <= cursor:
+            continue
+        if to_block is not None and log["blockNumber"] > to_block:
+            continue
+        logs.append(log)
+    return logs
+
+
+def decode_segment(
+    path: str,
+    log_cursors: Dict[Tuple[str, str], int],
+    event_abis: Dict[str, Any],
+    to_block: Optional[int] = None,
+) -> Tuple[Dict[str, List[Tuple]], int]:
+    """
+    Read and decode a segment into ClickHouse rows grouped by topic_0.
+    Runs in replay worker processes, so it only touches the archive file.
+    """
+    logs = load_segment_logs(path, log_cursors, to_block)
+    if not logs:
+        return {}, 0
+    timestamps = get_evm_block_timestamps(set(log["blockNumber"] for log in logs))
+    return decode_event_rows(logs, event_abis, timestamps), len(logs)
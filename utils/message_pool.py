@@ -0,0 +1,182 @@
+"""
+Bounded, prioritised processing of websocket messages.
+
+The recv loop of a listener submits every frame to a MessagePool instead of
+spawning a task per frame. A fixed number of worker coroutines take messages
+highest priority first, oldest first within a priority. The pool is bounded:
+
+- a full queue evicts its oldest message of the lowest priority below the
+  incoming one, or drops the incoming message if there is none
+- a message waiting longer than LISTENER_MAX_MESSAGE_AGE is shed when a worker
+  reaches it, fresh messages are worth more than a backlog
+
+PRIORITY_HIGH messages are never evicted or shed for age.
+
+Every LISTENER_STATS_INTERVAL seconds the pool logs and caches its queue depth,
+queue wait and processing latency, and its drop counters.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from decouple import config
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+LISTENER_WORKERS = config("LISTENER_WORKERS", cast=int, default=8)
+LISTENER_QUEUE_SIZE = config("LISTENER_QUEUE_SIZE", cast=int, default=1_000)
+LISTENER_MAX_MESSAGE_AGE = config("LISTENER_MAX_MESSAGE_AGE", cast=float, default=2.0)
+LISTENER_STATS_INTERVAL = config("LISTENER_STATS_INTERVAL", cast=int, default=60)
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITIES = (PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW)
+
+STATS_KEY = "listener_stats_{name}"
+COUNTERS = ["received", "processed", "failed", "dropped", "evicted", "stale"]
+
+
+class MessagePool:
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[Any]],
+        name: str,
+        workers: int = LISTENER_WORKERS,
+        max_queue: int = LISTENER_QUEUE_SIZE,
+        max_age: float = LISTENER_MAX_MESSAGE_AGE,
+        stats_interval: int = LISTENER_STATS_INTERVAL,
+    ):
+        self.handler = handler
+        self.name = name
+        self.workers = max(workers, 1)
+        self.max_queue = max(max_queue, 1)
+        self.max_age = max_age
+        self.stats_interval = stats_interval
+
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        self.size = 0
+        self.available = asyncio.Semaphore(0)
+        self.tasks = []
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.peak_depth = self.size
+        self.wait_total = self.wait_max = 0.0
+        self.processing_total = self.processing_max = 0.0
+
+    async def start(self):
+        if self.tasks:
+            return
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        if self.stats_interval > 0:
+            self.tasks.append(asyncio.create_task(self._report_stats()))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def submit(self, message: Any, priority: int = PRIORITY_NORMAL) -> bool:
+        """Queue a message without blocking the recv loop. Returns False if dropped."""
+        self.counters["received"] += 1
+        if self.size >= self.max_queue and not self._evict(priority):
+            self.counters["dropped"] += 1
+            return False
+
+        self.queues[priority].append((time.monotonic(), message))
+        self.size += 1
+        self.peak_depth = max(self.peak_depth, self.size)
+        self.available.release()
+        return True
+
+    def _evict(self, priority: int) -> bool:
+        for lower in reversed(PRIORITIES):
+            if lower <= priority:
+                return False
+            if self.queues[lower]:
+                self.queues[lower].popleft()
+                self.size -= 1
+                self.counters["evicted"] += 1
+                # The evicted message's permit stays with the queue, _next skips it
+                return True
+        return False
+
+    def _next(self) -> Optional[tuple]:
+        for priority in PRIORITIES:
+            if self.queues[priority]:
+                self.size -= 1
+                received_at, message = self.queues[priority].popleft()
+                return priority, received_at, message
+        return None
+
+    async def _work(self):
+        while True:
+            await self.available.acquire()
+            item = self._next()
+            if item is None:
+                continue
+
+            priority, received_at, message = item
+            waited = time.monotonic() - received_at
+            if priority != PRIORITY_HIGH and self.max_age and waited > self.max_age:
+                self.counters["stale"] += 1
+                continue
+
+            started = time.monotonic()
+            try:
+                await self.handler(message)
+                self.counters["processed"] += 1
+            except Exception as e:
+                self.counters["failed"] += 1
+                logger.error(f"Error processing {self.name} message: {e}")
+
+            processing = time.monotonic() - started
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.processing_total += processing
+            self.processing_max = max(self.processing_max, processing)
+
+    def get_stats(self) -> Dict:
+        handled = max(self.counters["processed"] + self.counters["failed"], 1)
+        return {
+            **self.counters,
+            "queue_depth": self.size,
+            "peak_queue_depth": self.peak_depth,
+            "avg_wait_ms": round(self.wait_total / handled * 1000, 2),
+            "max_wait_ms": round(self.wait_max * 1000, 2),
+            "avg_processing_ms": round(self.processing_total / handled * 1000, 2),
+            "max_processing_ms": round(self.processing_max * 1000, 2),
+            "recorded_at": time.time(),
+        }
+
+    async def _report_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            stats = self.get_stats()
+            self.reset_stats()
+            logger.info(
+                f"{self.name} messages over {self.stats_interval}s: "
+                f"{stats['received']} received, {stats['processed']} processed, "
+                f"{stats['failed']} failed, {stats['dropped']} dropped, "
+                f"{stats['evicted']} evicted, {stats['stale']} stale; "
+                f"queue depth {stats['queue_depth']} (peak {stats['peak_queue_depth']}), "
+                f"wait {stats['avg_wait_ms']}ms avg / {stats['max_wait_ms']}ms max, "
+                f"processing {stats['avg_processing_ms']}ms avg / "
+                f"{stats['max_processing_ms']}ms max"
+            )
+            try:
+                cache.set(STATS_KEY.format(name=self.name), stats, timeout=None)
+            except Exception as e:
+                logger.error(f"Error caching {self.name} message stats: {e}")
+
+
+def get_listener_stats(name: str) -> Optional[Dict]:
+    """Stats of the last reporting interval of a listener's message pool."""
+    return cache.get(STATS_KEY.format(name=name))
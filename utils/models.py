@@ -36,6 +36,11 @@ class BaseEvent(models.Model):
             for row in self.abi["inputs"]
         ] + self._get_clickhouse_log_columns()
 
+    def _get_clickhouse_address_columns(self):
+        return [
+            row["name"] for row in self.abi["inputs"] if row["type"] == "address"
+        ] + ["address"]
+
     def _map_evm_types_to_clickhouse_types(self, evm_type: str):
         if evm_type in ["uint256", "int256", "uint128", "int128"]:
             return "UInt256"
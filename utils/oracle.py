@@ -1,3 +1,6 @@
+import re
+from typing import FrozenSet, Optional, Union
+
 from eth_abi import decode
 
 
@@ -20,11 +23,176 @@ FORWARD_DATA_TYPES = ["address", "bytes"]
 MIN_OBSERVATIONS = 2
 MAX_OBSERVATIONS = 10
 
+FORWARD_INPUT_PATTERN = re.compile(r'"input"\s*:\s*"' + FORWARD_METHOD_ID)
+FORWARD_INPUT_BYTES_PATTERN = re.compile(
+    rb'"input"\s*:\s*"' + FORWARD_METHOD_ID.encode()
+)
+TO_ADDRESS_PATTERN = re.compile(r'"to"\s*:\s*"(0x[0-9a-fA-F]{40})"')
+TO_ADDRESS_BYTES_PATTERN = re.compile(rb'"to"\s*:\s*"(0x[0-9a-fA-F]{40})"')
+
+
+def is_forwarder_frame(
+    frame: Union[str, bytes], transmitters: Optional[FrozenSet[str]] = None
+) -> bool:
+    """
+    Check a raw pending transaction frame before any JSON parsing: it must call the
+    forwarder and, when transmitters are given, be sent to one of them.
+
+    The selector is searched with a plain substring scan first, which rejects almost
+    every mempool frame without running a regex.
+    """
+    if isinstance(frame, str):
+        if FORWARD_METHOD_ID not in frame or not FORWARD_INPUT_PATTERN.search(frame):
+            return False
+        if transmitters is None:
+            return True
+        match = TO_ADDRESS_PATTERN.search(frame)
+        return match is not None and match.group(1).lower() in transmitters
+
+    if (
+        FORWARD_METHOD_ID.encode() not in frame
+        or not FORWARD_INPUT_BYTES_PATTERN.search(frame)
+    ):
+        return False
+    if transmitters is None:
+        return True
+    match = TO_ADDRESS_BYTES_PATTERN.search(frame)
+    return match is not None and match.group(1).decode().lower() in transmitters
+
+
+WORD_SIZE = 32
+TRANSMIT_SELECTOR = bytes.fromhex(TRASMIT_METHOD_ID)
+# Head of transmit(bytes32[3], bytes, bytes32[], bytes32[], bytes32)
+TRANSMIT_HEAD_SIZE = 7 * WORD_SIZE
+# Head of the report (bytes32, bytes32, int192[])
+REPORT_HEAD_SIZE = 3 * WORD_SIZE
+INT192_MIN = -(2**191)
+INT192_MAX = 2**191 - 1
+
+
+def _padded(length: int) -> int:
+    return -(-length // WORD_SIZE) * WORD_SIZE
+
+
+def _uint(view: memoryview, offset: int) -> int:
+    return int.from_bytes(view[offset : offset + WORD_SIZE], "big")
+
+
+def _is_zero(view: memoryview) -> bool:
+    return not any(view)
+
+
+def decode_forwarder_calldata(calldata: bytes) -> Optional[dict]:
+    """
+    Decode forward(address, bytes) arguments wrapping an OCR2 transmit call by reading
+    the canonical ABI layout at fixed offsets from a memoryview, without eth_abi or
+    intermediate hex strings.
+
+    Returns None for anything but the canonical encoding (unexpected offsets,
+    non-zero padding, out of range values, no observations), so the caller can fall
+    back to eth_abi and keep its exact results and errors.
+    """
+    view = memoryview(calldata)
+    size = len(view)
+
+    # forward(address to, bytes data): address word, data offset, data length
+    if size < 3 * WORD_SIZE or not _is_zero(view[:12]) or _uint(view, 32) != 64:
+        return None
+    data_length = _uint(view, 64)
+    data_end = 3 * WORD_SIZE + data_length
+    if size < 3 * WORD_SIZE + _padded(data_length) or not _is_zero(
+        view[data_end : 3 * WORD_SIZE + _padded(data_length)]
+    ):
+        return None
+    oracle_data = view[3 * WORD_SIZE : data_end]
+    if oracle_data[:4] != TRANSMIT_SELECTOR:
+        return None
+
+    # transmit(bytes32[3] reportContext, bytes report, bytes32[] rs, bytes32[] ss,
+    # bytes32 rawVs): report, rs and ss follow the head in order
+    transmit = oracle_data[4:]
+    transmit_size = len(transmit)
+    if transmit_size < TRANSMIT_HEAD_SIZE + WORD_SIZE:
+        return None
+    if _uint(transmit, 96) != TRANSMIT_HEAD_SIZE:
+        return None
+    report_length = _uint(transmit, TRANSMIT_HEAD_SIZE)
+    report_start = TRANSMIT_HEAD_SIZE + WORD_SIZE
+    rs_offset = report_start + _padded(report_length)
+    if transmit_size < rs_offset + WORD_SIZE or _uint(transmit, 128) != rs_offset:
+        return None
+    if not _is_zero(transmit[report_start + report_length : rs_offset]):
+        return None
+    ss_offset = rs_offset + WORD_SIZE * (1 + _uint(transmit, rs_offset))
+    if transmit_size < ss_offset + WORD_SIZE or _uint(transmit, 160) != ss_offset:
+        return None
+    if transmit_size < ss_offset + WORD_SIZE * (1 + _uint(transmit, ss_offset)):
+        return None
+
+    # report (bytes32 rawReportContext, bytes32 rawObservers, int192[] observations)
+    report = transmit[report_start : report_start + report_length]
+    if report_length < REPORT_HEAD_SIZE + WORD_SIZE:
+        return None
+    if _uint(report, 64) != REPORT_HEAD_SIZE:
+        return None
+    count = _uint(report, REPORT_HEAD_SIZE)
+    start = REPORT_HEAD_SIZE + WORD_SIZE
+    if count == 0 or report_length < start + count * WORD_SIZE:
+        return None
+
+    observations = []
+    for offset in range(start, start + count * WORD_SIZE, WORD_SIZE):
+        value = int.from_bytes(report[offset : offset + WORD_SIZE], "big", signed=True)
+        if value < INT192_MIN or value > INT192_MAX:
+            return None
+        observations.append(value)
+
+    for i in range(count - 1):
+        if observations[i] > observations[i + 1]:
+            raise ValueError("observations not sorted")
+
+    return {
+        "oracle_address": "0x" + view[12:32].hex(),
+        "oracle_data": oracle_data.hex(),
+        "median_price": observations[count // 2],
+        "epoch_and_round": int.from_bytes(report[27:32], "big"),
+        "observations": tuple(observations),
+    }
+
 
 def parse_forwarder_call(input_data: str) -> dict:
     """
     Parse a forwarder call to extract oracle data for median price calculation.
 
+    Uses the fixed-offset decoder and falls back to parse_forwarder_call_abi for
+    calldata that is not canonically encoded, with identical results and errors.
+
+    Args:
+        input_data (str): The hex-encoded input data for the forward(address to,bytes data) call
+
+    Returns:
+        dict: Same as parse_forwarder_call_abi
+    """
+    if not input_data.startswith(FORWARD_METHOD_ID):
+        raise InvalidMethodSignature(
+            f"Invalid forward method signature: {input_data[:10]}..."
+        )
+
+    try:
+        calldata = bytes.fromhex(input_data[len(FORWARD_METHOD_ID) :])
+    except ValueError:
+        calldata = None
+    if calldata is not None:
+        parsed = decode_forwarder_calldata(calldata)
+        if parsed is not None:
+            return parsed
+    return parse_forwarder_call_abi(input_data)
+
+
+def parse_forwarder_call_abi(input_data: str) -> dict:
+    """
+    Parse a forwarder call to extract oracle data for median price calculation.
+
     Args:
         input_data (str): The hex-encoded input data for the forward(address to,bytes data) call
 
@@ -0,0 +1,182 @@
+"""
+Chain reorganisation detection for head-of-chain ingestion.
+
+listen_blocks pushes every new head's (number, hash, parentHash) into a ring buffer
+of the last REORG_BUFFER_SIZE blocks. A head whose parentHash differs from the
+buffered hash of the previous number, or a buffered number replaced by a different
+hash, means the chain reorganised. The buffer then walks back against the RPC's
+canonical hashes to find the first orphaned block, and a ReorgRollbackTask is
+queued to roll it back before the range syncs re-ingest the canonical blocks.
+Reorg protection is opt-in through REORG_PROTECTION_ENABLED.
+
+While a queued rollback has not finished, ROLLBACK_KEY holds its fork block and
+listen_blocks holds tip ingestion, so no head is committed on top of rows the
+rollback is about to delete. Range syncs already in flight are fenced off by the
+rollback epoch: a rollback records when it started and its fork block, then waits
+for the window commits in progress to finish before deleting anything. A walk
+that started before the rollback drops any later window reaching the fork block
+instead of writing orphaned rows back or moving the rewound cursors forward.
+
+The buffer is mirrored to the cache so a restarted listener keeps its history.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from decouple import config
+from django.core.cache import cache
+
+from utils.constants import NETWORK_NAME
+
+logger = logging.getLogger(__name__)
+
+REORG_PROTECTION_ENABLED = config("REORG_PROTECTION_ENABLED", cast=bool, default=False)
+REORG_BUFFER_SIZE = config("REORG_BUFFER_SIZE", cast=int, default=64)
+
+REORG_ROLLBACK_TIMEOUT = 60 * 30  # 30 minutes
+REORG_COMMIT_WAIT_SECONDS = config("REORG_COMMIT_WAIT_SECONDS", cast=int, default=120)
+
+BUFFER_KEY = f"recent_block_hashes_{NETWORK_NAME}"
+ROLLBACK_KEY = f"reorg_rollback_pending_{NETWORK_NAME}"
+EPOCH_KEY = f"reorg_rollback_epoch_{NETWORK_NAME}"
+COMMITS_KEY = f"reorg_window_commits_{NETWORK_NAME}"
+
+
+class WindowRolledBack(Exception):
+    """A synced window reaches blocks rolled back after its walk started."""
+
+
+def mark_rollback_pending(fork_block: int):
+    """Hold tip ingestion until the rollback from fork_block has finished."""
+    cache.set(ROLLBACK_KEY, fork_block, timeout=REORG_ROLLBACK_TIMEOUT)
+
+
+def get_pending_rollback() -> Optional[int]:
+    """Fork block of the rollback tip ingestion is waiting for, if any."""
+    return cache.get(ROLLBACK_KEY)
+
+
+def clear_pending_rollback(fork_block: int):
+    """Release tip ingestion, unless a later rollback has been queued since."""
+    if cache.get(ROLLBACK_KEY) == fork_block:
+        cache.delete(ROLLBACK_KEY)
+
+
+def start_rollback(fork_block: int):
+    """
+    Record the rollback epoch, then wait for the window commits in progress to
+    finish. Commits starting from here on see the epoch and drop their window.
+    """
+    cache.set(EPOCH_KEY, (time.time(), fork_block), timeout=None)
+    deadline = time.monotonic() + REORG_COMMIT_WAIT_SECONDS
+    while cache.get(COMMITS_KEY):
+        if time.monotonic() > deadline:
+            logger.error(
+                f"Window commits still in progress after {REORG_COMMIT_WAIT_SECONDS}s, "
+                f"rolling back from {fork_block} anyway"
+            )
+            return
+        time.sleep(0.1)
+
+
+def begin_window_commit(walk_started_at: float, end_block: int):
+    """
+    Register a window commit of a walk started at walk_started_at. Raises
+    WindowRolledBack if a rollback queued or started since reaches the window.
+    """
+    cache.add(COMMITS_KEY, 0, timeout=REORG_ROLLBACK_TIMEOUT)
+    try:
+        cache.incr(COMMITS_KEY)
+    except ValueError:
+        cache.add(COMMITS_KEY, 1, timeout=REORG_ROLLBACK_TIMEOUT)
+
+    pending_fork_block = get_pending_rollback()
+    epoch = cache.get(EPOCH_KEY)
+    fork_block = None
+    if pending_fork_block is not None and pending_fork_block <= end_block:
+        fork_block = pending_fork_block
+    elif epoch is not None and epoch[0] >= walk_started_at and epoch[1] <= end_block:
+        fork_block = epoch[1]
+    if fork_block is not None:
+        end_window_commit()
+        raise WindowRolledBack(
+            f"Window ending at {end_block} reaches blocks rolled back from {fork_block}"
+        )
+
+
+def end_window_commit():
+    try:
+        cache.decr(COMMITS_KEY)
+    except ValueError:
+        # The counter expired while the commit ran
+        pass
+
+
+class BlockHashRingBuffer:
+    """Most recent (number -> (hash, parentHash)) heads, oldest first."""
+
+    def __init__(self, size: int = REORG_BUFFER_SIZE, cache_key: str = BUFFER_KEY):
+        self.size = size
+        self.cache_key = cache_key
+        self.blocks: "OrderedDict[int, Tuple[str, str]]" = OrderedDict(
+            sorted((cache.get(cache_key) or {}).items())
+        )
+
+    def push(
+        self,
+        number: int,
+        block_hash: str,
+        parent_hash: str,
+        get_canonical_hash: Callable[[int], str],
+    ) -> Optional[int]:
+        """
+        Record a new head. Returns the first orphaned block number if the head
+        reveals a reorganisation of buffered blocks, otherwise None.
+        """
+        block_hash, parent_hash = block_hash.lower(), parent_hash.lower()
+        fork_block = None
+
+        previous = self.blocks.get(number - 1)
+        current = self.blocks.get(number)
+        if previous is not None and previous[0] != parent_hash:
+            fork_block = self.find_fork_block(number - 1, get_canonical_hash)
+        elif current is not None and current[0] != block_hash:
+            fork_block = number
+
+        # Forget the orphaned branch and anything above the new head
+        stale_from = number if fork_block is None else min(fork_block, number)
+        for buffered in [n for n in self.blocks if n >= stale_from]:
+            del self.blocks[buffered]
+
+        self.blocks[number] = (block_hash, parent_hash)
+        while len(self.blocks) > self.size:
+            self.blocks.popitem(last=False)
+        cache.set(self.cache_key, dict(self.blocks), timeout=None)
+
+        if fork_block is not None:
+            logger.warning(
+                f"Reorg detected at head {number}: blocks from {fork_block} are orphaned"
+            )
+        return fork_block
+
+    def find_fork_block(
+        self, number: int, get_canonical_hash: Callable[[int], str]
+    ) -> int:
+        """
+        Walk back from `number` until the buffered hash matches the canonical one
+        and return the block after it. If the whole buffer is orphaned the oldest
+        buffered block is returned, the deepest rollback the buffer can vouch for.
+        """
+        fork_block = number
+        for buffered in sorted((n for n in self.blocks if n <= number), reverse=True):
+            if get_canonical_hash(buffered).lower() == self.blocks[buffered][0]:
+                return buffered + 1
+            fork_block = buffered
+
+        logger.error(
+            f"Reorg deeper than the {len(self.blocks)} buffered blocks, "
+            f"rolling back from {fork_block}"
+        )
+        return fork_block
@@ -0,0 +1,176 @@
+"""
+Single-flight coalescing of child synchronize runs per event group.
+
+Parent synchronize tasks fire on every new head. For each event group (events
+sharing a last_synced_block) at most one child run is queued or running, and at
+most one more is pending behind it: a trigger arriving while a run is in flight
+only bumps the pending target head and is counted as coalesced. When the in-flight
+run finishes it picks up the pending run itself instead of going back through the
+broker, so slow RPCs no longer pile up child tasks that walk the same ranges.
+
+The in-flight marker expires after EVENT_SYNC_INFLIGHT_TIMEOUT so a worker that
+dies mid-run cannot block its group forever.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from decouple import config
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = config("EVENT_SYNC_SINGLE_FLIGHT", cast=bool, default=True)
+INFLIGHT_TIMEOUT = config("EVENT_SYNC_INFLIGHT_TIMEOUT", cast=int, default=60 * 10)
+
+INFLIGHT_KEY = "event_sync_inflight_{group_key}"
+PENDING_KEY = "event_sync_pending_{group_key}"
+METRICS_KEY = "event_sync_metrics_{model}"
+
+METRIC_FIELDS = ["triggers", "dispatched", "coalesced", "reruns"]
+
+
+def get_event_group_key(event_model: Any, event_ids: List[int]) -> str:
+    ids = ",".join(str(event_id) for event_id in sorted(event_ids))
+    digest = hashlib.sha1(ids.encode()).hexdigest()[:16]
+    return f"{event_model._meta.model_name}_{digest}"
+
+
+def _incr(event_model: Any, field: str):
+    key = f"{METRICS_KEY.format(model=event_model._meta.model_name)}_{field}"
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def _bump_pending(group_key: str, target_block: int):
+    pending_key = PENDING_KEY.format(group_key=group_key)
+    pending = cache.get(pending_key)
+    if pending is None or target_block > pending:
+        cache.set(pending_key, target_block, timeout=INFLIGHT_TIMEOUT)
+
+
+def request_sync(event_model: Any, event_ids: List[int], target_block: int) -> bool:
+    """
+    Register a trigger for an event group. Returns True when the caller should
+    dispatch a child run; otherwise the trigger was coalesced into the pending run
+    of the in-flight one.
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return True
+
+    group_key = get_event_group_key(event_model, event_ids)
+    inflight_key = INFLIGHT_KEY.format(group_key=group_key)
+    _incr(event_model, "triggers")
+
+    if cache.add(inflight_key, time.time(), timeout=INFLIGHT_TIMEOUT):
+        _incr(event_model, "dispatched")
+        return True
+
+    _bump_pending(group_key, target_block)
+    # The in-flight run may have released between the add and the bump without
+    # seeing the pending target, take the run over if so
+    if cache.add(inflight_key, time.time(), timeout=INFLIGHT_TIMEOUT):
+        cache.delete(PENDING_KEY.format(group_key=group_key))
+        _incr(event_model, "dispatched")
+        return True
+
+    _incr(event_model, "coalesced")
+    logger.debug(f"Coalesced sync trigger for {group_key} up to block {target_block}")
+    return False
+
+
+def finish_sync(event_model: Any, event_ids: List[int]) -> Optional[int]:
+    """
+    Called by the in-flight run when it completes. Returns the pending target head
+    if another run is due, in which case the caller keeps the group and runs
+    again, otherwise releases the group and returns None.
+    """
+    if not SINGLE_FLIGHT_ENABLED:
+        return None
+
+    group_key = get_event_group_key(event_model, event_ids)
+    inflight_key = INFLIGHT_KEY.format(group_key=group_key)
+    pending_key = PENDING_KEY.format(group_key=group_key)
+
+    for _ in range(2):
+        target_block = cache.get(pending_key)
+        if target_block is not None:
+            cache.delete(pending_key)
+            cache.set(inflight_key, time.time(), timeout=INFLIGHT_TIMEOUT)
+            _incr(event_model, "reruns")
+            return target_block
+
+        cache.delete(inflight_key)
+        # A trigger may have bumped the pending target after the check above,
+        # keep going only if no other run took the group in the meantime
+        if cache.get(pending_key) is None or not cache.add(
+            inflight_key, time.time(), timeout=INFLIGHT_TIMEOUT
+        ):
+            return None
+    return None
+
+
+def refresh_sync(event_model: Any, event_ids: List[int]):
+    """Extend the in-flight marker of a long run, e.g. after each committed window."""
+    if SINGLE_FLIGHT_ENABLED:
+        cache.touch(
+            INFLIGHT_KEY.format(group_key=get_event_group_key(event_model, event_ids)),
+            INFLIGHT_TIMEOUT,
+        )
+
+
+def release_sync(event_model: Any, event_ids: List[int]):
+    """Drop the in-flight marker of a group after a failed run."""
+    if SINGLE_FLIGHT_ENABLED:
+        cache.delete(
+            INFLIGHT_KEY.format(group_key=get_event_group_key(event_model, event_ids))
+        )
+
+
+def record_queue_depth(event_model: Any, event_id_groups: List[List[int]]):
+    """Snapshot how many of the given groups have a run in flight and pending."""
+    if not SINGLE_FLIGHT_ENABLED:
+        return
+
+    group_keys = [
+        get_event_group_key(event_model, event_ids) for event_ids in event_id_groups
+    ]
+    inflight_keys = [INFLIGHT_KEY.format(group_key=key) for key in group_keys]
+    pending_keys = [PENDING_KEY.format(group_key=key) for key in group_keys]
+    values = cache.get_many(inflight_keys + pending_keys)
+
+    inflight = sum(1 for key in inflight_keys if key in values)
+    pending = sum(1 for key in pending_keys if key in values)
+    snapshot = {
+        "groups": len(group_keys),
+        "inflight": inflight,
+        "pending": pending,
+        "queue_depth": inflight + pending,
+        "recorded_at": time.time(),
+    }
+    cache.set(
+        f"{METRICS_KEY.format(model=event_model._meta.model_name)}_queue",
+        snapshot,
+        timeout=None,
+    )
+    logger.info(
+        f"{event_model._meta.model_name} sync queue: {inflight} in flight, "
+        f"{pending} pending across {len(group_keys)} groups"
+    )
+
+
+def get_sync_metrics(event_model: Any) -> Dict:
+    """Trigger counters and the last queue depth snapshot of an event model."""
+    metrics_key = METRICS_KEY.format(model=event_model._meta.model_name)
+    fields = METRIC_FIELDS + ["queue"]
+    values = cache.get_many([f"{metrics_key}_{field}" for field in fields])
+    metrics = {
+        field: values.get(f"{metrics_key}_{field}", 0) for field in METRIC_FIELDS
+    }
+    metrics.update(values.get(f"{metrics_key}_queue") or {})
+    return metrics
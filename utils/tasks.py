@@ -1,14 +1,23 @@
 import logging
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, List, Type
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
 
 import pytz
+from django.db.models import F
 from web3 import Web3
 from web3._utils.events import get_event_data
-from web3.exceptions import Web3RPCError
 
-from utils.encoding import decode_any
+from utils import backfill, log_archive, reorg, sync_scheduler, window_sizer
+from utils.constants import (
+    EVENT_SYNC_DECODE_ROWS,
+    EVENT_SYNC_DEDUPLICATE,
+    EVENT_SYNC_MERGE_LAG_BLOCKS,
+    EVENT_SYNC_PIPELINE_DEPTH,
+)
+from utils.encoding import decode_any, decode_event_rows
 from utils.rpc import get_evm_block_timestamps
 
 logger = logging.getLogger(__name__)
@@ -22,18 +31,64 @@ class EventSynchronizeMixin:
       - clickhouse_client: The ClickHouse client instance
       - rpc_adapter: The RPC adapter instance
       - network_name: The network name string
+    Optionally set:
+      - pipeline_depth: Number of block windows to prefetch while inserting (0 = sequential)
+      - decode_event_rows: Decode logs straight into ClickHouse row tuples instead of
+        web3 AttributeDicts; handle_event_logs then receives rows per topic_0
+      - deduplicate_event_rows: Drop rows already stored for the window before
+        inserting, so retried and overlapping syncs do not write a log twice
+      - persist_window_state: Keep the learned block window per filter and provider
+        between runs (see utils.window_sizer) instead of starting from
+        max_blockrange_size_for_events
+      - archive_raw_logs: Write every raw eth_getLogs response to the local log
+        archive (see utils.log_archive) so tables can be rebuilt without RPC
+      - filter_synced_event_logs: Drop logs at or below each event's
+        last_synced_block in handle_event_logs; replays of already synced
+        ranges turn it off
     """
 
     event_model: Type[Any] = None
     clickhouse_client: Any = None
     rpc_adapter: Any = None
     network_name: str = None
-
-    EVENTS_ARRAY_THRESHOLD_SIZE = 10_000
-
-    def run(self, event_ids: List[int]):
+    pipeline_depth: int = EVENT_SYNC_PIPELINE_DEPTH
+    decode_event_rows: bool = EVENT_SYNC_DECODE_ROWS
+    deduplicate_event_rows: bool = EVENT_SYNC_DEDUPLICATE
+    persist_window_state: bool = True
+    archive_raw_logs: bool = log_archive.LOG_ARCHIVE_ENABLED
+    filter_synced_event_logs: bool = True
+
+    def run(
+        self,
+        event_ids: List[int],
+        backfill_key: Optional[str] = None,
+        shard_index: Optional[int] = None,
+    ):
         """Default run method for child synchronize tasks."""
-        self.run_event_sync(event_ids)
+        if backfill_key is not None:
+            self.run_backfill_shard(backfill_key, shard_index)
+            return
+        self.run_coalesced(event_ids, self.run_event_sync)
+
+    def run_coalesced(self, event_ids: List[int], sync):
+        """
+        Run sync(event_ids) for a group dispatched by a parent task, then keep
+        running it while triggers were coalesced into a pending run behind it.
+        """
+        while True:
+            try:
+                sync(event_ids)
+            except Exception:
+                sync_scheduler.release_sync(self.event_model, event_ids)
+                raise
+
+            target_block = sync_scheduler.finish_sync(self.event_model, event_ids)
+            if target_block is None:
+                return
+            logger.info(
+                f"Rerunning coalesced sync of {len(event_ids)} events "
+                f"up to block {target_block}"
+            )
 
     def run_event_sync(self, event_ids: List[int]):
         # Process all provided events
@@ -51,12 +106,50 @@ class EventSynchronizeMixin:
             logger.debug(f"{self.network_name} has no new blocks. Nothing to sync.")
             return
 
-        iter_from_block = global_from_block
-        iter_delta = min(
-            global_to_block - global_from_block,
-            self.rpc_adapter.max_blockrange_size_for_events,
+        self.sync_event_windows(
+            network_events=network_events,
+            global_from_block=global_from_block,
+            global_to_block=global_to_block,
+            **self.get_sync_filters(network_events),
         )
-        iter_to_block = global_from_block + iter_delta
+
+    def run_backfill_shard(self, backfill_key: str, shard_index: int):
+        """
+        Sync one shard of a range-sharded backfill from where it last stopped.
+        Progress is recorded per committed window and last_synced_block is advanced
+        by utils.backfill over the contiguous completed prefix of all shards.
+        """
+        plan = backfill.get_backfill(backfill_key)
+        if plan is None:
+            logger.warning(f"Backfill {backfill_key} not found or already completed")
+            return
+
+        shard_start, shard_end = plan["shards"][shard_index]
+        last_block = backfill.get_shard_progress(backfill_key, plan)[shard_index]
+        if last_block >= shard_end:
+            backfill.advance_last_synced_block(self.event_model, backfill_key)
+            return
+
+        network_events = self.event_model.objects.filter(id__in=plan["event_ids"])
+        logger.info(
+            f"Backfill {backfill_key} shard {shard_index} syncing "
+            f"{last_block + 1} to {shard_end} (shard starts at {shard_start})"
+        )
+        self.sync_event_windows(
+            network_events=network_events,
+            global_from_block=last_block + 1,
+            global_to_block=shard_end,
+            backfill_shard=(backfill_key, shard_index),
+            **self.get_sync_filters(network_events),
+        )
+
+    def get_sync_filters(self, network_events: List[Any]) -> Dict[str, Any]:
+        """
+        Topics, contract addresses and ABIs of one combined eth_getLogs filter for
+        events. When the events' last_synced_block differ (parent syncs merge
+        nearby cursors), log_cursors maps (topic_0, address) to the block each
+        log must be above to still be new for its events.
+        """
         contract_addresses = list(
             set(
                 Web3.to_checksum_address(address)
@@ -64,75 +157,402 @@ class EventSynchronizeMixin:
                 for address in event.contract_addresses
             )
         )
+        log_cursors = {}
+        for event in network_events:
+            for address in event.contract_addresses:
+                key = (event.topic_0, address.lower())
+                log_cursors[key] = min(
+                    log_cursors.get(key, event.last_synced_block),
+                    event.last_synced_block,
+                )
+        return {
+            "topics": list(dict.fromkeys(event.topic_0 for event in network_events)),
+            "contract_addresses": contract_addresses,
+            "event_abis": {event.topic_0: event.abi for event in network_events},
+            "log_cursors": log_cursors if len(set(log_cursors.values())) > 1 else None,
+        }
+
+    def sync_event_windows(
+        self,
+        network_events: List[Any],
+        topics: List[str],
+        contract_addresses: List[str],
+        event_abis: Dict[str, Any],
+        global_from_block: int,
+        global_to_block: int,
+        backfill_shard: Optional[Tuple[str, int]] = None,
+        log_cursors: Optional[Dict[Tuple[str, str], int]] = None,
+    ):
+        """
+        Walk [global_from_block, global_to_block] in adaptive block windows.
+        Uses the pipelined walker when `pipeline_depth` > 0, otherwise fetches,
+        decodes and inserts one window at a time. With `backfill_shard` set to
+        (backfill_key, shard_index), committed windows are recorded as backfill
+        progress instead of moving last_synced_block directly. With `log_cursors`,
+        logs at or below their events' last_synced_block are dropped after fetching.
+
+        A reorg rollback started during the walk ends it at the first window
+        reaching the fork block, the next run resumes from the rewound cursors.
+        """
+        walker = (
+            self._run_pipelined_event_sync
+            if self.pipeline_depth > 0
+            else self._run_sequential_event_sync
+        )
+        try:
+            walker(
+                network_events,
+                topics,
+                contract_addresses,
+                event_abis,
+                global_from_block,
+                global_to_block,
+                backfill_shard,
+                log_cursors,
+                walk_started_at=time.time(),
+            )
+        except reorg.WindowRolledBack as e:
+            logger.warning(f"Stopped {self.event_model._meta.model_name} sync: {e}")
+
+    def get_window_controller(
+        self, topics: List[str], contract_addresses: List[str]
+    ) -> window_sizer.WindowController:
+        """Block window controller of this filter on the task's provider."""
+        if not self.persist_window_state:
+            return window_sizer.WindowController(
+                self.rpc_adapter.max_blockrange_size_for_events
+            )
+        return window_sizer.WindowController(
+            self.rpc_adapter.max_blockrange_size_for_events,
+            event_model=self.event_model,
+            topics=topics,
+            contract_addresses=contract_addresses,
+            rpc_url=self.rpc_adapter.rpc_url,
+        )
+
+    def _run_sequential_event_sync(
+        self,
+        network_events: List[Any],
+        topics: List[str],
+        contract_addresses: List[str],
+        event_abis: Dict[str, Any],
+        global_from_block: int,
+        global_to_block: int,
+        backfill_shard: Optional[Tuple[str, int]] = None,
+        log_cursors: Optional[Dict[Tuple[str, str], int]] = None,
+        walk_started_at: Optional[float] = None,
+    ):
+        controller = self.get_window_controller(topics, contract_addresses)
+        iter_from_block = global_from_block
+        iter_to_block = global_from_block + min(
+            global_to_block - global_from_block, controller.window
+        )
 
         while True:
+            if iter_from_block > iter_to_block:
+                break
+
             try:
-                if (iter_from_block - iter_to_block) >= 0:
-                    break
+                started = time.monotonic()
+                event_dicts = self.fetch_event_window(
+                    topics=topics,
+                    contract_addresses=contract_addresses,
+                    event_abis=event_abis,
+                    start_block=iter_from_block,
+                    end_block=iter_to_block,
+                    log_cursors=log_cursors,
+                )
+            except Exception as e:
+                window = iter_to_block - iter_from_block
+                if (
+                    not window_sizer.is_backoff_error(e)
+                    or window <= controller.min_window
+                ):
+                    raise e
+                controller.record_error(window, e)
+                iter_to_block = min(
+                    iter_from_block + controller.window, global_to_block
+                )
+                continue
+
+            controller.record_success(
+                iter_to_block - iter_from_block,
+                self._count_event_logs(event_dicts),
+                time.monotonic() - started,
+                truncated=iter_to_block >= global_to_block
+                and iter_to_block - iter_from_block < controller.window,
+            )
+            self.commit_event_window(
+                network_events=network_events,
+                event_dicts=event_dicts,
+                start_block=iter_from_block,
+                end_block=iter_to_block,
+                backfill_shard=backfill_shard,
+                walk_started_at=walk_started_at,
+            )
 
+            if iter_to_block >= global_to_block:
                 logger.info(
                     f"Event Extraction for network {self.network_name} "
-                    f"from {iter_from_block} to {iter_to_block}"
+                    f"has completed from {global_from_block} to {global_to_block}"
                 )
-
-                topics = [event.topic_0 for event in network_events]
-                event_abis = {event.topic_0: event.abi for event in network_events}
-
-                raw_event_dicts = self.rpc_adapter.extract_raw_event_data(
+                break
+
+            iter_from_block = iter_to_block + 1
+            iter_to_block = min(iter_from_block + controller.window, global_to_block)
+
+    def _run_pipelined_event_sync(
+        self,
+        network_events: List[Any],
+        topics: List[str],
+        contract_addresses: List[str],
+        event_abis: Dict[str, Any],
+        global_from_block: int,
+        global_to_block: int,
+        backfill_shard: Optional[Tuple[str, int]] = None,
+        log_cursors: Optional[Dict[Tuple[str, str], int]] = None,
+        walk_started_at: Optional[float] = None,
+    ):
+        """
+        Prefetch and decode up to `pipeline_depth` block windows on worker threads
+        while the calling thread inserts earlier windows.
+
+        Windows are committed strictly in block order on the calling thread, so
+        last_synced_block only ever advances over windows that have been fully
+        inserted. A backoff error (range too large, timeout) discards every
+        prefetched window from the failing one onwards and re-plans them at the
+        controller's reduced size.
+        """
+        controller = self.get_window_controller(topics, contract_addresses)
+        window = min(global_to_block - global_from_block, controller.window)
+        next_from_block = global_from_block
+        pending = deque()
+
+        def timed_fetch(**kwargs):
+            started = time.monotonic()
+            return self.fetch_event_window(**kwargs), time.monotonic() - started
+
+        def schedule(executor):
+            nonlocal next_from_block
+            while (
+                len(pending) < self.pipeline_depth
+                and next_from_block <= global_to_block
+            ):
+                start_block = next_from_block
+                end_block = min(start_block + window, global_to_block)
+                future = executor.submit(
+                    timed_fetch,
                     topics=topics,
                     contract_addresses=contract_addresses,
-                    start_block=iter_from_block,
-                    end_block=iter_to_block,
+                    event_abis=event_abis,
+                    start_block=start_block,
+                    end_block=end_block,
+                    log_cursors=log_cursors,
                 )
+                pending.append((start_block, end_block, future))
+                next_from_block = end_block + 1
 
-                event_dicts = self.process_raw_event_dicts(
-                    raw_event_dicts=raw_event_dicts, event_abis=event_abis
-                )
-                self.handle_event_logs(
-                    network_events=network_events, event_dicts=event_dicts
+        with ThreadPoolExecutor(max_workers=self.pipeline_depth) as executor:
+            schedule(executor)
+            while pending:
+                start_block, end_block, future = pending.popleft()
+                try:
+                    event_dicts, seconds = future.result()
+                except Exception as e:
+                    if not window_sizer.is_backoff_error(e):
+                        raise e
+                    if end_block - start_block <= controller.min_window:
+                        raise e
+                    window = controller.record_error(end_block - start_block, e)
+                    for _, _, prefetched in pending:
+                        prefetched.cancel()
+                    pending.clear()
+                    next_from_block = start_block
+                    schedule(executor)
+                    continue
+
+                window = controller.record_success(
+                    end_block - start_block,
+                    self._count_event_logs(event_dicts),
+                    seconds,
+                    truncated=end_block >= global_to_block
+                    and end_block - start_block < controller.window,
                 )
-                self.post_handle_hook(
+                self.commit_event_window(
                     network_events=network_events,
-                    start_block=iter_from_block,
-                    end_block=iter_to_block,
+                    event_dicts=event_dicts,
+                    start_block=start_block,
+                    end_block=end_block,
+                    backfill_shard=backfill_shard,
+                    walk_started_at=walk_started_at,
                 )
+                schedule(executor)
 
-                if iter_to_block >= global_to_block:
-                    self.update_last_synced_block(network_events, global_to_block)
-                    logger.info(
-                        f"Event Extraction for network {self.network_name} "
-                        f"has completed from {global_from_block} to {global_to_block}"
-                    )
-                    break
-                else:
-                    iter_delta = min(
-                        iter_to_block - iter_from_block,
-                        self.rpc_adapter.max_blockrange_size_for_events,
-                    )
-                    self.update_last_synced_block(network_events, iter_to_block)
-                    iter_from_block = iter_to_block + 1
-
-                    if len(event_dicts) >= self.EVENTS_ARRAY_THRESHOLD_SIZE:
-                        iter_to_block += int(iter_delta / 2)
-                    else:
-                        iter_to_block += min(
-                            iter_delta * 2,
-                            self.rpc_adapter.max_blockrange_size_for_events,
-                        )
-
-                    if iter_to_block >= global_to_block:
-                        iter_to_block = global_to_block
-
-            except Web3RPCError as e:
-                if e.rpc_response["error"]["code"] == -32005:
-                    logger.info(e)
-                    iter_delta = iter_delta // 2
-                    iter_to_block = iter_from_block + iter_delta
-
-                    if iter_to_block >= global_to_block:
-                        iter_to_block = global_to_block
-                else:
-                    raise e
+        logger.info(
+            f"Pipelined Event Extraction for network {self.network_name} "
+            f"has completed from {global_from_block} to {global_to_block}"
+        )
+
+    def fetch_event_window(
+        self,
+        topics: List[str],
+        contract_addresses: List[str],
+        event_abis: Dict[str, Any],
+        start_block: int,
+        end_block: int,
+        log_cursors: Optional[Dict[Tuple[str, str], int]] = None,
+    ) -> Dict:
+        """Fetch and decode the logs of a single block window."""
+        logger.info(
+            f"Event Extraction for network {self.network_name} "
+            f"from {start_block} to {end_block}"
+        )
+        raw_event_dicts = self.rpc_adapter.extract_raw_event_data(
+            topics=topics,
+            contract_addresses=contract_addresses,
+            start_block=start_block,
+            end_block=end_block,
+        )
+        if self.archive_raw_logs:
+            self.archive_event_window(
+                topics, contract_addresses, start_block, end_block, raw_event_dicts
+            )
+        if log_cursors and raw_event_dicts:
+            raw_event_dicts = self.drop_synced_logs(raw_event_dicts, log_cursors)
+        return self.process_raw_logs(raw_event_dicts, event_abis)
+
+    def archive_event_window(
+        self,
+        topics: List[str],
+        contract_addresses: List[str],
+        start_block: int,
+        end_block: int,
+        raw_event_dicts: List[Any],
+    ):
+        # A full disk must not stop the sync, the window is only missing from
+        # the archive
+        try:
+            log_archive.write_segment(
+                self.event_model._meta.model_name,
+                topics,
+                contract_addresses,
+                start_block,
+                end_block,
+                raw_event_dicts,
+            )
+        except Exception as e:
+            logger.error(f"Error archiving logs from {start_block} to {end_block}: {e}")
+
+    def process_raw_logs(self, raw_event_dicts: List[Any], event_abis: Dict[str, Any]):
+        if self.decode_event_rows:
+            return self.process_raw_event_rows(
+                raw_event_dicts=raw_event_dicts, event_abis=event_abis
+            )
+        return self.process_raw_event_dicts(
+            raw_event_dicts=raw_event_dicts, event_abis=event_abis
+        )
+
+    def get_tip_events(self):
+        """Events the head-of-chain ingestion keeps in sync."""
+        return self.event_model.objects.filter(is_enabled=True)
+
+    def ingest_block_logs(self, block_logs: List[Any], block_number: int) -> bool:
+        """
+        Head-of-chain ingestion of a single block from its receipt logs. Events
+        whose last_synced_block is the previous block get the block's logs matching
+        their combined topic/address filter committed as a one-block window, the
+        same way the range sync commits windows.
+
+        Returns False if any event lags behind and still needs the range sync.
+        """
+        walk_started_at = time.time()
+        events = list(self.get_tip_events())
+        caught_up = [
+            event for event in events if event.last_synced_block == block_number - 1
+        ]
+        lagging = [
+            event for event in events if event.last_synced_block < block_number - 1
+        ]
+        if not caught_up:
+            return not lagging
+
+        filters = self.get_sync_filters(caught_up)
+        topics = set(filters["topics"])
+        addresses = {address.lower() for address in filters["contract_addresses"]}
+        logs = [
+            log
+            for log in block_logs
+            if log["topics"]
+            and f"0x{log['topics'][0].hex()}" in topics
+            and log["address"].lower() in addresses
+        ]
+
+        event_dicts = self.process_raw_logs(logs, filters["event_abis"])
+        self.commit_event_window(
+            walk_started_at=walk_started_at,
+            network_events=self.event_model.objects.filter(
+                id__in=[event.id for event in caught_up]
+            ),
+            event_dicts=event_dicts,
+            start_block=block_number,
+            end_block=block_number,
+        )
+        logger.info(
+            f"Tip ingestion of block {block_number}: {len(logs)} logs for "
+            f"{len(caught_up)} {self.event_model._meta.model_name} events, "
+            f"{len(lagging)} lagging"
+        )
+        return not lagging
+
+    def drop_synced_logs(
+        self, raw_event_dicts: List[Any], log_cursors: Dict[Tuple[str, str], int]
+    ) -> List[Any]:
+        """Drop raw logs that are not above the last_synced_block of their events."""
+        new_logs = []
+        for log in raw_event_dicts:
+            key = (f"0x{log['topics'][0].hex()}", log["address"].lower())
+            if log["blockNumber"] > log_cursors.get(key, -1):
+                new_logs.append(log)
+        return new_logs
+
+    def commit_event_window(
+        self,
+        network_events: List[Any],
+        event_dicts: Dict,
+        start_block: int,
+        end_block: int,
+        backfill_shard: Optional[Tuple[str, int]] = None,
+        walk_started_at: Optional[float] = None,
+    ):
+        """
+        Insert a decoded window and advance last_synced_block past it. With reorg
+        protection, raises reorg.WindowRolledBack instead if a rollback since
+        walk_started_at reaches the window, and holds off rollbacks meanwhile.
+        """
+        fenced = reorg.REORG_PROTECTION_ENABLED and walk_started_at is not None
+        if fenced:
+            reorg.begin_window_commit(walk_started_at, end_block)
+        try:
+            self.handle_event_logs(
+                network_events=network_events, event_dicts=event_dicts
+            )
+            self.post_handle_hook(
+                network_events=network_events,
+                start_block=start_block,
+                end_block=end_block,
+            )
+            if backfill_shard is None:
+                self.update_last_synced_block(network_events, end_block)
+            else:
+                backfill_key, shard_index = backfill_shard
+                backfill.record_shard_progress(backfill_key, shard_index, end_block)
+                backfill.advance_last_synced_block(self.event_model, backfill_key)
+        finally:
+            if fenced:
+                reorg.end_window_commit()
+
+    def _count_event_logs(self, event_dicts: Dict) -> int:
+        return sum(len(event_logs) for event_logs in event_dicts.values())
 
     def post_handle_hook(
         self, network_events: List[Any], start_block: int, end_block: int
@@ -156,38 +576,132 @@ class EventSynchronizeMixin:
                 event_dicts[topic0].append(event_data)
         return event_dicts
 
+    def process_raw_event_rows(self, raw_event_dicts, event_abis):
+        if not raw_event_dicts:
+            return {}
+
+        timestamps = get_evm_block_timestamps(
+            set(log["blockNumber"] for log in raw_event_dicts)
+        )
+        return decode_event_rows(raw_event_dicts, event_abis, timestamps)
+
+    def build_event_rows(self, network_event: Any, event_logs: List[Any]) -> List:
+        """Flatten decoded web3 logs into rows in ClickHouse column order."""
+        log_fields = [
+            col_name for col_name, _ in network_event._get_clickhouse_log_columns()
+        ]
+        all_fields = [
+            col_name for col_name, _ in network_event._get_clickhouse_columns()
+        ]
+        arg_fields = [field for field in all_fields if field not in log_fields]
+
+        timestamps = self.get_timestamps_for_events(event_logs)
+        parsed_event_logs = []
+
+        for event_log in event_logs:
+            event_log_args = getattr(event_log, "args")
+            event_values = [getattr(event_log_args, field) for field in arg_fields]
+            log_values = [
+                getattr(event_log, field)
+                for field in log_fields
+                if field != "blockTimestamp"
+            ]
+            log_values.append(timestamps[event_log.blockNumber])
+            parsed_event_log = event_values + log_values
+            parsed_event_logs.append(parsed_event_log)
+        return parsed_event_logs
+
+    def get_log_address(self, event_log: Any) -> str:
+        if self.decode_event_rows:
+            # address is followed by blockNumber, transactionHash, transactionIndex,
+            # logIndex and blockTimestamp in every decoded row
+            return event_log[-6]
+        return event_log.address
+
+    def get_stored_log_keys(
+        self, table_name: str, block_numbers: List[int]
+    ) -> Set[Tuple[str, int]]:
+        """(transactionHash, logIndex) already stored in the table over the given blocks."""
+        if not self.deduplicate_event_rows or not block_numbers:
+            return set()
+        try:
+            return self.clickhouse_client.get_event_log_keys(
+                table_name, min(block_numbers), max(block_numbers)
+            )
+        except Exception as e:
+            # The table engine collapses duplicates on merge, so insert everything
+            logger.error(f"Error reading stored log keys of {table_name}: {e}")
+            return set()
+
+    def filter_new_event_rows(
+        self, rows: List[Any], stored_log_keys: Set[Tuple[str, int]]
+    ) -> List[Any]:
+        """
+        Drop rows whose (transactionHash, logIndex) is in stored_log_keys or repeated
+        within rows, adding the keys of kept rows to stored_log_keys. Rows end with
+        the log columns, so transactionHash and logIndex sit at fixed offsets.
+        """
+        if not self.deduplicate_event_rows:
+            return rows
+
+        new_rows = []
+        for row in rows:
+            key = (row[-4], row[-2])
+            if key not in stored_log_keys:
+                stored_log_keys.add(key)
+                new_rows.append(row)
+
+        if len(new_rows) < len(rows):
+            logger.info(f"Skipped {len(rows) - len(new_rows)} rows already stored")
+        return new_rows
+
+    def get_log_block_number(self, event_log: Any) -> int:
+        if self.decode_event_rows:
+            return event_log[-5]
+        return event_log.blockNumber
+
+    def get_unsynced_event_logs(
+        self, network_event: Any, event_logs: List[Any]
+    ) -> List[Any]:
+        """
+        Logs above the event's own last_synced_block. Merged walks fetch from the
+        lowest cursor of each (topic_0, address), so events sharing a topic and
+        address with a lagging event also receive logs they already stored.
+        """
+        if not self.filter_synced_event_logs:
+            return event_logs
+        return [
+            event_log
+            for event_log in event_logs
+            if self.get_log_block_number(event_log) > network_event.last_synced_block
+        ]
+
     def get_timestamps_for_events(self, event_logs: List[Any]):
         blocks = list(set([event.blockNumber for event in event_logs]))
         return get_evm_block_timestamps(blocks)
 
     def handle_event_logs(self, network_events: List[Any], event_dicts: Dict):
         for network_event in network_events:
-            event_logs = event_dicts.get(network_event.topic_0, [])
-            log_fields = [
-                col_name for col_name, _ in network_event._get_clickhouse_log_columns()
-            ]
-            all_fields = [
-                col_name for col_name, _ in network_event._get_clickhouse_columns()
-            ]
-            arg_fields = [field for field in all_fields if field not in log_fields]
-
+            event_logs = self.get_unsynced_event_logs(
+                network_event, event_dicts.get(network_event.topic_0, [])
+            )
             if not event_logs:
                 continue
 
-            timestamps = self.get_timestamps_for_events(event_logs)
-            parsed_event_logs = []
-
-            for event_log in event_logs:
-                event_log_args = getattr(event_log, "args")
-                event_values = [getattr(event_log_args, field) for field in arg_fields]
-                log_values = [
-                    getattr(event_log, field)
-                    for field in log_fields
-                    if field != "blockTimestamp"
-                ]
-                log_values.append(timestamps[event_log.blockNumber])
-                parsed_event_log = event_values + log_values
-                parsed_event_logs.append(parsed_event_log)
+            if self.decode_event_rows:
+                parsed_event_logs = event_logs
+            else:
+                parsed_event_logs = self.build_event_rows(network_event, event_logs)
+
+            stored_log_keys = self.get_stored_log_keys(
+                network_event.name,
+                [self.get_log_block_number(event_log) for event_log in event_logs],
+            )
+            parsed_event_logs = self.filter_new_event_rows(
+                parsed_event_logs, stored_log_keys
+            )
+            if not parsed_event_logs:
+                continue
 
             for i in range(3):
                 try:
@@ -197,6 +711,9 @@ class EventSynchronizeMixin:
                     break
                 except Exception as e:
                     logger.error(f"Error inserting rows: {e}")
+                    # Fail the window so its cursor is not moved past lost rows
+                    if i == 2:
+                        raise
                     time.sleep(5)
 
             for i in range(3):
@@ -207,9 +724,19 @@ class EventSynchronizeMixin:
                     logger.error(f"Error optimizing table: {e}")
                     time.sleep(5)
 
-            network_event.logs_count += len(event_logs)
-            network_event.save()
-            logger.info(f"Number of records inserted: {len(event_logs)}")
+            self.increment_logs_count({network_event.id: len(parsed_event_logs)})
+            logger.info(f"Number of records inserted: {len(parsed_event_logs)}")
+
+    def increment_logs_count(self, logs_counts: Dict[int, int]):
+        """
+        Add inserted log counts to the events in place. Shards and tip ingestion
+        commit the same events concurrently, saving a stale row would drop their
+        increments and move last_synced_block back.
+        """
+        for event_id, count in logs_counts.items():
+            self.event_model.objects.filter(id=event_id).update(
+                logs_count=F("logs_count") + count
+            )
 
     def update_last_synced_block(self, events: List[Any], block: int):
         """
@@ -218,21 +745,29 @@ class EventSynchronizeMixin:
         event_ids_to_update = [event.id for event in events]
 
         if event_ids_to_update:
-            self.event_model.objects.filter(id__in=event_ids_to_update).update(
-                last_synced_block=block, updated_at=datetime.now(pytz.utc)
-            )
+            # Events merged from a cursor ahead of this window keep their cursor
+            self.event_model.objects.filter(
+                id__in=event_ids_to_update, last_synced_block__lt=block
+            ).update(last_synced_block=block, updated_at=datetime.now(pytz.utc))
+            # Keep a long catch-up run marked as in flight for its group
+            sync_scheduler.refresh_sync(self.event_model, event_ids_to_update)
 
 
 class ParentSynchronizeTaskMixin:
     """
-    Mixin for parent synchronize tasks. Groups events by last_synced_block and fires child tasks.
+    Mixin for parent synchronize tasks. Groups events by last_synced_block and fires child tasks,
+    at most one queued or running child per group (see utils.sync_scheduler).
     Requires inheriting class to define:
       - event_model: The Django model for the event (e.g., Event, PriceEvent)
       - child_task: The celery child task to call (must have .delay method)
+    Optionally set:
+      - merge_lag_blocks: Merge groups whose last_synced_block are this close, so
+        their child walks each block range once with a combined eth_getLogs filter
     """
 
     event_model: Type[Any] = None
     child_task: Any = None
+    merge_lag_blocks: int = EVENT_SYNC_MERGE_LAG_BLOCKS
 
     def run(self):
         """Default run method for parent synchronize tasks."""
@@ -240,7 +775,31 @@ class ParentSynchronizeTaskMixin:
 
     def run_parent_sync(self):
         logger.info(f"Starting parent sync for {self.__class__.__name__}")
+        events_by_block = self.get_events_by_block()
+        target_block = self.child_task.rpc_adapter.cached_block_height
+
+        spawned = 0
+        for block, event_ids in events_by_block.items():
+            if sync_scheduler.request_sync(self.event_model, event_ids, target_block):
+                self.child_task.delay(event_ids=event_ids)
+                spawned += 1
+        sync_scheduler.record_queue_depth(
+            self.event_model, list(events_by_block.values())
+        )
+
+        logger.info(
+            f"Parent sync {self.__class__.__name__} completed, spawned {spawned} child tasks, "
+            f"coalesced {len(events_by_block) - spawned} triggers"
+        )
+
+    def get_events_by_block(
+        self, event_ids: Optional[List[int]] = None
+    ) -> Dict[int, List[int]]:
+        """Enabled events outside an active backfill, grouped by last_synced_block."""
         events = self.event_model.objects.filter(is_enabled=True)
+        if event_ids is not None:
+            events = events.filter(id__in=event_ids)
+
         events_by_block = {}
         for event in events.iterator():
             block = event.last_synced_block
@@ -248,9 +807,93 @@ class ParentSynchronizeTaskMixin:
                 events_by_block[block] = []
             events_by_block[block].append(event.id)
 
-        for block, event_ids in events_by_block.items():
-            self.child_task.delay(event_ids=event_ids)
+        backfilling = backfill.get_backfilling_event_ids(
+            self.event_model,
+            [event_id for ids in events_by_block.values() for event_id in ids],
+        )
+        if backfilling:
+            logger.info(
+                f"Skipping {len(backfilling)} events with an active backfill "
+                f"({', '.join(sorted(set(backfilling.values())))})"
+            )
+            events_by_block = {
+                block: [event_id for event_id in ids if event_id not in backfilling]
+                for block, ids in events_by_block.items()
+            }
+        return self.merge_event_groups(
+            {block: ids for block, ids in events_by_block.items() if ids}
+        )
 
-        logger.info(
-            f"Parent sync {self.__class__.__name__} completed, spawned {len(events_by_block)} child tasks"
+    def merge_event_groups(
+        self, events_by_block: Dict[int, List[int]]
+    ) -> Dict[int, List[int]]:
+        """
+        Merge cursor buckets lying within merge_lag_blocks of the lowest cursor of
+        their group, keyed by that lowest cursor. The child run starts from it and
+        drops already synced logs per event (see get_sync_filters), so each block
+        range is fetched once for the union of the group's topics and addresses.
+        """
+        merged = {}
+        group_block = None
+        for block in sorted(events_by_block):
+            if group_block is None or block - group_block > self.merge_lag_blocks:
+                group_block = block
+                merged[group_block] = []
+            merged[group_block].extend(events_by_block[block])
+
+        if len(merged) < len(events_by_block):
+            logger.info(
+                f"Merged {len(events_by_block)} {self.event_model._meta.model_name} "
+                f"cursor groups into {len(merged)}"
+            )
+        return merged
+
+    def run_backfill(
+        self,
+        shards: int = backfill.BACKFILL_SHARDS,
+        to_block: Optional[int] = None,
+        event_ids: Optional[List[int]] = None,
+    ) -> List[str]:
+        """
+        Split each event group's [last_synced_block + 1, to_block] into `shards`
+        disjoint ranges and dispatch one child task per range. Groups that already
+        have an active backfill are resumed: every unfinished shard is dispatched
+        again and continues from its last committed window.
+        """
+        to_block = to_block or self.child_task.rpc_adapter.block_height
+        backfill_keys = []
+
+        for block, ids in self.get_events_by_block(event_ids).items():
+            from_block = block + 1 if block != 0 else 0
+            if from_block >= to_block:
+                continue
+            backfill_keys.append(
+                backfill.create_backfill(
+                    self.event_model, ids, from_block, to_block, shards
+                )
+            )
+
+        # Active backfills are excluded from the grouping above, resume them as planned
+        events = self.event_model.objects.filter(is_enabled=True)
+        if event_ids is not None:
+            events = events.filter(id__in=event_ids)
+        active = backfill.get_backfilling_event_ids(
+            self.event_model, list(events.values_list("id", flat=True))
         )
+        backfill_keys.extend(set(active.values()) - set(backfill_keys))
+
+        for backfill_key in backfill_keys:
+            plan = backfill.get_backfill(backfill_key)
+            if plan is None:
+                continue
+            progress = backfill.get_shard_progress(backfill_key, plan)
+            for shard_index, ((_, shard_end), last_block) in enumerate(
+                zip(plan["shards"], progress)
+            ):
+                if last_block < shard_end:
+                    self.child_task.delay(
+                        event_ids=plan["event_ids"],
+                        backfill_key=backfill_key,
+                        shard_index=shard_index,
+                    )
+        return backfill_keys
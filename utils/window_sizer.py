@@ -0,0 +1,187 @@
+"""
+Persistent block window sizing for eth_getLogs walks.
+
+Every (event group filter, RPC provider) pair has a WindowController whose state
+is kept in the cache between task runs, so a sync starts from the window the
+previous run settled on instead of re-learning it from
+MAX_BLOCKRANGE_SIZE_FOR_EVENTS through failed requests.
+
+After each successful full window the controller rescales towards whichever of
+EVENT_WINDOW_TARGET_LOGS and EVENT_WINDOW_TARGET_SECONDS is tighter, by at most
+a factor of two either way; the last window of a walk, cut short at the chain
+tip, leaves the size unchanged. Provider errors that signal an oversized or slow
+request (-32005 and timeouts) halve the window. The current window, an
+exponentially weighted error rate and the last response are exposed through
+get_window_metrics.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List
+from urllib.parse import urlparse
+
+from decouple import config
+from django.core.cache import cache
+from requests.exceptions import Timeout
+from web3.exceptions import Web3RPCError
+
+logger = logging.getLogger(__name__)
+
+WINDOW_TARGET_LOGS = config("EVENT_WINDOW_TARGET_LOGS", cast=int, default=5_000)
+WINDOW_TARGET_SECONDS = config("EVENT_WINDOW_TARGET_SECONDS", cast=float, default=5.0)
+WINDOW_MIN_BLOCKS = config("EVENT_WINDOW_MIN_BLOCKS", cast=int, default=1)
+# Weight of the latest request in the error rate
+WINDOW_ERROR_DECAY = config("EVENT_WINDOW_ERROR_DECAY", cast=float, default=0.1)
+
+# -32005: query returns more than the provider's result or range limit
+BACKOFF_ERROR_CODES = {-32005}
+
+STATE_KEY = "event_window_{model}_{filter_key}_{provider}"
+INDEX_KEY = "event_window_index_{model}"
+
+
+def get_filter_key(topics: List[str], contract_addresses: List[str]) -> str:
+    filter_ids = (
+        ",".join(sorted(topics))
+        + "|"
+        + ",".join(sorted(address.lower() for address in contract_addresses))
+    )
+    return hashlib.sha1(filter_ids.encode()).hexdigest()[:16]
+
+
+def get_provider_name(rpc_url: str) -> str:
+    # Host only, provider URLs often carry API keys in their path
+    return urlparse(rpc_url).hostname or rpc_url
+
+
+def is_backoff_error(error: Exception) -> bool:
+    if isinstance(error, Timeout):
+        return True
+    if isinstance(error, Web3RPCError) and isinstance(error.rpc_response, dict):
+        return error.rpc_response.get("error", {}).get("code") in BACKOFF_ERROR_CODES
+    return False
+
+
+class WindowController:
+    """
+    Block window size of one event group filter on one provider. Windows are
+    counted like the sync walkers count them: end_block = start_block + window.
+
+    Without an event model the state only lives in memory for the walk.
+    """
+
+    def __init__(
+        self,
+        max_window: int,
+        event_model: Any = None,
+        topics: List[str] = (),
+        contract_addresses: List[str] = (),
+        rpc_url: str = "",
+        target_logs: int = WINDOW_TARGET_LOGS,
+        target_seconds: float = WINDOW_TARGET_SECONDS,
+        min_window: int = WINDOW_MIN_BLOCKS,
+    ):
+        self.max_window = max(max_window, 1)
+        self.min_window = max(min(min_window, self.max_window), 1)
+        self.target_logs = target_logs
+        self.target_seconds = target_seconds
+        self.state_key = None
+        self.state = {
+            "window": self.max_window,
+            "error_rate": 0.0,
+            "requests": 0,
+            "errors": 0,
+            "last_logs": None,
+            "last_seconds": None,
+            "updated_at": None,
+        }
+
+        if event_model is not None:
+            self.model = event_model._meta.model_name
+            self.provider = get_provider_name(rpc_url)
+            self.filter_key = get_filter_key(topics, contract_addresses)
+            self.state_key = STATE_KEY.format(
+                model=self.model, filter_key=self.filter_key, provider=self.provider
+            )
+            self.state.update(cache.get(self.state_key) or {})
+
+    @property
+    def window(self) -> int:
+        return max(self.min_window, min(self.state["window"], self.max_window))
+
+    def record_success(
+        self, window: int, logs: int, seconds: float, truncated: bool = False
+    ) -> int:
+        """
+        Rescale from a completed request of `window` blocks, returns the next window.
+        A `truncated` window was cut short by the end of the walk (the chain tip),
+        it says nothing about how large a full window can be and keeps the size.
+        """
+        if not truncated:
+            scale = 2.0
+            if logs > 0:
+                scale = min(scale, self.target_logs / logs)
+            if seconds > 0:
+                scale = min(scale, self.target_seconds / seconds)
+            scale = max(scale, 0.5)
+            self.state["window"] = int(max(window, 1) * scale)
+
+        self.state.update(last_logs=logs, last_seconds=round(seconds, 3))
+        self._record_request(error=False)
+        return self.window
+
+    def record_error(self, window: int, error: Exception) -> int:
+        """Back off after a provider error on a request of `window` blocks."""
+        self.state["window"] = min(window, self.state["window"]) // 2
+        self._record_request(error=True)
+        logger.info(
+            f"Backing off to {self.window} block windows after provider error: {error}"
+        )
+        return self.window
+
+    def _record_request(self, error: bool):
+        self.state["window"] = self.window
+        self.state["error_rate"] = round(
+            (1 - WINDOW_ERROR_DECAY) * self.state["error_rate"]
+            + WINDOW_ERROR_DECAY * float(error),
+            4,
+        )
+        self.state["requests"] += 1
+        self.state["errors"] += int(error)
+        self.state["updated_at"] = time.time()
+        self._save()
+
+    def _save(self):
+        if self.state_key is None:
+            return
+        # Concurrent walks of the same filter simply keep the last update
+        cache.set(self.state_key, self.state, timeout=None)
+
+        index_key = INDEX_KEY.format(model=self.model)
+        index = cache.get(index_key) or {}
+        if self.state_key not in index:
+            index[self.state_key] = {
+                "filter_key": self.filter_key,
+                "provider": self.provider,
+            }
+            cache.set(index_key, index, timeout=None)
+
+
+def get_window_metrics(event_model: Any) -> List[Dict]:
+    """Window state of every filter/provider pair an event model has synced."""
+    index = cache.get(INDEX_KEY.format(model=event_model._meta.model_name)) or {}
+    states = cache.get_many(list(index))
+    return [
+        {**labels, **states[state_key]}
+        for state_key, labels in index.items()
+        if state_key in states
+    ]
+
+
+def reset_window_state(event_model: Any) -> int:
+    """Forget the learned windows of an event model, e.g. after changing provider limits."""
+    index_key = INDEX_KEY.format(model=event_model._meta.model_name)
+    index = cache.get(index_key) or {}
+    cache.delete_many(list(index) + [index_key])
+    return len(index)